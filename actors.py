@@ -0,0 +1,342 @@
+"""
+그룹별 전송 액터
+등록된 그룹마다 자체 메일박스와 사이클 커서를 가진 액터가 독립적으로 돌면서
+기존 메시지를 순환 전송합니다. 느리거나 전송 제한에 걸린 그룹이 있어도
+다른 그룹의 전송은 멈추지 않습니다. ActorSupervisor가 액터를 그룹 목록에 맞춰
+생성/정지하고, 예외로 죽은 액터는 커서를 유지한 채 다시 시작합니다.
+액터의 다음 전송 시각은 타이밍 휠(scheduler.TimingWheel)에 예약되고,
+만료되면 휠이 액터 메일박스에 TICK을 넣습니다.
+
+전송 시각은 고정 주기(fixed-rate)로 정해집니다. 다음 전송은 '전송이 끝난 시각'이 아니라
+'이번 전송이 예정되었던 시각' + 간격이므로 재시도/대기 시간 때문에 주기가 밀리지 않습니다.
+전송이 늦어져 예정 시각을 놓친 경우의 처리 방식(catchup_policy):
+    skip     - 놓친 전송은 건너뛰고 다음 예정 시각부터 전송
+    coalesce - 놓친 전송을 한 번으로 합쳐 즉시 전송한 뒤 원래 주기로 복귀
+    burst    - 놓친 전송을 모두 즉시 연달아 전송
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from scheduler import TimerHandle, TimingWheel
+
+logger = logging.getLogger(__name__)
+
+# 메일박스 메시지 종류
+TICK = 'tick'  # 다음 사이클 메시지 전송
+WAKE = 'wake'  # 새 메시지 등록 등으로 대기 중인 액터 깨우기
+STOP = 'stop'  # 액터 종료
+
+# 보낼 메시지가 없을 때 다시 확인하는 간격 (초)
+IDLE_CHECK_INTERVAL = 60
+
+# 예정 시각을 놓쳤을 때의 처리 방식
+CATCHUP_POLICIES = ('skip', 'coalesce', 'burst')
+
+
+class GroupDeliveryActor:
+    """그룹 하나의 사이클 전송을 담당하는 액터
+
+    Args:
+        group_id: 담당 그룹 ID
+        scheduler: 다음 전송(TICK)을 예약할 타이밍 휠
+        deliver: (group_id, 메시지 ID 목록)을 받아 성공 여부를 반환하는 코루틴 함수
+        rotation_source: 사이클 시작 시 전송 단위(메시지 ID 목록의 목록)를 반환하는 함수
+        interval: 메시지 간 전송 간격(초)을 반환하는 함수
+        resend_wait: 사이클 간 재전송 대기 시간(초)을 반환하는 함수
+        catchup_policy: 예정 시각을 놓쳤을 때의 처리 방식 (skip/coalesce/burst)
+        on_advance: 전송 후 다음 전송 시각이 정해질 때마다 호출되는 함수 (사이클 위치 저장용)
+        on_cycle_complete: 사이클을 처음부터 끝까지 돌았을 때 (액터, 걸린 시간(초))로 호출되는 함수 (지표용)
+    """
+
+    def __init__(
+        self,
+        group_id: str,
+        scheduler: TimingWheel,
+        deliver: Callable[[str, List[int]], Awaitable[bool]],
+        rotation_source: Callable[[], List[List[int]]],
+        interval: Callable[[], float],
+        resend_wait: Callable[[], float],
+        catchup_policy: str = 'coalesce',
+        on_advance: Optional[Callable[['GroupDeliveryActor'], None]] = None,
+        on_cycle_complete: Optional[Callable[['GroupDeliveryActor', float], None]] = None,
+    ):
+        if catchup_policy not in CATCHUP_POLICIES:
+            raise ValueError(f"알 수 없는 catchup_policy: {catchup_policy} (가능: {', '.join(CATCHUP_POLICIES)})")
+        self.group_id = group_id
+        self.scheduler = scheduler
+        self.deliver = deliver
+        self.rotation_source = rotation_source
+        self.interval = interval
+        self.resend_wait = resend_wait
+        self.catchup_policy = catchup_policy
+        self.on_advance = on_advance
+        self.on_cycle_complete = on_cycle_complete
+        self.cycle_started_at: Optional[float] = None  # 현재 사이클 시작 시각 (이어서 전송한 사이클은 None)
+        self.mailbox: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.rotation: Optional[List[List[int]]] = None  # 현재 사이클의 전송 단위 (None이면 새 사이클)
+        self.cursor = 0  # 현재 사이클에서 다음에 보낼 위치
+        self.cycle = 1
+        self.resume_message_id: Optional[int] = None  # 재시작 후 첫 사이클을 이어서 시작할 메시지 ID
+        self.next_tick_at = time.monotonic()  # 첫 메시지는 즉시 전송 (실제로 TICK을 예약할 시각)
+        self.scheduled_for = self.next_tick_at  # 이번 TICK이 주기상 예정된 시각 (다음 시각 계산 기준)
+        self.missed_ticks = 0  # 예정 시각을 놓쳐 생략/병합된 전송 수 (누적)
+        self.catchup_warned_cycle: Optional[int] = None  # 전송 생략을 경고한 사이클 (사이클마다 한 번만 경고)
+        self.timer: Optional[TimerHandle] = None  # 휠에 예약된 다음 TICK
+        self.idle = False
+        self.stopping = False  # 정지 요청을 받음 (남은 TICK은 무시하고 종료)
+        self.restarts = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self.run(), name=f"group-actor-{self.group_id}")
+        return self.task
+
+    def send(self, message: tuple):
+        self.mailbox.put_nowait(message)
+
+    def stop(self):
+        """정지 요청 - 진행 중인 전송은 끝내고, 아직 처리하지 않은 TICK은 건너뜀"""
+        self.stopping = True
+        self.cancel_tick()
+        self.send((STOP,))
+
+    def snapshot(self) -> dict:
+        """재시작 후 이어서 전송하기 위한 사이클 위치
+
+        cycle: 현재 사이클 번호
+        next_message_id: 다음에 보낼 메시지 ID (새 사이클부터면 None)
+        next_due_at: 다음 전송 예정 시각 (time.time() 기준, 재시작 후에도 간격/재전송 대기를 지키기 위함)
+        """
+        next_message_id = self.resume_message_id
+        if self.rotation is not None and self.cursor < len(self.rotation):
+            next_message_id = self.rotation[self.cursor][0]
+        next_due_at = time.time() + max(0.0, self.next_tick_at - time.monotonic())
+        return {'cycle': self.cycle, 'next_message_id': next_message_id, 'next_due_at': next_due_at}
+
+    def resume(self, position: dict):
+        """snapshot()으로 저장한 위치에서 이어서 전송 (시작 전에 호출)"""
+        self.cycle = position.get('cycle') or 1
+        self.resume_message_id = position.get('next_message_id')
+        next_due_at = position.get('next_due_at')
+        if next_due_at is not None:
+            self.next_tick_at = time.monotonic() + max(0.0, next_due_at - time.time())
+            self.scheduled_for = self.next_tick_at
+
+    def resume_cursor(self, rotation: List[List[int]]) -> int:
+        """저장된 메시지 ID의 전송 단위 위치 (삭제된 메시지면 그 다음 ID부터, 목록 끝을 넘으면 0)"""
+        message_id = self.resume_message_id
+        self.resume_message_id = None
+        if message_id is None:
+            return 0
+        for index, batch in enumerate(rotation):
+            if message_id in batch:
+                return index
+        for index, batch in enumerate(rotation):
+            if batch[0] > message_id:
+                return index
+        return 0
+
+    def schedule_tick(self, deadline: float):
+        """다음 TICK을 타이밍 휠에 예약 (이전 예약은 취소)"""
+        self.cancel_tick()
+        self.next_tick_at = deadline
+        self.timer = self.scheduler.schedule_at(deadline, self.send, (TICK,), name=f"group-tick-{self.group_id}")
+
+    def cancel_tick(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    async def run(self):
+        self.schedule_tick(self.next_tick_at)
+        try:
+            while True:
+                message = await self.mailbox.get()
+                kind = message[0]
+                if kind == STOP or self.stopping:
+                    return
+                if kind == WAKE:
+                    if self.idle:
+                        self.scheduled_for = time.monotonic()
+                        self.schedule_tick(self.scheduled_for)
+                    continue
+                if kind == TICK:
+                    self.timer = None
+                    await self.tick()
+                    self.schedule_tick(self.next_tick_at)
+        finally:
+            self.cancel_tick()
+
+    async def tick(self):
+        """사이클의 다음 메시지(또는 배치)를 전송하고 다음 전송 시각을 정함"""
+        now = time.monotonic()
+        if self.rotation is None or self.cursor >= len(self.rotation):
+            self.rotation = self.rotation_source()
+            self.cursor = self.resume_cursor(self.rotation) if self.rotation else 0
+            if not self.rotation:
+                self.idle = True
+                self.rotation = None
+                self.scheduled_for = now + IDLE_CHECK_INTERVAL
+                self.next_tick_at = self.scheduled_for
+                return
+            self.idle = False
+            self.cycle_started_at = None if self.cursor else now
+            if self.cursor:
+                logger.info(f"=== 그룹 {self.group_id}: {self.cycle}번째 사이클 이어서 전송 ({self.cursor + 1}/{len(self.rotation)}부터) ===")
+            else:
+                logger.info(f"=== 그룹 {self.group_id}: {self.cycle}번째 사이클 시작 (전송 단위 {len(self.rotation)}개) ===")
+
+        batch = self.rotation[self.cursor]
+        total = len(self.rotation)
+        success = await self.deliver(self.group_id, batch)
+        if success:
+            logger.info("✅ [그룹 %s, 사이클 %s, %s/%s] 전송 완료 (ID: %s)", self.group_id, self.cycle, self.cursor + 1, total, batch)
+        else:
+            logger.warning("⚠️ [그룹 %s, 사이클 %s, %s/%s] 전송 실패 (ID: %s). 다음 메시지로 진행합니다.", self.group_id, self.cycle, self.cursor + 1, total, batch)
+        self.cursor += 1
+
+        if self.cursor >= total:
+            logger.info(f"✅ 그룹 {self.group_id}: {self.cycle}번째 사이클 완료! 다음 사이클까지 {self.resend_wait() // 60}분 대기")
+            if self.on_cycle_complete is not None and self.cycle_started_at is not None:
+                self.on_cycle_complete(self, time.monotonic() - self.cycle_started_at)
+            self.cycle += 1
+            self.rotation = None
+            self.plan_next_tick(self.resend_wait())
+        else:
+            self.plan_next_tick(self.interval())
+        if self.on_advance is not None:
+            self.on_advance(self)
+
+    def plan_next_tick(self, period: float):
+        """예정 시각 + period로 다음 전송 시각을 정함 (놓친 시각은 catchup_policy로 처리)"""
+        period = max(period, 0.001)
+        deadline = self.scheduled_for + period
+        now = time.monotonic()
+        if deadline > now:
+            self.scheduled_for = deadline
+            self.next_tick_at = deadline
+            return
+
+        missed = int((now - deadline) // period) + 1
+        if self.catchup_policy == 'burst':
+            # 밀린 시각을 하나씩 그대로 예약 → 따라잡을 때까지 연달아 전송
+            self.scheduled_for = deadline
+            self.next_tick_at = deadline
+            logger.debug(f"⏱️ 그룹 {self.group_id}: 예정 시각보다 {now - deadline:.1f}초 늦음 (burst로 따라잡는 중)")
+            return
+        if self.catchup_policy == 'coalesce':
+            # 밀린 전송은 지금 한 번만 하고, 그 다음부터는 원래 주기로 복귀
+            dropped = missed - 1
+            self.scheduled_for = deadline + dropped * period
+            self.next_tick_at = now
+        else:
+            # skip: 밀린 전송은 건너뛰고 다음 예정 시각에 전송
+            dropped = missed
+            self.scheduled_for = deadline + missed * period
+            self.next_tick_at = self.scheduled_for
+        self.missed_ticks += dropped
+        message = f"⏱️ 그룹 {self.group_id}: 예정 시각 {missed}번 놓침 ({self.catchup_policy} 처리, 생략된 전송 {dropped}번)"
+        # 생략된 전송이 있으면 사이클마다 처음 한 번만 경고 (느린 사이클에서 매 전송마다 경고하지 않음)
+        # 조금 늦기만 한 경우(coalesce로 바로 전송)나 같은 사이클의 이후 지연은 debug로만 기록
+        if dropped > 0 and self.catchup_warned_cycle != self.cycle:
+            self.catchup_warned_cycle = self.cycle
+            logger.warning(f"{message} - 이번 사이클의 이후 지연은 debug로 기록")
+        else:
+            logger.debug(message)
+
+
+class ActorSupervisor:
+    """그룹별 액터를 관리 (그룹 목록 동기화, 죽은 액터 재시작)"""
+
+    def __init__(self, actor_factory: Callable[[str], GroupDeliveryActor], restart_delay: float = 5, max_restart_delay: float = 300):
+        self.actor_factory = actor_factory
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.actors: Dict[str, GroupDeliveryActor] = {}
+
+    def add(self, group_id: str) -> GroupDeliveryActor:
+        actor = self.actors.get(group_id)
+        if actor is None:
+            actor = self.actor_factory(group_id)
+            self.actors[group_id] = actor
+            self._start(actor)
+            logger.info(f"🎬 그룹 액터 시작: {group_id} (총 {len(self.actors)}개)")
+        return actor
+
+    def remove(self, group_id: str):
+        actor = self.actors.pop(group_id, None)
+        if actor is not None:
+            actor.stop()
+            logger.info(f"🛑 그룹 액터 정지: {group_id} (총 {len(self.actors)}개)")
+
+    def rename(self, old_group_id: str, new_group_id: str):
+        """그룹 ID가 바뀐 액터를 커서/예약을 유지한 채 새 ID로 옮김 (새 ID의 액터가 이미 있으면 예전 액터 정지)"""
+        actor = self.actors.pop(old_group_id, None)
+        if actor is None:
+            return
+        if new_group_id in self.actors:
+            actor.stop()
+            logger.info(f"🛑 그룹 액터 정지: {old_group_id} (새 ID {new_group_id}의 액터가 이미 있음)")
+            return
+        # 진행 중인 전송은 예전 ID로 끝나고, 다음 전송부터 새 ID로 보냄
+        actor.group_id = new_group_id
+        self.actors[new_group_id] = actor
+        logger.info(f"🔀 그룹 액터 ID 변경: {old_group_id} → {new_group_id}")
+
+    def sync(self, group_ids: Iterable[str]):
+        """등록된 그룹 목록에 맞춰 액터 생성/정지"""
+        wanted = set(group_ids)
+        for group_id in list(self.actors):
+            if group_id not in wanted:
+                self.remove(group_id)
+        for group_id in wanted:
+            self.add(group_id)
+
+    def broadcast(self, message: tuple):
+        for actor in self.actors.values():
+            actor.send(message)
+
+    async def stop_all(self, timeout: Optional[float] = None) -> List[GroupDeliveryActor]:
+        """모든 액터에 정지 요청 후 진행 중인 전송이 끝나기를 기다림 (timeout 초과 시 취소)
+
+        Returns:
+            정지한 액터 목록 (사이클 위치 저장용)
+        """
+        actors = list(self.actors.values())
+        self.actors.clear()
+        for actor in actors:
+            actor.stop()
+        tasks = [actor.task for actor in actors if actor.task is not None and not actor.task.done()]
+        if not tasks:
+            return actors
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⚠️ 그룹 액터 {len(pending)}개가 제한 시간 안에 끝나지 않아 취소했습니다.")
+            await asyncio.gather(*pending, return_exceptions=True)
+        return actors
+
+    def _start(self, actor: GroupDeliveryActor):
+        task = actor.start()
+        task.add_done_callback(lambda t, a=actor: self._on_actor_done(a, t))
+
+    def _on_actor_done(self, actor: GroupDeliveryActor, task: asyncio.Task):
+        if task.cancelled() or self.actors.get(actor.group_id) is not actor:
+            return
+        error = task.exception()
+        if error is None:
+            return
+        # 예외로 죽은 액터는 커서를 유지한 채 점점 길게 기다렸다가 다시 시작
+        actor.restarts += 1
+        delay = min(self.restart_delay * (2 ** (actor.restarts - 1)), self.max_restart_delay)
+        logger.error(f"❌ 그룹 액터 오류 (그룹: {actor.group_id}): {error!r} - {delay:.0f}초 후 재시작 ({actor.restarts}회째)")
+        asyncio.get_running_loop().call_later(delay, self._restart, actor)
+
+    def _restart(self, actor: GroupDeliveryActor):
+        if self.actors.get(actor.group_id) is actor:
+            actor.next_tick_at = time.monotonic()
+            actor.scheduled_for = actor.next_tick_at
+            self._start(actor)
@@ -5,20 +5,46 @@ Replit Web Service 진입점
 """
 import threading
 import os
+import signal
 import sys
 import time
 
-def start_bot():
+def start_bot(forwarder):
     """봇을 별도 스레드에서 실행"""
     try:
-        # bot.py의 main 함수 실행
+        # bot.py의 main 함수 실행 (종료 요청을 넘길 수 있도록 메인 스레드에서 만든 forwarder 사용)
         from bot import main
-        main()
+        main(forwarder)
     except Exception as e:
         print(f"봇 시작 실패: {e}")
         import traceback
         traceback.print_exc()
 
+def create_forwarder():
+    """메인 스레드에서 봇 객체 생성 (실패하면 웹서버만 실행)"""
+    try:
+        from bot import TelegramChannelForwarder
+        return TelegramChannelForwarder()
+    except Exception as e:
+        print(f"봇 시작 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def stop_bot(forwarder, bot_thread, reason):
+    """봇에 종료를 요청하고 종료 절차가 끝날 때까지 대기"""
+    from config import SHUTDOWN_TIMEOUT_SECONDS
+    # 신호 핸들러는 메인 스레드에서만 등록 가능하므로 봇 스레드에 넘김 (봇 루프가 아직 없으면 시작하자마자 종료)
+    forwarder.request_shutdown_threadsafe(reason)
+    # 종료 절차 제한 시간에 여유를 두고 대기 (넘기면 데몬 스레드라 프로세스와 함께 종료)
+    bot_thread.join(timeout=SHUTDOWN_TIMEOUT_SECONDS + 5)
+    if bot_thread.is_alive():
+        print("봇 종료 절차가 제한 시간 안에 끝나지 않았습니다.")
+
+def handle_sigterm(signum, frame):
+    """SIGTERM을 받으면 웹서버를 멈추고 봇 종료로 넘어감"""
+    raise SystemExit(0)
+
 def start_web_server():
     """KeepAlive 웹서버 실행 (메인)"""
     from keepalive import app
@@ -28,11 +54,22 @@ def start_web_server():
     app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
 
 if __name__ == '__main__':
+    forwarder = create_forwarder()
+    
     # 봇을 백그라운드 스레드에서 시작
-    bot_thread = threading.Thread(target=start_bot, daemon=True)
-    bot_thread.start()
+    bot_thread = None
+    if forwarder is not None:
+        bot_thread = threading.Thread(target=start_bot, args=(forwarder,), daemon=True)
+        bot_thread.start()
+    
+    # SIGTERM(배포/재시작)은 메인 스레드에서 받아 봇 스레드에 종료를 요청
+    signal.signal(signal.SIGTERM, handle_sigterm)
     
     # 메인 스레드에서 웹서버 실행 (이게 메인 프로세스)
     # Replit이 이 웹서버를 Web Service로 인식하여 24시간 유지
-    start_web_server()
-
+    try:
+        start_web_server()
+    finally:
+        # 웹서버가 멈추면 (SIGTERM, Ctrl+C) 봇도 종료 절차를 밟은 뒤 프로세스 종료
+        if bot_thread is not None:
+            stop_bot(forwarder, bot_thread, '웹서버 종료')
@@ -0,0 +1,467 @@
+"""
+전송 처리량 벤치마크 (가짜 Bot API 서버 사용, 텔레그램에 실제로 보내지 않음)
+fake_telegram_api의 서버를 띄우고 TelegramChannelForwarder로 그룹 N개 × 새 메시지 M개를 보낸 뒤
+처리량과 지연 시간을 보고합니다. 성능 관련 변경 전후에 같은 옵션으로 실행해 비교하세요.
+
+    messages/sec        - 초당 그룹 전달 수 (메시지 1개 × 그룹 1개 = 1)
+    fan-out p50/p99     - 새 메시지 1개를 모든 그룹에 보내는 데 걸린 시간 (forward_message 1번)
+    calls/delivered     - 전달 1건당 Bot API 호출 수 (고정, 그룹 조회, 429 포함)
+
+--scenario로 시나리오 파일(scenarios/*.json)을 주면 fault_injection의 장애를 HTTP 전송 계층 앞에 넣고
+복원력을 측정합니다. (재시도/백오프 설정을 바꾼 전후에 같은 시나리오로 비교)
+
+    completeness        - 전달할 수 있었던 (그룹, 메시지) 중 실제로 전달된 비율
+                          (봇이 제거된 그룹, 삭제된 원본처럼 전달할 수 없게 된 것은 제외)
+    wasted calls        - 실패한 요청 + 중복 전달 (응답을 잃어버려 다시 보낸 경우 등)
+    recovery p50/max    - 그룹(또는 메서드)의 요청이 실패하기 시작한 뒤 다시 성공할 때까지 걸린 시간
+    after last fault    - 마지막 장애 이후 모든 전달이 끝날 때까지 걸린 시간
+
+    workload: forward  - forward_message로 새 메시지 M개를 보내고, 실패한 전송은 전송 대기열 워커가 재시도
+              rotation - send_existing_messages_sequentially로 기존 메시지 M개를 cycles번 순환 전송
+              startup  - 채널 포스트 M개가 쌓인 상태에서 start_polling (시작 중 Conflict 등)
+                         idle_seconds를 주면 그 뒤 업데이트 없이 polling하는 동안 readiness 유지 확인
+
+사용법:
+    python benchmark.py --groups 50 --messages 20 --latency 0.05
+    python benchmark.py --groups 20 --messages 10 --real-limits --chat-rate 0.33   # 실제 속도 제한으로
+    python benchmark.py --scenario scenarios/retry_after_burst.json
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_TOKEN = '123456:BENCHMARK-FAKE-TOKEN'
+BENCH_CHANNEL_ID = -1009000000001
+BENCH_GROUP_BASE = -1008000000000
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """정렬한 값에서 가장 가까운 순위의 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def prepare_environment(args, env: Optional[Dict[str, object]] = None):
+    """bot.py를 불러오기 전에 상태 DB/로그를 임시 폴더로 돌리고 설정값(환경변수) 적용"""
+    workdir = tempfile.mkdtemp(prefix='forwarder-bench-')
+    os.environ['STATE_DB_PATH'] = str(Path(workdir) / 'bench_state.db')
+    os.environ['LOG_FILE'] = str(Path(workdir) / 'bench.log')
+    os.environ.setdefault('LOG_LEVEL', args.log_level)
+    os.environ.setdefault('LOG_SEND_LEVEL', args.log_level)
+    os.environ['FANOUT_CONCURRENCY'] = str(args.concurrency)
+    for name, value in (env or {}).items():
+        os.environ[name] = str(value)
+
+
+async def start_forwarder(server, real_limits: bool, request=None, get_updates_request=None):
+    """가짜 서버에 연결된 TelegramChannelForwarder 준비 (상태 DB, 전송 대기열, application 초기화)
+
+    request/get_updates_request는 ObservedRequest(또는 하위 클래스)여야 하며, 봇과 같게 요청 지표를 기록하도록 관찰 함수를 붙입니다.
+    """
+    from telegram.ext import Application
+    import bot
+    from observed_request import ObservedRequest
+    from ratelimit import TelegramRateLimiter
+
+    forwarder = bot.TelegramChannelForwarder()
+    forwarder.state.open()
+    forwarder.persister.start()
+    forwarder.outbox.open()
+    if real_limits:
+        # 봇 설정 그대로 (전체 초당 30개, 그룹 분당 20개)
+        forwarder.rate_limiter = TelegramRateLimiter(
+            overall_per_second=bot.GLOBAL_RATE_LIMIT_PER_SECOND,
+            group_per_minute=bot.GROUP_RATE_LIMIT_PER_MINUTE,
+            private_per_second=bot.PRIVATE_RATE_LIMIT_PER_SECOND,
+            group_burst=bot.GROUP_RATE_LIMIT_BURST,
+        )
+    else:
+        # 코드 자체의 처리량을 보기 위해 봇 쪽 속도 제한은 사실상 끔 (가짜 서버의 제한은 그대로)
+        forwarder.rate_limiter = TelegramRateLimiter(overall_per_second=100000, group_per_minute=6000000, group_burst=100000)
+    if request is None:
+        request = ObservedRequest(connection_pool_size=256)
+    if get_updates_request is None:
+        get_updates_request = ObservedRequest()
+    request.observer = get_updates_request.observer = forwarder.observe_api_request
+    forwarder.application = (
+        Application.builder()
+        .token(BENCH_TOKEN)
+        .base_url(server.base_url)
+        .rate_limiter(forwarder.rate_limiter)
+        .request(request)
+        .get_updates_request(get_updates_request)
+        .build()
+    )
+    await forwarder.application.initialize()
+    return forwarder
+
+
+async def stop_forwarder(forwarder):
+    await forwarder.application.shutdown()
+    forwarder.outbox.close()
+    forwarder.persister.close()
+    forwarder.state.close()
+
+
+async def run_benchmark(args) -> dict:
+    prepare_environment(args)
+
+    from fake_telegram_api import FakeTelegramAPI, FakeTelegramServer
+    import bot
+
+    api = FakeTelegramAPI(args.latency, args.jitter, args.global_rate, args.chat_rate, args.chat_burst)
+    server = FakeTelegramServer(api).start()
+    forwarder = await start_forwarder(server, args.real_limits)
+    forwarder.is_fully_started = True
+
+    group_ids = [str(BENCH_GROUP_BASE - index) for index in range(args.groups)]
+    bot.registered_group_ids.update(group_ids)
+    api.reset()  # getMe 등 준비 요청은 제외
+
+    fanout_latencies: List[float] = []
+    started_at = time.perf_counter()
+    try:
+        for message_id in range(1, args.messages + 1):
+            message_data = {'chat_id': BENCH_CHANNEL_ID, 'message_id': message_id, 'date': None}
+            sent_at = time.perf_counter()
+            await forwarder.forward_message(message_data)
+            fanout_latencies.append(time.perf_counter() - sent_at)
+        elapsed = time.perf_counter() - started_at
+    finally:
+        await stop_forwarder(forwarder)
+        server.stop()
+
+    stats = api.stats()
+    delivered = stats['delivered']
+    return {
+        'groups': args.groups,
+        'messages': args.messages,
+        'expected_deliveries': args.groups * args.messages,
+        'delivered': delivered,
+        'elapsed_seconds': round(elapsed, 3),
+        'messages_per_second': round(delivered / elapsed, 1) if elapsed else None,
+        'fanout_p50_seconds': round(percentile(fanout_latencies, 50), 4),
+        'fanout_p99_seconds': round(percentile(fanout_latencies, 99), 4),
+        'fanout_max_seconds': round(max(fanout_latencies, default=0.0), 4),
+        'api_calls': stats['total_calls'],
+        'calls_per_delivered': stats['calls_per_delivered'],
+        'calls_by_method': stats['calls'],
+        'rate_limited': stats['rate_limited'],
+    }
+
+
+# --- 장애 주입 시나리오 ---
+
+async def wait_until(condition, timeout: float, interval: float = 0.1) -> bool:
+    """condition()이 참이 될 때까지 기다림 (timeout까지, 결과 반환)"""
+    deadline = time.monotonic() + timeout
+    while not await condition():
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(interval)
+    return True
+
+
+async def run_forward_workload(forwarder, messages: int, settle_seconds: float) -> dict:
+    """forward_message로 새 메시지를 보내고, 전송 대기열이 비거나 settle_seconds가 지날 때까지 재시도를 기다림"""
+    for message_id in range(1, messages + 1):
+        await forwarder.forward_message({'chat_id': BENCH_CHANNEL_ID, 'message_id': message_id, 'date': None})
+
+    async def outbox_settled() -> bool:
+        stats = await forwarder.outbox.stats()
+        return not any(count for status, count in stats.items() if status != 'dead')
+
+    settled = await wait_until(outbox_settled, settle_seconds)
+    stats = await forwarder.outbox.stats()
+    return {'settled': settled, 'outbox_pending': stats.get('pending', 0), 'outbox_dead': stats.get('dead', 0)}
+
+
+async def run_rotation_workload(forwarder, messages: int, rotation: dict, settle_seconds: float) -> dict:
+    """send_existing_messages_sequentially로 기존 메시지를 cycles번 돌 때까지 순환 전송"""
+    import bot
+
+    cycles = int(rotation.get('cycles', 1))
+    bot.current_message_interval = float(rotation.get('interval', 0.1))
+    bot.current_resend_wait_time = float(rotation.get('resend_wait', bot.current_message_interval))
+    bot.channel_message_ids.update(range(1, messages + 1))
+
+    async def cycles_done() -> bool:
+        # 제거된 그룹의 액터는 제외 (액터가 아직 만들어지지 않았으면 기다림)
+        group_ids = bot.registered_group_ids.snapshot()
+        actors = [forwarder.supervisor.actors.get(group_id) for group_id in group_ids]
+        return all(actor is not None and actor.cycle > cycles for actor in actors)
+
+    forwarder.is_running = True
+    task = asyncio.create_task(forwarder.send_existing_messages_sequentially())
+    try:
+        settled = await wait_until(cycles_done, settle_seconds)
+    finally:
+        forwarder.is_running = False
+        forwarder.shutdown_event.set()
+        await task
+    return {'settled': settled}
+
+
+async def run_startup_workload(forwarder, api, messages: int, settle_seconds: float, idle_seconds: float = 0) -> dict:
+    """채널 포스트가 쌓인 상태에서 start_polling을 시작하고, 모든 포스트를 받을 때까지 걸린 시간 측정
+
+    idle_seconds를 주면 모든 포스트를 받은 뒤 새 업데이트 없이 그만큼 polling을 계속하면서
+    readiness가 getUpdates 정체로 실패하지 않는지 확인합니다. (빈 응답도 getUpdates 성공이므로 준비 상태 유지)
+    """
+    for message_id in range(1, messages + 1):
+        api.post_channel_message(BENCH_CHANNEL_ID, message_id)
+
+    started_at = time.monotonic()
+    received = 0
+    first_update_seconds = None
+    all_updates_seconds = None
+    idle_failures = []
+    try:
+        await forwarder.start_polling()
+        queue = forwarder.application.update_queue
+        while received < messages:
+            remaining = settle_seconds - (time.monotonic() - started_at)
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            received += 1
+            if first_update_seconds is None:
+                first_update_seconds = time.monotonic() - started_at
+        if received == messages:
+            all_updates_seconds = time.monotonic() - started_at
+            # 벤치마크에서는 하트비트와 사이클 전송 작업을 돌리지 않으므로 getUpdates 정체 이유만 봄
+            idle_until = time.monotonic() + idle_seconds
+            while time.monotonic() < idle_until:
+                await asyncio.sleep(0.5)
+                _, detail = forwarder.health.readiness()
+                idle_failures.extend(reason for reason in detail['reasons'] if 'getUpdates' in reason)
+    finally:
+        if forwarder.application.updater.running:
+            await forwarder.application.updater.stop()
+    idle_ready = not idle_failures if idle_seconds and all_updates_seconds is not None else None
+    return {
+        'settled': received == messages and idle_ready is not False,
+        'updates_received': received,
+        'first_update_seconds': None if first_update_seconds is None else round(first_update_seconds, 3),
+        'all_updates_seconds': None if all_updates_seconds is None else round(all_updates_seconds, 3),
+        'idle_seconds': idle_seconds,
+        'idle_ready': idle_ready,
+        'idle_not_ready_samples': len(idle_failures),
+        'idle_first_failure': idle_failures[0] if idle_failures else None,
+    }
+
+
+def apply_retry_policies(overrides: Dict[str, dict]):
+    """시나리오의 retry_policies로 retry_policy.POLICIES 일부 값을 바꿈 (예: {"forward": {"max_attempts": 5}})"""
+    import retry_policy
+
+    for name, values in overrides.items():
+        values = dict(values)
+        if 'retry_on' in values:
+            values['retry_on'] = frozenset(values['retry_on'])
+        retry_policy.POLICIES[name] = dataclasses.replace(retry_policy.POLICIES[name], **values)
+
+
+async def run_scenario(args, scenario: dict) -> dict:
+    groups = args.groups or scenario.get('groups', 20)
+    messages = args.messages or scenario.get('messages', 10)
+    workload = scenario.get('workload', 'forward')
+    settle_seconds = float(scenario.get('settle_seconds', 60))
+    if workload not in ('forward', 'rotation', 'startup'):
+        raise ValueError(f"workload는 forward, rotation, startup 중 하나여야 합니다. (현재: {workload})")
+    prepare_environment(args, scenario.get('env'))
+
+    from fake_telegram_api import FakeTelegramAPI, FakeTelegramServer
+    from fault_injection import FaultInjectingRequest, FaultInjector, build_rules
+    import bot
+
+    apply_retry_policies(scenario.get('retry_policies', {}))
+    api = FakeTelegramAPI(**scenario.get('fake_api', {}))
+    server = FakeTelegramServer(api).start()
+    group_ids = [str(BENCH_GROUP_BASE - index) for index in range(groups)]
+    injector = FaultInjector(build_rules(scenario['faults'], group_ids), seed=scenario.get('seed'))
+    forwarder = await start_forwarder(
+        server,
+        scenario.get('real_limits', False),
+        request=FaultInjectingRequest(injector, connection_pool_size=max(8, args.concurrency)),
+        get_updates_request=FaultInjectingRequest(injector),
+    )
+    for name, value in scenario.get('outbox', {}).items():
+        setattr(forwarder.outbox, name, value)
+    bot.registered_group_ids.update(group_ids)
+
+    # 전송 대기열 워커는 리더 임대가 있어야 행을 가져감
+    forwarder.leader.open()
+    await forwarder.leader.acquire()
+    forwarder.leader.start_heartbeat()
+    if workload != 'startup':
+        forwarder.is_fully_started = True
+        forwarder.outbox.start_workers(forwarder.deliver_outbox_item, count=bot.OUTBOX_WORKERS)
+
+    api.reset()
+    injector.begin()
+    started_at = time.monotonic()
+    try:
+        if workload == 'forward':
+            outcome = await run_forward_workload(forwarder, messages, settle_seconds)
+        elif workload == 'rotation':
+            outcome = await run_rotation_workload(forwarder, messages, scenario.get('rotation', {}), settle_seconds)
+        else:
+            outcome = await run_startup_workload(forwarder, api, messages, settle_seconds, float(scenario.get('idle_seconds', 0)))
+        elapsed = time.monotonic() - started_at
+    finally:
+        await forwarder.outbox.stop_workers(timeout=5)
+        await forwarder.leader.release()
+        forwarder.leader.close()
+        await stop_forwarder(forwarder)
+        server.stop()
+
+    report = injector.report()
+    result = {
+        'scenario': scenario['name'],
+        'workload': workload,
+        'groups': groups,
+        'messages': messages,
+        'elapsed_seconds': round(elapsed, 3),
+        **outcome,
+    }
+    if workload == 'startup':
+        result['completeness'] = round(outcome['updates_received'] / messages, 4) if messages else None
+        duplicates = 0
+    else:
+        pairs = [(group_id, message_id) for group_id in group_ids for message_id in range(1, messages + 1)]
+        deliverable = [pair for pair in pairs if pair in injector.deliveries or not injector.blocked(*pair)]
+        delivered = [pair for pair in deliverable if pair in injector.deliveries]
+        if workload == 'forward':
+            # 새 메시지는 그룹마다 한 번만 전달되어야 함
+            duplicates = sum(count - 1 for count in injector.deliveries.values())
+        else:
+            # 순환 전송은 사이클마다 다시 보내므로 응답을 잃어버려 다시 보낸 것만 중복으로 셈
+            duplicates = report['redelivered']
+        completed_at = max((injector.delivered_at[pair] for pair in delivered), default=None)
+        result.update({
+            'deliverable_pairs': len(deliverable),
+            'delivered_pairs': len(delivered),
+            'completeness': round(len(delivered) / len(deliverable), 4) if deliverable else None,
+            'deliveries': report['deliveries'],
+            'duplicates': duplicates,
+            'completed_at': None if completed_at is None else round(completed_at, 3),
+            'settled_after_fault_seconds': (
+                round(max(0.0, completed_at - report['last_fault_at']), 3)
+                if completed_at is not None and report['last_fault_at'] is not None else None
+            ),
+        })
+    result.update({
+        'api_calls': report['requests'],
+        'calls_by_method': report['requests_by_method'],
+        'failed_calls': report['failed_requests'],
+        'wasted_calls': report['failed_requests'] + duplicates,
+        'failures': report['failures'],
+        'injected': report['injected'],
+        'kicked_chats': report['kicked_chats'],
+        'deleted_messages': report['deleted_messages'],
+        'last_fault_at': report['last_fault_at'],
+        'recoveries': report['recoveries'],
+        'recovery_p50_seconds': report['recovery_p50_seconds'],
+        'recovery_max_seconds': report['recovery_max_seconds'],
+        'unrecovered': report['unrecovered'],
+    })
+    return result
+
+
+def print_report(result: dict):
+    print("=" * 60)
+    print(f"그룹 {result['groups']}개 × 메시지 {result['messages']}개 "
+          f"(전달 {result['delivered']}/{result['expected_deliveries']}건, {result['elapsed_seconds']}초)")
+    print("=" * 60)
+    print(f"  messages/sec     : {result['messages_per_second']}")
+    print(f"  fan-out p50      : {result['fanout_p50_seconds'] * 1000:.1f} ms")
+    print(f"  fan-out p99      : {result['fanout_p99_seconds'] * 1000:.1f} ms")
+    print(f"  fan-out max      : {result['fanout_max_seconds'] * 1000:.1f} ms")
+    print(f"  API 호출         : {result['api_calls']}회 (전달 1건당 {result['calls_per_delivered']}회)")
+    for method, count in sorted(result['calls_by_method'].items()):
+        limited = result['rate_limited'].get(method, 0)
+        print(f"    {method:<18} {count:>7}" + (f"  (429: {limited})" if limited else ""))
+
+
+def print_scenario_report(result: dict):
+    outcome = '' if result['settled'] else ' (readiness 실패)' if result.get('idle_ready') is False else ' (시간 초과)'
+    print("=" * 60)
+    print(f"시나리오 {result['scenario']} ({result['workload']}): 그룹 {result['groups']}개 × 메시지 {result['messages']}개, "
+          f"{result['elapsed_seconds']}초{outcome}")
+    print("=" * 60)
+    if result['workload'] == 'startup':
+        print(f"  completeness     : {result['completeness']:.1%} (업데이트 {result['updates_received']}/{result['messages']}개 수신)")
+        print(f"  first update     : {result['first_update_seconds']} s")
+        print(f"  all updates      : {result['all_updates_seconds']} s")
+        if result['idle_ready'] is not None:
+            status = '유지' if result['idle_ready'] else f"실패 {result['idle_not_ready_samples']}번 ({result['idle_first_failure']} 부터)"
+            print(f"  idle readiness   : {result['idle_seconds']} s 동안 {status}")
+    else:
+        completeness = f"{result['completeness']:.1%}" if result['completeness'] is not None else '-'
+        print(f"  completeness     : {completeness} (전달 {result['delivered_pairs']}/{result['deliverable_pairs']}건, 중복 {result['duplicates']}건)")
+        print(f"  after last fault : {result['settled_after_fault_seconds']} s (마지막 장애 {result['last_fault_at']} s)")
+        if 'outbox_dead' in result:
+            print(f"  outbox           : 대기 {result['outbox_pending']}건, 포기 {result['outbox_dead']}건")
+    print(f"  API 호출         : {result['api_calls']}회 (낭비 {result['wasted_calls']}회 = 실패 {result['failed_calls']} + 중복)")
+    for method, count in sorted(result['calls_by_method'].items()):
+        print(f"    {method:<18} {count:>7}")
+    for reason, count in sorted(result['failures'].items()):
+        print(f"    실패 {reason:<22} {count:>5}")
+    print(f"  recovery         : {result['recoveries']}회, p50 {result['recovery_p50_seconds']} s, "
+          f"max {result['recovery_max_seconds']} s (복구 안 됨: {result['unrecovered']})")
+    if result['kicked_chats']:
+        print(f"  제거된 그룹      : {', '.join(result['kicked_chats'])}")
+    if result['deleted_messages']:
+        print(f"  삭제된 메시지    : {', '.join(map(str, result['deleted_messages']))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 Bot API 서버로 전송 처리량/복원력 측정')
+    parser.add_argument('--scenario', help='장애 주입 시나리오 파일 (scenarios/*.json)')
+    parser.add_argument('--groups', type=int, default=None, help='그룹 수 (N, 기본 20 또는 시나리오 값)')
+    parser.add_argument('--messages', type=int, default=None, help='새 채널 메시지 수 (M, 기본 10 또는 시나리오 값)')
+    parser.add_argument('--latency', type=float, default=0.02, help='가짜 서버 응답 지연 (초)')
+    parser.add_argument('--jitter', type=float, default=0.005, help='응답 지연 흔들기 범위 (초)')
+    parser.add_argument('--global-rate', type=float, default=0, help='가짜 서버 전체 초당 요청 제한 (0이면 없음)')
+    parser.add_argument('--chat-rate', type=float, default=0, help='가짜 서버 채팅별 초당 전송 제한 (0이면 없음)')
+    parser.add_argument('--chat-burst', type=float, default=5, help='가짜 서버 채팅별 연달아 보낼 수 있는 수')
+    parser.add_argument('--concurrency', type=int, default=20, help='동시 전송 그룹 수 (FANOUT_CONCURRENCY)')
+    parser.add_argument('--real-limits', action='store_true', help='봇의 실제 속도 제한 설정 사용')
+    parser.add_argument('--log-level', default='WARNING', help='벤치마크 중 로그 레벨')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    if args.scenario:
+        from fault_injection import load_scenario
+        result = asyncio.run(run_scenario(args, load_scenario(args.scenario)))
+        ok = result['settled']
+    else:
+        args.groups = args.groups or 20
+        args.messages = args.messages or 10
+        result = asyncio.run(run_benchmark(args))
+        ok = result['delivered'] == result['expected_deliveries']
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.scenario:
+        print_scenario_report(result)
+    else:
+        print_report(result)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
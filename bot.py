@@ -1,12 +1,38 @@
 import asyncio
 import logging
 import sys
+import threading
 from datetime import datetime
-from queue import Queue
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
 from telegram import Update
 from telegram.ext import Application, MessageHandler, filters, ContextTypes
-from config import BOT_TOKEN, SOURCE_CHANNEL_ID, TARGET_GROUP_IDS, SEND_INTERVAL_HOURS, SEND_INTERVAL_MINUTES, REGISTER_PASSWORD
+from config import BOT_TOKEN, SOURCE_CHANNEL_ID, TARGET_GROUP_IDS, SEND_INTERVAL_HOURS, SEND_INTERVAL_MINUTES, REGISTER_PASSWORD, FANOUT_CONCURRENCY
+from config import GLOBAL_RATE_LIMIT_PER_SECOND, GROUP_RATE_LIMIT_PER_MINUTE, PRIVATE_RATE_LIMIT_PER_SECOND, GROUP_RATE_LIMIT_BURST
+from config import CHAT_CACHE_TTL_SECONDS, ROTATION_BATCH_SIZE, ROTATION_CATCHUP_POLICY
+from config import STATE_DB_PATH, OUTBOX_WORKERS, OUTBOX_MAX_ATTEMPTS, OUTBOX_LEASE_SECONDS, OUTBOX_DEAD_RETENTION_HOURS, PERSIST_FLUSH_WINDOW_SECONDS
+from config import UPDATE_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, LEADER_LEASE_TTL_SECONDS, LEADER_HEARTBEAT_SECONDS
+from config import LEADER_LEASE_SHARED, LEADER_STARTUP_WAIT_SECONDS, POLLING_CONFLICT_RETRIES, POLLING_CONFLICT_DELAY_SECONDS
+from config import SHUTDOWN_TIMEOUT_SECONDS, PENDING_REGISTRATION_TTL_SECONDS, SENT_MESSAGES_MAX_ENTRIES
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BASE_DELAY_SECONDS, CIRCUIT_MAX_DELAY_SECONDS, LOOP_LAG_SAMPLE_SECONDS
+from config import HEALTH_LIVENESS_TIMEOUT_SECONDS, HEALTH_MAX_LOOP_LAG_SECONDS, HEALTH_UPDATES_STALL_SECONDS
+from config import LOG_FILE, LOG_LEVEL, LOG_SEND_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_ROTATE_WHEN, LOG_COMPRESS, LOG_SAMPLE_PER_MINUTE
+from ratelimit import TelegramRateLimiter
+from observed_request import ObservedRequest
+from chat_cache import ChatCapabilityCache
+from actors import ActorSupervisor, GroupDeliveryActor, WAKE, CATCHUP_POLICIES
+from scheduler import TimingWheel
+from outbox import Outbox, OutboxItem, SENT, RETRY, DROP, DEFER
+from state_store import StateStore
+from persistence import WriteBehindPersister
+from leader import LeaderLease
+from expiring import ExpiringDict
+from registry import GroupRegistry, MessageRegistry
+from resilience import CircuitBreakerRegistry
+from health import HealthMonitor
+from log_setup import setup_logging, stop_logging
+from metrics import MetricsRegistry
+from retry_policy import call_with_policy, classify, set_retry_listener, CHAT_GONE, CONFLICT, FORBIDDEN, INTERNAL, MESSAGE_MISSING, MIGRATED, NO_RIGHTS, RATE_LIMITED
 
 # Windows에서 이벤트 루프 정책 설정
 if sys.platform == 'win32':
@@ -19,37 +45,61 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-# 로그 파일과 콘솔 모두에 출력
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('bot.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
+# 로그 파일과 콘솔 모두에 출력 (쓰기는 별도 스레드, bot.log는 회전/압축, 전송 경로 로그는 샘플링)
+setup_logging(
+    LOG_FILE,
+    level=LOG_LEVEL,
+    send_level=LOG_SEND_LEVEL,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+    rotate_when=LOG_ROTATE_WHEN,
+    compress=LOG_COMPRESS,
+    sample_per_minute=LOG_SAMPLE_PER_MINUTE,
 )
 logger = logging.getLogger(__name__)
+# 메시지/그룹마다 남는 전송 경로 로그 (LOG_SEND_LEVEL로 따로 조절, 인자는 %s로 넘겨 걸러진 로그는 만들지 않음)
+send_logger = logging.getLogger('bot.send')
 
 # Conflict 에러는 자동 재시도되므로 로그 레벨을 낮춤
 logging.getLogger('telegram.ext.Updater').setLevel(logging.WARNING)
 
-# 메시지 큐
-message_queue: Queue = Queue()
-
-# 전송한 메시지 추적 (메시지 ID: 전송 시간)
-sent_messages: dict = {}
+# 전송한 메시지 추적 (메시지 ID: 전송 시간) - 재전송 간격이 지나면 자동으로 사라짐 (설정을 불러온 뒤 ttl 갱신)
+sent_messages = ExpiringDict(ttl=3600, max_entries=SENT_MESSAGES_MAX_ENTRIES)
 
 # 채널의 모든 메시지 ID 저장 (반복 전송용)
-channel_message_ids: List[int] = []
+channel_message_ids = MessageRegistry(order='id')
 
 # 등록된 그룹 ID 목록 (동적으로 추가 가능)
-registered_group_ids: List[str] = []
+registered_group_ids = GroupRegistry()
 
-# 새로 등록된 그룹에 첫 메시지 전송 완료 여부 (group_id: bool)
-new_group_first_message_sent: dict = {}
+# 비밀번호 입력 대기 중인 사용자 (user_id: group_id) - 입력하지 않고 떠난 요청은 자동으로 만료
+pending_registrations = ExpiringDict(ttl=PENDING_REGISTRATION_TTL_SECONDS, max_entries=1000)
 
-# 비밀번호 입력 대기 중인 사용자 (user_id: group_id)
-pending_registrations: dict = {}
+# 성능 지표 (keepalive 웹서버의 /metrics에서 Prometheus 형식으로 확인)
+metrics = MetricsRegistry()
+api_requests = metrics.counter('forwarder_api_requests_total', 'Bot API 요청 수 (메서드, 결과별)', ('method', 'outcome'))
+api_latency = metrics.histogram('forwarder_api_request_seconds', 'Bot API 응답 시간 (초)', ('method',))
+# 그룹 ID는 라벨로 쓰지 않음 (그룹 수만큼 시계열이 늘어남, 그룹별 성공/실패는 그룹 레지스트리에 기록)
+group_forwards = metrics.counter('forwarder_group_forwards_total', '그룹 전송 결과', ('result',))
+retries = metrics.counter('forwarder_retries_total', '재시도 수 (작업 또는 Bot API 메서드, 오류 종류별)', ('operation', 'kind'))
+send_errors = metrics.counter('forwarder_send_errors_total', '재시도 후 최종 전송 실패 수 (오류 종류별)', ('kind',))
+rotation_cycle_seconds = metrics.histogram(
+    'forwarder_rotation_cycle_seconds', '그룹 하나가 사이클을 처음부터 끝까지 도는 데 걸린 시간 (초)',
+    buckets=(60, 300, 900, 1800, 3600, 7200, 14400, 28800, 43200, 86400, 172800),
+)
+outbox_rows = metrics.gauge('forwarder_outbox_rows', '전송 대기열 행 수 (상태별, dead는 포기하고 보관 중인 전송)', ('status',))
+ingestion_lag = metrics.histogram(
+    'forwarder_ingestion_lag_seconds', '채널 게시 시각부터 첫 그룹 전송 완료까지 걸린 시간 (초)',
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300, 900),
+)
+loop_lag = metrics.gauge('forwarder_event_loop_lag_seconds', '최근 측정한 이벤트 루프 지연 (초)')
+loop_lag_distribution = metrics.histogram(
+    'forwarder_event_loop_lag_distribution_seconds', '이벤트 루프 지연 분포 (초)',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+registered_groups_gauge = metrics.gauge('forwarder_registered_groups', '등록된 그룹 수')
+channel_messages_gauge = metrics.gauge('forwarder_channel_messages', '사이클 전송 중인 채널 메시지 수')
+open_circuits_gauge = metrics.gauge('forwarder_open_circuits', '회로가 열려 있거나 확인 중인 그룹 수')
 
 # 전송 간격 계산 (초 단위)
 send_interval_seconds = (SEND_INTERVAL_HOURS * 3600) + (SEND_INTERVAL_MINUTES * 60)
@@ -69,6 +119,50 @@ class TelegramChannelForwarder:
         self.application = None
         self.is_running = False
         self.is_fully_started = False  # 봇이 완전히 시작되었는지 확인
+        self.loop = None  # 봇 이벤트 루프 (다른 스레드에서 webhook 업데이트나 종료 요청을 넘길 때 사용)
+        self.rate_limiter = None
+        self.chat_cache = ChatCapabilityCache(ttl=CHAT_CACHE_TTL_SECONDS)  # 그룹별 봇 상태/권한 캐시
+        self.missing_message_ids = set()  # 채널에서 삭제된 것으로 확인된 메시지 ID (사이클에서 목록 제거)
+        self.unverified_message_ids = set()  # 배치 전달에서 일부가 빠져 개별 확인이 필요한 메시지 ID
+        self.scheduler = TimingWheel()  # 예약된 전송을 모두 보관하는 타이밍 휠 (그룹 액터의 다음 전송 시각)
+        self.supervisor = ActorSupervisor(self.create_group_actor)  # 그룹별 사이클 전송 액터 관리
+        self.state = StateStore(str(Path(__file__).parent / STATE_DB_PATH))  # 메시지 ID / 그룹 / 설정값 저장소
+        self.persister = WriteBehindPersister(self.state, flush_window=PERSIST_FLUSH_WINDOW_SECONDS)  # 상태 변경을 모아 별도 스레드에서 기록
+        # 새 메시지의 그룹별 전송을 DB에 먼저 기록하고, 실패한 전송은 워커가 재시도 (재시작해도 유지)
+        self.outbox = Outbox(
+            str(Path(__file__).parent / STATE_DB_PATH),
+            lease_seconds=OUTBOX_LEASE_SECONDS,
+            max_attempts=OUTBOX_MAX_ATTEMPTS,
+            dead_retention=OUTBOX_DEAD_RETENTION_HOURS * 3600,
+        )
+        # 같은 상태 DB를 쓰는 인스턴스 중 리더 임대를 가진 하나만 실행 (fencing token으로 전송 대기열 보호)
+        self.leader = LeaderLease(
+            str(Path(__file__).parent / STATE_DB_PATH),
+            ttl=LEADER_LEASE_TTL_SECONDS,
+            heartbeat_interval=LEADER_HEARTBEAT_SECONDS,
+        )
+        self.outbox.fence = self.leader.holds_fence
+        self.rotation_task = None  # 기존 메시지 순환 전송 작업
+        self.heartbeat_task = None  # 이벤트 루프 하트비트 (지연 측정, liveness)
+        # 실제 봇 상태 (keepalive 서버의 /health, /health/live, /health/ready에서 사용)
+        self.health = HealthMonitor(
+            heartbeat_interval=LOOP_LAG_SAMPLE_SECONDS,
+            liveness_timeout=HEALTH_LIVENESS_TIMEOUT_SECONDS,
+            max_loop_lag=HEALTH_MAX_LOOP_LAG_SECONDS,
+            updates_stall=HEALTH_UPDATES_STALL_SECONDS if UPDATE_MODE == 'polling' else None,
+        )
+        self.health.rotation_alive = lambda: self.rotation_task is not None and not self.rotation_task.done()
+        self.saved_rotation: Dict[str, dict] = {}  # 이전 실행에서 저장된 그룹별 사이클 위치 (액터 생성 시 사용)
+        self.migrated_groups: Dict[str, str] = {}  # 슈퍼그룹으로 바뀐 그룹의 예전 ID → 새 ID
+        self.shutdown_event = asyncio.Event()  # 종료 요청 (SIGTERM 등)
+        self.pending_shutdown: Optional[str] = None  # 이벤트 루프가 생기기 전에 다른 스레드에서 받은 종료 요청 (start()에서 처리)
+        self._loop_lock = threading.Lock()  # self.loop 설정과 pending_shutdown 기록이 엇갈리지 않도록
+        # 계속 실패하는 그룹은 회로를 열어 일정 시간 API 호출 없이 건너뜀 (대기 시간은 열릴 때마다 두 배)
+        self.breakers = CircuitBreakerRegistry(
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            base_delay=CIRCUIT_BASE_DELAY_SECONDS,
+            max_delay=CIRCUIT_MAX_DELAY_SECONDS,
+        )
         
     async def start(self):
         """봇 시작"""
@@ -78,20 +172,59 @@ class TelegramChannelForwarder:
             raise ValueError("SOURCE_CHANNEL_ID가 설정되지 않았습니다.")
         if not TARGET_GROUP_IDS:
             raise ValueError("TARGET_GROUP_IDS가 설정되지 않았습니다.")
+        if UPDATE_MODE not in ('polling', 'webhook'):
+            raise ValueError(f"UPDATE_MODE는 polling 또는 webhook이어야 합니다. (현재: {UPDATE_MODE})")
+        if ROTATION_CATCHUP_POLICY not in CATCHUP_POLICIES:
+            raise ValueError(f"ROTATION_CATCHUP_POLICY는 {', '.join(CATCHUP_POLICIES)} 중 하나여야 합니다. (현재: {ROTATION_CATCHUP_POLICY})")
         
         # 초기 그룹 ID 등록
-        global registered_group_ids
-        registered_group_ids = list(TARGET_GROUP_IDS)  # config에서 설정한 그룹들
+        registered_group_ids.update(TARGET_GROUP_IDS)  # config에서 설정한 그룹들
+        
+        # 상태 DB 열기 (처음 실행 시 예전 txt 파일의 메시지/그룹/설정을 가져옴)
+        self.state.open()
+        self.state.import_legacy_files(Path(__file__).parent)
+        self.persister.start()
+        
+        # 상태 DB에서 저장된 그룹 목록 불러오기
+        await self.load_groups_from_store()
         
-        # 파일에서 저장된 그룹 목록 불러오기
-        await self.load_groups_from_file()
+        # 슈퍼그룹으로 바뀐 그룹은 새 ID로 (TARGET_GROUP_IDS에 예전 ID가 남아 있어도 새 ID로 전송)
+        await self.load_group_migrations()
         
-        # 파일에서 설정값 불러오기
-        await self.load_settings_from_file()
+        # 상태 DB에서 설정값 불러오기
+        await self.load_settings()
         
-        logger.info(f"등록된 그룹: {len(registered_group_ids)}개 - {registered_group_ids}")
+        # 이전 실행의 사이클 위치와 메시지 전송 시각 불러오기 (재시작해도 이어서 전송, 재전송 간격 유지)
+        await self.load_delivery_history()
+        
+        # 전송 대기열 열기 (이전 실행에서 남은 전송은 워커가 이어서 처리)
+        self.outbox.open()
+        
+        logger.info(f"등록된 그룹: {len(registered_group_ids)}개 - {list(registered_group_ids.snapshot()[:20])}")
             
-        self.application = Application.builder().token(BOT_TOKEN).build()
+        # 모든 Bot API 요청은 레이트 리미터를 거침 (전체 초당 30개, 그룹별 분당 20개, RetryAfter 자동 대기)
+        self.rate_limiter = TelegramRateLimiter(
+            overall_per_second=GLOBAL_RATE_LIMIT_PER_SECOND,
+            group_per_minute=GROUP_RATE_LIMIT_PER_MINUTE,
+            private_per_second=PRIVATE_RATE_LIMIT_PER_SECOND,
+            group_burst=GROUP_RATE_LIMIT_BURST,
+            on_retry=lambda endpoint: retries.inc(operation=endpoint, kind=RATE_LIMITED),
+        )
+        # 성능 지표 수집 (Bot API 요청은 HTTP 전송 계층에서, 재시도는 retry_policy와 레이트 리미터에서 기록)
+        # getUpdates는 레이트 리미터를 거치지 않으므로 전용 요청 객체에도 같은 관찰 함수를 붙임
+        self.application = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .rate_limiter(self.rate_limiter)
+            .request(ObservedRequest(self.observe_api_request, connection_pool_size=256))
+            .get_updates_request(ObservedRequest(self.observe_api_request))
+            .build()
+        )
+        
+        import keepalive
+        set_retry_listener(lambda operation, kind: retries.inc(operation=operation, kind=kind))
+        keepalive.set_metrics_source(metrics.render)
+        keepalive.set_health_monitor(self.health)
         
         # 채널 포스트 핸들러 등록 (비공개 채널용)
         # 채널 포스트는 update.channel_post로 들어옴
@@ -162,37 +295,24 @@ class TelegramChannelForwarder:
             
             # 이미 등록된 그룹인지 확인
             if group_id in registered_group_ids:
-                await self.application.bot.send_message(
-                    chat_id=group_id,
-                    text=f"ℹ️ 이 그룹은 이미 등록되어 있습니다.\n그룹 ID: {group_id}"
-                )
+                await self.send_text(group_id, f"ℹ️ 이 그룹은 이미 등록되어 있습니다.\n그룹 ID: {group_id}")
                 return
             
             # 비밀번호 입력 대기 상태로 설정
             pending_registrations[user_id] = group_id
             
             # 그룹에 안내 메시지
-            await self.application.bot.send_message(
-                chat_id=group_id,
-                text="🔐 그룹 등록을 위해 비밀번호가 필요합니다."
-            )
+            await self.send_text(group_id, "🔐 그룹 등록을 위해 비밀번호가 필요합니다.")
             
             # 사용자에게 DM으로 비밀번호 요청
             try:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=f"🔐 그룹 등록을 위한 비밀번호를 입력해주세요.\n그룹 ID: {group_id}\n\n비밀번호를 입력하세요:"
-                )
+                await self.send_text(user_id, f"🔐 그룹 등록을 위한 비밀번호를 입력해주세요.\n그룹 ID: {group_id}\n\n비밀번호를 입력하세요:")
                 logger.info(f"비밀번호 입력 대기: 사용자 {user_id}, 그룹 {group_id}")
             except Exception as e:
                 logger.error(f"DM 전송 실패 (사용자 {user_id}): {e}")
                 # DM을 보낼 수 없으면 그룹에 안내
-                await self.application.bot.send_message(
-                    chat_id=group_id,
-                    text="❌ 봇과의 개인 대화를 먼저 시작해주세요.\n(봇에게 아무 메시지나 보내면 됩니다)"
-                )
-                if user_id in pending_registrations:
-                    del pending_registrations[user_id]
+                await self.send_text(group_id, "❌ 봇과의 개인 대화를 먼저 시작해주세요.\n(봇에게 아무 메시지나 보내면 됩니다)")
+                pending_registrations.pop(user_id, None)
         
         # /월하 명령어만 처리하도록 필터 설정 (한글 명령어는 MessageHandler 사용)
         # CommandHandler는 한글을 지원하지 않으므로 MessageHandler + Regex 사용
@@ -209,75 +329,58 @@ class TelegramChannelForwarder:
                 text = update.message.text.strip() if update.message.text else ""
                 
                 # 비밀번호 입력 대기 중인 사용자인지 확인
-                if user_id in pending_registrations:
-                    group_id = pending_registrations[user_id]
+                group_id = pending_registrations.get(user_id)
+                if group_id is not None:
                     
                     # 비밀번호 확인
                     logger.info(f"🔐 비밀번호 확인 시도: 사용자 {user_id}, 그룹 {group_id}, 입력값: '{text}'")
                     if text == REGISTER_PASSWORD:
                         logger.info(f"✅ 비밀번호 일치! 그룹 등록 진행 중...")
                         # 그룹 등록
-                        if group_id not in registered_group_ids:
-                            registered_group_ids.append(group_id)
-                            await self.save_groups_to_file()
+                        if registered_group_ids.add(group_id, title=getattr(self.chat_cache.get(group_id), 'title', None)):
+                            self.persister.add_group(group_id)
                             logger.info(f"✅ 새 그룹 등록 완료: {group_id} (총 {len(registered_group_ids)}개, 사용자: {user_id})")
-                            logger.info(f"📝 저장된 그룹 목록: {registered_group_ids}")
                             
                             # 사용자에게 성공 메시지
                             try:
-                                await self.application.bot.send_message(
-                                    chat_id=user_id,
-                                    text=f"✅ 그룹 등록이 완료되었습니다!\n그룹 ID: {group_id}\n\n이제 채널 메시지가 이 그룹으로 전송됩니다."
-                                )
+                                await self.send_text(user_id, f"✅ 그룹 등록이 완료되었습니다!\n그룹 ID: {group_id}\n\n이제 채널 메시지가 이 그룹으로 전송됩니다.")
                             except Exception as e:
                                 logger.error(f"사용자 DM 전송 실패: {e}")
                             
                             # 그룹에 성공 메시지
                             try:
-                                await self.application.bot.send_message(
-                                    chat_id=group_id,
-                                    text="✅ 그룹이 등록되었습니다!"
-                                )
+                                await self.send_text(group_id, "✅ 그룹이 등록되었습니다!")
                             except Exception as e:
                                 logger.error(f"그룹 메시지 전송 실패: {e}")
                             
-                            # 새 그룹 등록 시 첫 메시지만 즉시 전송 (중복 방지)
+                            # 새 그룹의 액터 시작 (첫 메시지는 즉시, 이후 메시지는 설정된 간격으로 독립 전송)
+                            logger.info(f"🆕 새 그룹 등록 완료: {group_id}")
+                            self.supervisor.add(group_id)
                             if channel_message_ids:
-                                # 첫 메시지만 즉시 전송
-                                first_message_id = channel_message_ids[0]
-                                new_group_first_message_sent[group_id] = False  # 첫 메시지 전송 플래그 초기화
-                                
-                                logger.info(f"🆕 새 그룹 등록 완료: {group_id}")
-                                logger.info(f"📤 첫 메시지 즉시 전송 시작 (ID: {first_message_id})")
+                                logger.info(f"📤 첫 메시지 즉시 전송 시작 (ID: {channel_message_ids.first()})")
                                 logger.info(f"⏱️ 이후 메시지는 {current_message_interval // 60}분 간격으로 전송됩니다.")
-                                
-                                if self.is_fully_started:
-                                    logger.info(f"✅ 봇이 실행 중입니다. 첫 메시지 즉시 전송합니다.")
-                                    asyncio.create_task(self.send_first_message_to_new_group(group_id, first_message_id))
-                                else:
-                                    logger.info(f"⏳ 봇이 완전히 시작된 후 첫 메시지 전송 예정")
-                                    asyncio.create_task(self.send_first_message_to_new_group(group_id, first_message_id))
                             else:
                                 logger.warning(f"⚠️ 등록된 메시지가 없습니다. 채널에 메시지를 먼저 보내주세요.")
                         else:
                             logger.info(f"ℹ️ 그룹 {group_id}는 이미 등록되어 있습니다.")
-                            await self.application.bot.send_message(
-                                chat_id=user_id,
-                                text=f"ℹ️ 이 그룹은 이미 등록되어 있습니다.\n그룹 ID: {group_id}"
-                            )
+                            await self.send_text(user_id, f"ℹ️ 이 그룹은 이미 등록되어 있습니다.\n그룹 ID: {group_id}")
                         
                         # 대기 상태 제거
-                        del pending_registrations[user_id]
+                        pending_registrations.pop(user_id, None)
                     else:
                         # 비밀번호 오류
-                        await self.application.bot.send_message(
-                            chat_id=user_id,
-                            text="❌ 비밀번호가 올바르지 않습니다.\n다시 입력해주세요:"
-                        )
+                        await self.send_text(user_id, "❌ 비밀번호가 올바르지 않습니다.\n다시 입력해주세요:")
                         logger.warning(f"잘못된 비밀번호 입력 시도: 사용자 {user_id}, 그룹 {group_id}")
         
         self.application.add_handler(MessageHandler(filters.TEXT & filters.ChatType.PRIVATE, private_message_handler))
         
+        # 봇의 그룹 멤버 상태 변경 핸들러 (추가/제거/권한 변경 시 캐시 갱신)
+        from telegram.ext import ChatMemberHandler
+        self.application.add_handler(ChatMemberHandler(self.handle_my_chat_member, ChatMemberHandler.MY_CHAT_MEMBER))
+        
+        # 그룹 → 슈퍼그룹 전환 서비스 메시지 (예전 그룹의 migrate_to_chat_id, 새 슈퍼그룹의 migrate_from_chat_id)
+        self.application.add_handler(MessageHandler(filters.StatusUpdate.MIGRATE, self.handle_chat_migration))
+        
         logger.info("채널 포스트 핸들러가 등록되었습니다.")
         logger.info("그룹 메시지 핸들러가 등록되었습니다. (그룹에서 /월하 명령어 사용 가능, 비밀번호 필요)")
         logger.info("개인 메시지 핸들러가 등록되었습니다. (비밀번호 입력용)")
@@ -294,129 +397,275 @@ class TelegramChannelForwarder:
         logger.info("봇이 실행 중입니다. 채널 메시지를 기다리는 중...")
         
         # Windows 이벤트 루프 문제 해결을 위해 직접 관리
+        # SIGTERM(배포/재시작)을 받으면 종료 절차를 밟음
+        with self._loop_lock:
+            self.loop = asyncio.get_running_loop()
+            pending_shutdown = self.pending_shutdown
+        if pending_shutdown is not None:
+            # 루프가 생기기 전에 SIGTERM을 받았으면 시작하지 않고 바로 종료 절차로
+            self.request_shutdown(pending_shutdown)
+        self.install_signal_handlers()
+        # 리더 임대를 기다리는 동안에도 liveness를 보고하도록 하트비트 먼저 시작
+        self.heartbeat_task = asyncio.create_task(self.health.run_heartbeat(self.shutdown_event, on_lag=self.observe_loop_lag))
         try:
+            # 리더 임대를 얻은 인스턴스만 업데이트를 받고 전송 (배포 중 이전 인스턴스가 임대를 놓으면 바로 넘겨받음)
+            self.leader.open()
+            if not await self.run_until_shutdown(self.leader.acquire()):
+                return
+            self.leader.start_heartbeat()
+            
             await self.application.initialize()
             await self.application.start()
             
-            # Webhook이 설정되어 있으면 삭제 (Conflict 방지)
-            logger.info("🔍 Webhook 상태 확인 중...")
-            try:
-                # 여러 번 시도하여 확실히 삭제
-                webhook_deleted = False
-                for attempt in range(10):  # 5회에서 10회로 증가
-                    try:
-                        webhook_info = await self.application.bot.get_webhook_info()
-                        if webhook_info.url:
-                            logger.info(f"🔗 Webhook 발견: {webhook_info.url}, 삭제 중... (시도: {attempt + 1}/10)")
-                            await self.application.bot.delete_webhook(drop_pending_updates=True)
-                            await asyncio.sleep(3)  # 삭제 후 대기 시간 증가
-                            # 삭제 확인
-                            webhook_info_after = await self.application.bot.get_webhook_info()
-                            if not webhook_info_after.url:
-                                logger.info("✅ Webhook 삭제 완료 (Polling 모드 사용)")
-                                webhook_deleted = True
-                                break
-                            else:
-                                logger.warning(f"⚠️ Webhook 삭제 후에도 여전히 존재합니다. 재시도 중... (시도: {attempt + 1}/10)")
-                        else:
-                            logger.info("✅ Webhook이 없습니다. Polling 모드 사용 가능")
-                            webhook_deleted = True
-                            break
-                    except Exception as e:
-                        error_msg = str(e).lower()
-                        if "conflict" in error_msg:
-                            wait_time = min(5 + attempt * 2, 15)  # 최대 15초까지 증가
-                            logger.warning(f"⚠️ Conflict 에러 발생. {wait_time}초 대기 후 재시도... (시도: {attempt + 1}/10)")
-                            await asyncio.sleep(wait_time)
-                        elif attempt < 9:
-                            wait_time = min(3 + attempt, 10)
-                            logger.warning(f"⚠️ Webhook 삭제 시도 {attempt + 1}/10 실패, {wait_time}초 후 재시도...: {e}")
-                            await asyncio.sleep(wait_time)
-                        else:
-                            logger.warning(f"⚠️ Webhook 삭제 최종 실패 (무시하고 계속 진행): {e}")
-                            break
-                
-                if not webhook_deleted:
-                    logger.warning("⚠️ Webhook 삭제를 완료하지 못했지만 계속 진행합니다.")
-            except Exception as e:
-                logger.warning(f"⚠️ Webhook 확인 중 오류 (무시하고 계속 진행): {e}")
-            
-            # Polling 시작 전 충분한 대기 시간 (배포 중 이전 인스턴스 종료 대기)
-            logger.info("⏳ 이전 인스턴스 완전 종료 대기 중... (20초)")
-            await asyncio.sleep(20)  # Render 배포 시 이전 인스턴스가 완전히 종료될 때까지 충분한 대기
-            
-            # 추가 안전 장치: Webhook 재확인 및 삭제 (여러 번 시도)
-            for final_attempt in range(3):
-                try:
-                    webhook_info_final = await self.application.bot.get_webhook_info()
-                    if webhook_info_final.url:
-                        logger.warning(f"⚠️ Webhook이 여전히 존재합니다: {webhook_info_final.url}, 강제 삭제 시도... (시도: {final_attempt + 1}/3)")
-                        await self.application.bot.delete_webhook(drop_pending_updates=True)
-                        await asyncio.sleep(3)
-                    else:
-                        logger.info("✅ 최종 확인: Webhook이 없습니다. Polling 모드 사용 가능")
-                        break
-                except Exception as e:
-                    if "conflict" in str(e).lower():
-                        logger.warning(f"⚠️ Conflict 에러 발생. {5 * (final_attempt + 1)}초 대기 후 재시도...")
-                        await asyncio.sleep(5 * (final_attempt + 1))
-                    else:
-                        logger.warning(f"⚠️ 최종 Webhook 확인 중 오류 (무시): {e}")
-                        break
-            
-            # Polling 시작 (Conflict 에러는 자동으로 재시도됨)
-            logger.info("🚀 Polling 시작 중...")
-            max_polling_retries = 5
-            polling_retry_delay = 10
+            # 업데이트 수신 시작 (webhook 모드는 keepalive 서버로 받고, polling 모드는 getUpdates 사용)
+            if UPDATE_MODE == 'webhook':
+                await self.start_webhook()
+            else:
+                await self.start_polling()
             
-            for polling_attempt in range(max_polling_retries):
-                try:
-                    await self.application.updater.start_polling(
-                        allowed_updates=Update.ALL_TYPES,
-                        drop_pending_updates=True
-                    )
-                    logger.info("✅ 봇이 완전히 시작되었습니다!")
-                    self.is_fully_started = True  # 봇 시작 완료 플래그 설정
-                    break  # 성공하면 루프 종료
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    if "conflict" in error_msg:
-                        if polling_attempt < max_polling_retries - 1:
-                            wait_time = polling_retry_delay * (polling_attempt + 1)
-                            logger.warning(f"⚠️ Polling 시작 중 Conflict 에러 발생 (시도: {polling_attempt + 1}/{max_polling_retries})")
-                            logger.info(f"⏳ {wait_time}초 대기 후 재시도... (이전 인스턴스 종료 대기)")
-                            await asyncio.sleep(wait_time)
-                            # Webhook 다시 삭제 시도
-                            try:
-                                await self.application.bot.delete_webhook(drop_pending_updates=True)
-                                await asyncio.sleep(3)
-                            except:
-                                pass
-                        else:
-                            logger.error(f"❌ Polling 시작 최종 실패 (최대 재시도 횟수 초과): {e}")
-                            logger.error("💡 해결 방법: 다른 봇 인스턴스(로컬 PC, Replit 등)를 모두 종료하고 다시 시도하세요.")
-                            raise
-                    else:
-                        logger.error(f"❌ Polling 시작 실패: {e}")
-                        raise
+            # 전송 대기열 워커 시작 (실패한 새 메시지 전송을 백오프 후 재시도)
+            self.outbox.start_workers(self.deliver_outbox_item, count=OUTBOX_WORKERS)
             
             # 기존 채널 메시지를 순차적으로 전송하는 작업 시작
-            asyncio.create_task(self.send_existing_messages_sequentially())
+            self.rotation_task = asyncio.create_task(self.send_existing_messages_sequentially())
             
             logger.info("채널 메시지를 기다리는 중...")
             
-            # 무한 대기
+            # 종료 신호를 받거나 리더 임대를 잃을 때까지 대기 (다른 인스턴스가 가져가면 물러남)
             try:
-                while True:
-                    await asyncio.sleep(3600)  # 1시간마다 체크
+                if await self.run_until_shutdown(self.leader.lost.wait()):
+                    logger.warning("👋 리더가 아니므로 업데이트 수신과 전송을 멈추고 종료합니다.")
             except KeyboardInterrupt:
                 logger.info("종료 신호를 받았습니다...")
         finally:
+            await self.shutdown()
+    
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT를 받으면 종료 절차 시작 (Windows이거나 메인 스레드가 아니면 기본 동작 유지)"""
+        import signal
+        loop = asyncio.get_running_loop()
+        # app.py처럼 봇을 별도 스레드에서 실행하면 메인 스레드가 신호를 받아 넘겨주므로 등록 실패는 정상
+        on_worker_thread = threading.current_thread() is not threading.main_thread()
+        for sig in (signal.SIGTERM, signal.SIGINT):
             try:
+                loop.add_signal_handler(sig, self.request_shutdown, sig.name)
+            except (NotImplementedError, RuntimeError, ValueError) as e:
+                if on_worker_thread:
+                    logger.debug(f"{sig.name} 핸들러는 메인 스레드에서 처리합니다 (봇 스레드에서는 등록하지 않음): {e}")
+                else:
+                    logger.warning(f"⚠️ {sig.name} 핸들러를 등록할 수 없습니다 (기본 동작 유지, 메인 스레드에서 request_shutdown으로 넘겨야 함): {e}")
+    
+    def request_shutdown_threadsafe(self, reason: str = ''):
+        """다른 스레드에서 종료 요청 (봇 이벤트 루프가 아직 없으면 기록해 두었다가 start()에서 처리)"""
+        with self._loop_lock:
+            loop = self.loop
+            if loop is None:
+                self.pending_shutdown = reason
+                return
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self.request_shutdown, reason)
+        except RuntimeError:
+            # 그 사이 루프가 닫혔으면 이미 종료된 것
+            pass
+    
+    def request_shutdown(self, reason: str = ''):
+        """종료 요청 (신호 핸들러 등에서 호출)"""
+        if self.shutdown_event.is_set():
+            logger.warning(f"⚠️ 이미 종료 중입니다. ({reason})")
+            return
+        logger.info(f"🛑 종료 요청을 받았습니다. ({reason})")
+        self.shutdown_event.set()
+    
+    async def run_until_shutdown(self, awaitable) -> bool:
+        """awaitable이 끝날 때까지 대기 - 먼저 종료 요청이 오면 취소하고 False 반환"""
+        task = asyncio.ensure_future(awaitable)
+        stop = asyncio.ensure_future(self.shutdown_event.wait())
+        done, _ = await asyncio.wait({task, stop}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            stop.cancel()
+            task.result()
+            return True
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return False
+    
+    async def shutdown(self):
+        """종료 절차 (전체 SHUTDOWN_TIMEOUT_SECONDS 이내)
+        
+        1. 새 업데이트 수신 중지 (polling 중지 / webhook 수신 해제)
+        2. 이미 받은 업데이트 처리, 진행 중인 사이클 전송, 대기열 재전송을 제한 시간 안에 마무리
+        3. 그룹별 사이클 위치와 남은 상태 변경을 기록 (남은 전송은 전송 대기열에 그대로 남음)
+        4. 리더 임대 반납 (다음 인스턴스가 바로 시작)
+        """
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        deadline = started_at + SHUTDOWN_TIMEOUT_SECONDS
+        
+        def remaining() -> float:
+            return max(0.5, deadline - loop.time())
+        
+        self.is_running = False
+        self.shutdown_event.set()
+        self.health.mark_stopped()
+        logger.info(f"🛑 종료 절차 시작 (최대 {SHUTDOWN_TIMEOUT_SECONDS:.0f}초)")
+        
+        # 1. 새 업데이트 수신 중지
+        if UPDATE_MODE == 'webhook':
+            import keepalive
+            keepalive.clear_webhook_sink()
+        try:
+            if self.application.updater and self.application.updater.running:
+                await asyncio.wait_for(self.application.updater.stop(), remaining())
+        except Exception as e:
+            logger.warning(f"⚠️ Polling 중지 중 오류: {e!r}")
+        
+        # 2. 진행 중인 전송 마무리 (제한 시간을 넘으면 취소 - 남은 새 메시지 전송은 대기열에 남음)
+        async def stop_application():
+            if self.application.running:
                 await self.application.stop()
-                await self.application.shutdown()
-            except:
+        
+        results = await asyncio.gather(
+            asyncio.wait_for(stop_application(), remaining()),
+            self.stop_rotation(remaining()),
+            self.outbox.stop_workers(timeout=remaining()),
+            return_exceptions=True,
+        )
+        for name, result in zip(('업데이트 처리', '사이클 전송', '전송 대기열'), results):
+            if isinstance(result, BaseException):
+                logger.warning(f"⚠️ {name} 마무리 중 오류 또는 시간 초과: {result!r}")
+        
+        # 3. 상태 기록 후 DB 닫기
+        try:
+            self.outbox.close()
+        except Exception as e:
+            logger.warning(f"⚠️ 전송 대기열 종료 중 오류: {e}")
+        try:
+            # 남은 상태 변경을 동기적으로 기록한 뒤 닫음
+            self.persister.close(timeout=remaining())
+            self.state.close()
+        except Exception as e:
+            logger.warning(f"⚠️ 상태 DB 종료 중 오류: {e}")
+        try:
+            await asyncio.wait_for(self.application.shutdown(), remaining())
+        except Exception as e:
+            logger.debug(f"application 종료 중 오류: {e!r}")
+        
+        # 4. 모든 정리가 끝난 뒤 임대 반납
+        await self.leader.release()
+        self.leader.close()
+        if self.heartbeat_task is not None:
+            await asyncio.gather(self.heartbeat_task, return_exceptions=True)
+        logger.info(f"✅ 종료 완료 ({loop.time() - started_at:.1f}초)")
+    
+    async def stop_rotation(self, timeout: float):
+        """사이클 전송 정지 - 진행 중인 전송은 끝내고 그룹별 사이클 위치를 기록"""
+        actors = await self.supervisor.stop_all(timeout=timeout)
+        for actor in actors:
+            self.persister.set_rotation(actor.group_id, actor.snapshot())
+        if actors:
+            logger.info(f"💾 그룹 {len(actors)}개의 사이클 위치를 저장합니다.")
+        if self.rotation_task is not None:
+            await asyncio.gather(self.rotation_task, return_exceptions=True)
+    
+    async def start_polling(self):
+        """polling 모드 - 남아 있는 webhook을 지우고 getUpdates로 업데이트 수신"""
+        # Webhook이 설정되어 있으면 삭제 (Conflict 방지, 'webhook' 재시도 정책 적용)
+        logger.info("🔍 Webhook 상태 확인 중...")
+        try:
+            webhook_info = await call_with_policy('webhook', self.application.bot.get_webhook_info, "get_webhook_info")
+            if webhook_info.url:
+                logger.info(f"🔗 Webhook 발견: {webhook_info.url}, 삭제 중...")
+                await call_with_policy(
+                    'webhook',
+                    lambda: self.application.bot.delete_webhook(drop_pending_updates=False),
+                    "delete_webhook",
+                )
+                logger.info("✅ Webhook 삭제 완료 (Polling 모드 사용)")
+            else:
+                logger.info("✅ Webhook이 없습니다. Polling 모드 사용 가능")
+        except Exception as e:
+            logger.warning(f"⚠️ Webhook 확인/삭제 실패 (무시하고 계속 진행): {e}")
+
+        # 상태 DB를 이전 인스턴스와 함께 쓰지 않으면 리더 임대로는 배포 중 겹침을 막을 수 없으므로 종료를 기다림
+        # (공유하면 이전 인스턴스는 임대를 놓기 전에 polling을 멈추므로 바로 시작)
+        if not LEADER_LEASE_SHARED and LEADER_STARTUP_WAIT_SECONDS > 0:
+            logger.info(f"⏳ 이전 인스턴스 완전 종료 대기 중... ({LEADER_STARTUP_WAIT_SECONDS:.0f}초, 리더 임대를 공유하지 않음)")
+            try:
+                await asyncio.wait_for(self.shutdown_event.wait(), LEADER_STARTUP_WAIT_SECONDS)
+                return  # 기다리는 중에 종료 요청을 받음
+            except asyncio.TimeoutError:
                 pass
+
+        # Polling 시작 (Conflict는 리더 임대와 관계없이 시도마다 더 오래 기다리며 재시도)
+        # 넘겨받는 동안 채널에 올라온 메시지를 잃지 않도록 대기 중인 업데이트는 버리지 않음
+        logger.info("🚀 Polling 시작 중...")
+        max_polling_retries = max(1, POLLING_CONFLICT_RETRIES)
+
+        for polling_attempt in range(max_polling_retries):
+            try:
+                await self.application.updater.start_polling(
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=False
+                )
+                logger.info("✅ 봇이 완전히 시작되었습니다!")
+                self.is_fully_started = True  # 봇 시작 완료 플래그 설정
+                self.health.mark_started()
+                break  # 성공하면 루프 종료
+            except Exception as e:
+                if classify(e).kind == CONFLICT and polling_attempt < max_polling_retries - 1:
+                    wait_time = POLLING_CONFLICT_DELAY_SECONDS * (polling_attempt + 1)
+                    logger.warning(f"⚠️ Polling 시작 중 Conflict 에러 발생 (시도: {polling_attempt + 1}/{max_polling_retries})")
+                    logger.info(f"⏳ {wait_time:.0f}초 대기 후 재시도... (이전 인스턴스 종료 대기)")
+                    await asyncio.sleep(wait_time)
+                elif classify(e).kind == CONFLICT:
+                    logger.error(f"❌ Polling 시작 최종 실패 (최대 재시도 횟수 초과): {e}")
+                    logger.error("💡 해결 방법: 다른 봇 인스턴스(로컬 PC, Replit 등)를 모두 종료하고 다시 시도하세요.")
+                    raise
+                else:
+                    logger.error(f"❌ Polling 시작 실패: {e}")
+                    raise
+    
+    async def start_webhook(self):
+        """webhook 모드 - keepalive 웹서버의 WEBHOOK_PATH로 업데이트를 받아 update_queue에 바로 넣음
+        
+        WEBHOOK_URL이 있으면 텔레그램에 webhook을 등록하고, 없으면 등록 없이
+        로컬에서 녹화한 업데이트 JSON을 POST해서 시험할 수 있게 수신만 합니다.
+        """
+        import keepalive
+        import secrets
+        
+        secret_token = WEBHOOK_SECRET
+        if WEBHOOK_URL and not secret_token:
+            # 텔레그램에 등록할 때 함께 알려주므로 매번 새로 만들어도 됨
+            secret_token = secrets.token_urlsafe(32)
+        elif not secret_token:
+            logger.warning("⚠️ WEBHOOK_SECRET이 없어 webhook 비밀 토큰을 확인하지 않습니다. (로컬 시험 전용 - 외부에 공개하지 마세요)")
+        keepalive.set_webhook_sink(self.enqueue_webhook_update, secret_token or None)
+        if WEBHOOK_URL:
+            webhook_url = WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH
+            await call_with_policy(
+                'webhook',
+                lambda: self.application.bot.set_webhook(
+                    url=webhook_url,
+                    secret_token=secret_token,
+                    allowed_updates=Update.ALL_TYPES,
+                ),
+                "set_webhook",
+            )
+            logger.info(f"🔗 Webhook 등록 완료: {webhook_url}")
+        else:
+            logger.warning(f"⚠️ WEBHOOK_URL이 없어 텔레그램에 webhook을 등록하지 않았습니다. (로컬 시험: POST {WEBHOOK_PATH})")
+        logger.info("✅ 봇이 완전히 시작되었습니다! (webhook 모드)")
+        self.is_fully_started = True
+        self.health.mark_started()
+    
+    def enqueue_webhook_update(self, data: dict):
+        """keepalive 스레드에서 호출 - 받은 업데이트 JSON을 봇 이벤트 루프의 update_queue에 넣음"""
+        update = Update.de_json(data, self.application.bot)
+        self.health.record_updates()
+        self.loop.call_soon_threadsafe(self.application.update_queue.put_nowait, update)
     
     async def handle_interval_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
         """메시지 간 전송 간격 설정 명령어 처리"""
@@ -436,8 +685,8 @@ class TelegramChannelForwarder:
             old_interval = current_message_interval
             current_message_interval = minutes * 60  # 분을 초로 변환
             logger.info(f"⚙️ 메시지 간격 변경: {old_interval // 60}분 → {minutes}분 (즉시 적용됨)")
-            # 설정값을 파일에 저장
-            await self.save_settings_to_file()
+            # 설정값을 상태 DB에 저장
+            await self.save_settings()
             await self.send_command_response(update, f"✅ 메시지 간 전송 간격이 {minutes}분으로 설정되었습니다.\n💡 다음 메시지부터 즉시 적용됩니다. (저장 완료)")
         except ValueError:
             await self.send_command_response(update, "❌ 잘못된 형식입니다. 숫자를 입력하세요.\n예: /간격 10")
@@ -462,9 +711,10 @@ class TelegramChannelForwarder:
             
             old_resend = current_resend_wait_time
             current_resend_wait_time = minutes * 60  # 분을 초로 변환
+            sent_messages.ttl = current_resend_wait_time
             logger.info(f"⚙️ 재전송 간격 변경: {old_resend // 60}분 → {minutes}분 (다음 사이클부터 적용됨)")
-            # 설정값을 파일에 저장
-            await self.save_settings_to_file()
+            # 설정값을 상태 DB에 저장
+            await self.save_settings()
             await self.send_command_response(update, f"✅ 같은 메시지 재전송 간격이 {minutes}분으로 설정되었습니다.\n💡 다음 사이클부터 적용됩니다. (저장 완료)")
         except ValueError:
             await self.send_command_response(update, "❌ 잘못된 형식입니다. 숫자를 입력하세요.\n예: /재전송 60")
@@ -482,6 +732,8 @@ class TelegramChannelForwarder:
         
         # 등록된 메시지 수 (실제 전송 시 존재하지 않으면 자동 제거됨)
         message_count = len(channel_message_ids)
+        failing_groups = registered_group_ids.failing()
+        circuit_stats = self.breakers.stats()
         
         # 설정 소스 확인
         env_interval = os.environ.get("MESSAGE_INTERVAL_SECONDS")
@@ -490,14 +742,26 @@ class TelegramChannelForwarder:
         if env_interval or env_resend:
             source_info = "\n💡 설정 소스: 환경 변수 (Render 재시작 후에도 유지)"
         else:
-            source_info = "\n💡 설정 소스: 파일 (Render 재시작 시 초기화될 수 있음)"
+            source_info = "\n💡 설정 소스: 상태 DB (Render 재시작 시 초기화될 수 있음)"
             source_info += "\n   영구 저장을 원하면 Render 대시보드에서 환경 변수 설정 권장"
         
+        try:
+            outbox_stats = await self.outbox.stats()
+        except Exception as e:
+            logger.warning(f"⚠️ 전송 대기열 상태 조회 실패: {e}")
+            outbox_stats = {}
+        sent_stats = sent_messages.stats()
+        
         status_text = f"""📊 현재 봇 설정 상태
 
 ⏱️ 메시지 간 전송 간격: {interval_min}분 ({current_message_interval}초)
 🔄 같은 메시지 재전송 간격: {resend_min}분 ({current_resend_wait_time}초)
-📝 등록된 메시지 수: {message_count}개{source_info}
+📝 등록된 메시지 수: {message_count}개
+👥 등록된 그룹 수: {len(registered_group_ids)}개 (연속 실패 중: {len(failing_groups)}개)
+🔌 전송 차단 중인 그룹: {circuit_stats['open']}개 (확인 중: {circuit_stats['half_open']}개, 건너뛴 전송: {circuit_stats['skipped']}번)
+⏰ 예약된 전송: {len(self.scheduler)}개 (그룹 액터 {len(self.supervisor.actors)}개)
+📮 재시도 대기 전송: {outbox_stats.get('pending', 0)}개 (포기: {outbox_stats.get('dead', 0)}개)
+🧾 전송 기록: {sent_stats['size']}개 (적중 {sent_stats['hits']} / 실패 {sent_stats['misses']} / 만료 {sent_stats['expired']} / 초과 삭제 {sent_stats['evicted']}){source_info}
 
 명령어:
 /간격 [분] - 메시지 간 전송 간격 설정
@@ -506,14 +770,19 @@ class TelegramChannelForwarder:
         
         await self.send_command_response(update, status_text)
     
+    async def send_text(self, chat_id, text: str):
+        """텍스트 메시지 전송 (명령어 응답/등록 안내, 'reply' 재시도 정책 적용)"""
+        return await call_with_policy(
+            'reply',
+            lambda: self.application.bot.send_message(chat_id=chat_id, text=text),
+            f"채팅 {chat_id}",
+        )
+    
     async def send_command_response(self, update: Update, message: str):
         """명령어 응답을 비공개 채널에 전송"""
         try:
             # 비공개 채널에 응답 전송
-            await self.application.bot.send_message(
-                chat_id=SOURCE_CHANNEL_ID,
-                text=message
-            )
+            await self.send_text(SOURCE_CHANNEL_ID, message)
         except Exception as e:
             logger.error(f"명령어 응답 전송 실패: {e}")
     
@@ -543,10 +812,10 @@ class TelegramChannelForwarder:
                     resend_min = current_resend_wait_time // 60
                     logger.info(f"⏳ 메시지 {message_id}는 {wait_minutes}분 전에 전송되었습니다. {resend_min}분 대기 중... (새 메시지이지만 재전송 간격 내)")
                     # 새 메시지이지만 재전송 간격 내이면 스킵 (다음 사이클에서 전송됨)
-                    # 하지만 channel_message_ids에는 추가해야 함
-                    if message_id not in channel_message_ids:
-                        channel_message_ids.append(message_id)
-                        await self.save_message_ids_to_file()
+                    # 하지만 channel_message_ids에는 추가해야 함 (이미 있거나 삭제된 메시지면 추가 안 됨)
+                    if channel_message_ids.add(message_id):
+                        self.supervisor.broadcast((WAKE,))  # 대기 중인 그룹 액터 깨우기
+                        self.persister.add_message(message_id)
                         logger.info(f"📨 메시지 ID 추가됨 (다음 사이클에서 전송): {message_id}")
                     return
             
@@ -557,297 +826,77 @@ class TelegramChannelForwarder:
                 'date': message.date.isoformat() if message.date else None
             }
             
-            # 즉시 전송 (재시도 포함)
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    logger.info(f"🚀 새 메시지 즉시 전송 시도 {attempt + 1}/{max_retries} (ID: {message_id})")
-                    success = await self.forward_message(message_data)
-                    
-                    if success:
-                        # 전송 성공 시 기록
-                        sent_messages[message_id] = current_time
-                        
-                        # 메시지 ID를 채널 메시지 목록에 추가 (없으면)
-                        if message_id not in channel_message_ids:
-                            channel_message_ids.append(message_id)
-                            logger.info(f"📨 새 메시지 ID 추가: {message_id} (총 {len(channel_message_ids)}개)")
-                            # 파일에 자동 저장 (Render에서도 영구 저장)
-                            await self.save_message_ids_to_file()
-                            logger.info(f"💾 메시지 ID 목록이 파일에 저장되었습니다.")
-                        
-                        logger.info(f"✅ 새 메시지 즉시 전송 완료 (ID: {message_id})")
-                        return  # 성공하면 종료
-                    else:
-                        logger.warning(f"⚠️ 전송 실패 (success=False): {message_id}")
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(1)  # 1초 대기 후 재시도
-                        else:
-                            # 실패해도 메시지 ID는 추가 (다음 사이클에서 재시도)
-                            if message_id not in channel_message_ids:
-                                channel_message_ids.append(message_id)
-                                await self.save_message_ids_to_file()
-                                logger.info(f"📨 전송 실패했지만 메시지 ID 추가됨 (다음 사이클에서 재시도): {message_id}")
-                except Exception as e:
-                    logger.error(f"❌ 전송 시도 {attempt + 1}/{max_retries} 실패: {e}", exc_info=True)
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1)  # 1초 대기 후 재시도
-                    else:
-                        logger.error(f"❌ 최종 전송 실패, 메시지 ID는 추가하여 다음 사이클에서 재시도: {e}")
-                        # 실패해도 메시지 ID는 추가 (다음 사이클에서 재시도)
-                        if message_id not in channel_message_ids:
-                            channel_message_ids.append(message_id)
-                            await self.save_message_ids_to_file()
-                            logger.info(f"📨 전송 실패했지만 메시지 ID 추가됨 (다음 사이클에서 재시도): {message_id}")
-                        message_queue.put(message_data)
+            # 즉시 전송 (그룹별 재시도는 retry_policy가, 그래도 실패한 그룹은 전송 대기열 워커가 백오프 후 다시 보냄)
+            logger.info(f"🚀 새 메시지 즉시 전송 (ID: {message_id})")
+            try:
+                success = await self.forward_message(message_data)
+            except Exception as e:
+                logger.error(f"❌ 새 메시지 전송 중 예외 발생 (ID: {message_id}): {e}", exc_info=True)
+                success = False
             
-        except Exception as e:
-            logger.error(f"메시지 처리 중 오류 발생: {e}", exc_info=True)
-    
-    async def send_messages_to_group(self):
-        """큐에 있는 메시지들을 그룹으로 전송"""
-        if message_queue.empty():
-            logger.debug("전송할 메시지가 없습니다.")
-            return
-        
-        messages_to_send: List[dict] = []
-        
-        # 큐에서 모든 메시지 가져오기
-        while not message_queue.empty():
-            messages_to_send.append(message_queue.get())
-        
-        if not messages_to_send:
-            return
-        
-        try:
-            for msg_data in messages_to_send:
-                await self.forward_message(msg_data)
-                # API 제한을 피하기 위해 약간의 지연
-                await asyncio.sleep(0.5)
+            if success:
+                # 전송 성공 시 기록
+                self.mark_sent([message_id], current_time)
+                logger.info(f"✅ 새 메시지 즉시 전송 완료 (ID: {message_id})")
+            else:
+                logger.warning(f"⚠️ 새 메시지 즉시 전송 실패 (ID: {message_id}). 전송 대기열에서 다시 보내고, 다음 사이클에서도 전송합니다.")
+                self.outbox.wake()
             
-            logger.info(f"{len(messages_to_send)}개의 메시지를 그룹으로 전송했습니다.")
+            # 메시지 ID를 채널 메시지 목록에 추가 (없으면, 실패해도 추가하여 다음 사이클에서 전송)
+            if channel_message_ids.add(message_id):
+                self.supervisor.broadcast((WAKE,))  # 대기 중인 그룹 액터 깨우기
+                logger.info(f"📨 새 메시지 ID 추가: {message_id} (총 {len(channel_message_ids)}개)")
+                # 상태 DB에 추가된 ID만 기록
+                self.persister.add_message(message_id)
             
         except Exception as e:
-            logger.error(f"메시지 전송 중 오류 발생: {e}")
-            # 오류 발생 시 메시지를 다시 큐에 넣기
-            for msg_data in messages_to_send:
-                message_queue.put(msg_data)
+            logger.error(f"메시지 처리 중 오류 발생: {e}", exc_info=True)
     
-    async def forward_message(self, msg_data: dict, skip_first_message_check: bool = False):
+    async def forward_message(self, msg_data: dict):
         """개별 메시지를 모든 등록된 그룹으로 전달 (텔레그램 forward API 사용)
         
+        그룹별 전송을 전송 대기열(outbox)에 먼저 기록한 뒤 보내고, 성공한 그룹은 바로 지웁니다.
+        실패한 그룹은 대기열에 남아 워커가 백오프 후 다시 보냅니다.
+        
         Args:
             msg_data: 전송할 메시지 데이터
-            skip_first_message_check: True이면 첫 메시지 스킵 로직을 사용하지 않음 (사이클에서 사용)
         """
-        global registered_group_ids, new_group_first_message_sent, channel_message_ids
-        
         if not registered_group_ids:
             logger.warning("등록된 그룹이 없습니다. 그룹에서 /월하 명령어를 사용하세요.")
             return None
         
-        success_count = 0
-        failed_groups = []
+        # 전송 도중 그룹이 등록/제거되어도 건너뛰지 않도록 시작 시점의 스냅샷으로 동시 전송
+        # (이미 워커 등이 임대해서 보내고 있는 그룹은 빼고, 이번에 임대한 그룹에만 보냄)
+        snapshot = registered_group_ids.snapshot()
+        group_ids = await self.outbox.enqueue(msg_data['message_id'], msg_data['chat_id'], snapshot, leased=True)
+        if len(group_ids) < len(snapshot):
+            send_logger.info("📮 이미 전송 중인 그룹 %s개는 건너뜁니다. (메시지: %s)", len(snapshot) - len(group_ids), msg_data['message_id'])
+        if not group_ids:
+            return False
+        first_delivery = True
         
-        # 첫 메시지인지 확인 (중복 방지) - skip_first_message_check가 False일 때만
-        is_first_message = (not skip_first_message_check and channel_message_ids and msg_data['message_id'] == channel_message_ids[0])
+        async def send_one(group_id: str) -> bool:
+            nonlocal first_delivery
+            try:
+                success = await self.forward_message_to_group(group_id, msg_data)
+            except Exception as e:
+                self.record_delivery(group_id, False, repr(e))
+                await self.settle_outbox_item(msg_data['message_id'], group_id, RETRY, repr(e))
+                raise
+            if success is None:
+                # 회로가 열려 보내지 않음 - 실패로 세지 않고 회로가 닫힐 때쯤으로 미룸
+                await self.settle_outbox_item(msg_data['message_id'], group_id, DEFER)
+                return False
+            self.record_delivery(group_id, success)
+            if success and first_delivery:
+                first_delivery = False
+                self.observe_ingestion_lag(msg_data)
+            await self.settle_outbox_item(msg_data['message_id'], group_id, self.delivery_outcome(msg_data['message_id'], group_id, success))
+            return success
         
-        for group_id in registered_group_ids:
-            # 첫 메시지이고 새로 등록된 그룹에 이미 전송했다면 스킵 (중복 방지)
-            # 단, skip_first_message_check가 True이면 스킵하지 않음 (사이클에서는 모든 메시지 전송)
-            if is_first_message and not skip_first_message_check and new_group_first_message_sent.get(group_id, False):
-                logger.info(f"ℹ️ 그룹 {group_id}에 첫 메시지는 이미 전송되었습니다. 스킵합니다. (정상 동작)")
-                success_count += 1  # 이미 전송된 것이므로 성공으로 카운트
-                continue
-            # 타임아웃 에러 재시도를 위한 루프
-            max_retries = 3
-            retry_count = 0
-            success = False
-            
-            while retry_count < max_retries and not success:
-                try:
-                    if retry_count > 0:
-                        logger.info(f"🔄 메시지 전달 재시도 {retry_count}/{max_retries - 1}: 채널={msg_data['chat_id']}, 메시지ID={msg_data['message_id']}, 그룹={group_id}")
-                        await asyncio.sleep(2 * retry_count)  # 재시도 간격 증가
-                    else:
-                        logger.info(f"📤 메시지 전달 시도: 채널={msg_data['chat_id']}, 메시지ID={msg_data['message_id']}, 그룹={group_id}")
-                    
-                    # 메시지 전송 전에 봇이 그룹에 실제로 있는지 확인 (그룹 연동 확인)
-                    try:
-                        bot_member = await self.application.bot.get_chat_member(
-                            chat_id=group_id,
-                            user_id=self.application.bot.id
-                        )
-                        
-                        # 봇이 그룹에서 제거되었거나 추가되지 않은 경우
-                        if bot_member.status in ['left', 'kicked']:
-                            logger.error(f"❌ 봇이 그룹 {group_id}에 없습니다. (상태: {bot_member.status})")
-                            logger.error(f"   → 그룹이 아직 연동되지 않았거나 봇이 제거되었습니다.")
-                            if group_id in registered_group_ids:
-                                logger.warning(f"⚠️ 등록 목록에서 제거합니다: {group_id}")
-                                registered_group_ids.remove(group_id)
-                                await self.save_groups_to_file()
-                            failed_groups.append(group_id)
-                            break
-                        
-                        # 봇이 그룹에 있는지 확인 (member, administrator 등)
-                        if bot_member.status not in ['member', 'administrator', 'creator']:
-                            logger.warning(f"⚠️ 봇의 그룹 상태가 이상합니다: {bot_member.status} (그룹: {group_id})")
-                            logger.warning(f"   → 메시지 전송을 시도하지만 실패할 수 있습니다.")
-                            
-                    except Exception as member_error:
-                        error_msg = str(member_error).lower()
-                        if "chat not found" in error_msg or "bot was kicked" in error_msg or "bot was blocked" in error_msg or "user not found" in error_msg:
-                            logger.error(f"❌ 그룹 {group_id}을 찾을 수 없거나 봇이 제거되었습니다.")
-                            logger.error(f"   → 그룹이 아직 연동되지 않았거나 봇이 제거되었습니다.")
-                            if group_id in registered_group_ids:
-                                logger.warning(f"⚠️ 등록 목록에서 제거합니다: {group_id}")
-                                registered_group_ids.remove(group_id)
-                                await self.save_groups_to_file()
-                            failed_groups.append(group_id)
-                            break
-                        else:
-                            # 네트워크 오류 등은 경고만 하고 계속 진행
-                            logger.warning(f"⚠️ 그룹 멤버 확인 중 오류 발생 (계속 진행): {member_error}")
-                    
-                    # 텔레그램의 forward_message API를 사용하여 원본 메시지를 그대로 전달
-                    logger.info(f"📤 forward_message API 호출: 채널={msg_data['chat_id']}, 메시지ID={msg_data['message_id']}, 그룹={group_id}")
-                    result = await self.application.bot.forward_message(
-                        chat_id=group_id,
-                        from_chat_id=msg_data['chat_id'],
-                        message_id=msg_data['message_id']
-                    )
-                    
-                    # result 객체 확인
-                    if result is None:
-                        logger.error(f"❌ 메시지 전달 실패: result가 None입니다 (그룹: {group_id}, ID: {msg_data['message_id']})")
-                        if retry_count < max_retries - 1:
-                            retry_count += 1
-                            continue
-                        else:
-                            failed_groups.append(group_id)
-                            break
-                    
-                    if not hasattr(result, 'message_id') or result.message_id is None:
-                        logger.error(f"❌ 메시지 전달 실패: message_id가 없습니다 (그룹: {group_id}, ID: {msg_data['message_id']})")
-                        logger.error(f"   result 객체: {result}")
-                        if retry_count < max_retries - 1:
-                            retry_count += 1
-                            continue
-                        else:
-                            failed_groups.append(group_id)
-                            break
-                    
-                    forwarded_message_id = result.message_id
-                    logger.info(f"✅ forward_message API 성공: 전달된 메시지 ID={forwarded_message_id}, 그룹={group_id}")
-                    
-                    # forward_message API가 성공했지만, 실제로 메시지가 전송되었는지 추가 확인
-                    # 특히 그룹이 연동되기 전에 호출된 경우 실제 전송이 안 될 수 있음
-                    await asyncio.sleep(1)  # 메시지 전송 완료 대기
-                    
-                    # 그룹 상태를 다시 확인하여 봇이 여전히 그룹에 있는지 확인
-                    try:
-                        verify_bot_member = await self.application.bot.get_chat_member(
-                            chat_id=group_id,
-                            user_id=self.application.bot.id
-                        )
-                        
-                        # 봇이 그룹에서 제거된 경우
-                        if verify_bot_member.status in ['left', 'kicked']:
-                            logger.error(f"❌ 메시지 전송 후 봇이 그룹 {group_id}에서 제거되었습니다.")
-                            logger.error(f"   → 메시지가 실제로 전송되지 않았을 수 있습니다.")
-                            if retry_count < max_retries - 1:
-                                retry_count += 1
-                                logger.info(f"🔄 재시도 예정... (재시도 횟수: {retry_count}/{max_retries - 1})")
-                                continue
-                            else:
-                                logger.error(f"❌ 최종 전송 실패: 봇이 그룹에 없습니다")
-                                failed_groups.append(group_id)
-                                break
-                        
-                        # 그룹 정보도 확인 (그룹이 존재하는지)
-                        verify_chat = await self.application.bot.get_chat(chat_id=group_id)
-                        logger.debug(f"✅ 그룹 확인 완료: {verify_chat.title} (그룹 ID: {group_id})")
-                        
-                    except Exception as verify_error:
-                        error_msg = str(verify_error).lower()
-                        if "chat not found" in error_msg or "bot was kicked" in error_msg or "bot was blocked" in error_msg:
-                            logger.error(f"❌ 메시지 전송 후 그룹 {group_id} 확인 실패: 그룹을 찾을 수 없거나 봇이 제거되었습니다.")
-                            logger.error(f"   → 메시지가 실제로 전송되지 않았을 수 있습니다.")
-                            if group_id in registered_group_ids:
-                                logger.warning(f"⚠️ 등록 목록에서 제거합니다: {group_id}")
-                                registered_group_ids.remove(group_id)
-                                await self.save_groups_to_file()
-                            if retry_count < max_retries - 1:
-                                retry_count += 1
-                                logger.info(f"🔄 재시도 예정... (재시도 횟수: {retry_count}/{max_retries - 1})")
-                                continue
-                            else:
-                                logger.error(f"❌ 최종 전송 실패: 그룹을 찾을 수 없습니다")
-                                failed_groups.append(group_id)
-                                break
-                        else:
-                            # 네트워크 오류 등은 경고만 하고 계속 진행 (메시지는 전송되었을 가능성이 높음)
-                            logger.warning(f"⚠️ 그룹 확인 중 오류 발생 (메시지는 전송되었을 것으로 간주): {verify_error}")
-                    
-                    # 모든 확인이 완료되었으므로 메시지 전송 성공으로 간주
-                    logger.info(f"✅ 메시지 전달 성공 확인! (원본 ID: {msg_data['message_id']}, 전달된 메시지 ID: {forwarded_message_id}, 그룹: {group_id})")
-                    
-                    # 메시지 고정 (텔레그램 그룹은 여러 메시지를 동시에 고정 가능 #0, #1, #2...)
-                    try:
-                        await self.application.bot.pin_chat_message(
-                            chat_id=group_id,
-                            message_id=forwarded_message_id,
-                            disable_notification=True
-                        )
-                        logger.info(f"📌 메시지 고정 완료 (그룹: {group_id}, 메시지 ID: {forwarded_message_id})")
-                    except Exception as pin_error:
-                        error_msg = str(pin_error).lower()
-                        if "not enough rights" in error_msg or "no rights" in error_msg:
-                            logger.warning(f"⚠️ 메시지 고정 실패: 봇에 고정 권한이 없습니다 (그룹: {group_id})")
-                        elif "message to pin not found" in error_msg or "message not found" in error_msg:
-                            logger.warning(f"⚠️ 메시지 고정 실패: 메시지를 찾을 수 없습니다 (그룹: {group_id}, 메시지 ID: {forwarded_message_id})")
-                        else:
-                            logger.warning(f"⚠️ 메시지 고정 실패 (그룹: {group_id}, 메시지 ID: {forwarded_message_id}): {pin_error}")
-                    
-                    success_count += 1
-                    success = True
-                    # API 제한을 피하기 위해 약간의 지연
-                    await asyncio.sleep(0.3)
-                    break  # 성공 시 루프 종료
-                    
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    full_error = str(e)
-                    
-                    # 타임아웃 에러는 재시도
-                    if ("timed out" in error_msg or "timeout" in error_msg) and retry_count < max_retries - 1:
-                        logger.warning(f"⏱️ 타임아웃 발생 (시도: {retry_count + 1}/{max_retries}). 재시도 중...")
-                        retry_count += 1
-                        continue  # 재시도
-                    # 그룹을 찾을 수 없거나 봇이 제거된 경우 목록에서 제거 (재시도 안 함)
-                    elif "chat not found" in error_msg or "bot was kicked" in error_msg or "bot was blocked" in error_msg:
-                        logger.warning(f"그룹 {group_id}을 찾을 수 없거나 봇이 제거되었습니다. 목록에서 제거합니다.")
-                        if group_id in registered_group_ids:
-                            registered_group_ids.remove(group_id)
-                            await self.save_groups_to_file()
-                            logger.info(f"💾 그룹 제거 후 목록이 파일에 저장되었습니다: {registered_group_ids}")
-                        failed_groups.append(group_id)
-                        break  # 재시도 안 함
-                    elif "forbidden" in error_msg:
-                        logger.warning(f"그룹 {group_id}에서 권한이 없습니다. (메시지 전송 권한 필요)")
-                        failed_groups.append(group_id)
-                        break  # 재시도 안 함
-                    else:
-                        # 다른 에러도 재시도 (최대 횟수까지)
-                        if retry_count < max_retries - 1:
-                            logger.warning(f"⚠️ 메시지 전달 실패 (시도: {retry_count + 1}/{max_retries}): {full_error}. 재시도 중...")
-                            retry_count += 1
-                            continue  # 재시도
-                        else:
-                            logger.error(f"❌ 메시지 전달 최종 실패 (그룹: {group_id}, ID: {msg_data['message_id']}): {full_error}")
-                            failed_groups.append(group_id)
-                            break  # 최대 재시도 횟수 초과
+        results = await self.fan_out(group_ids, send_one)
+        success_count = sum(1 for _, ok in results if ok)
+        failed_groups = [group_id for group_id, ok in results if not ok]
         
         if success_count > 0:
             logger.info(f"메시지 전달 완료: {success_count}개 그룹에 전송됨 (실패: {len(failed_groups)}개)")
@@ -856,154 +905,471 @@ class TelegramChannelForwarder:
         
         return success_count > 0
     
+    async def fan_out(self, group_ids: Sequence[str], send_one):
+        """여러 그룹에 동시에 전송 (동시 실행 수는 FANOUT_CONCURRENCY로 제한)
+        
+        Args:
+            group_ids: 전송할 그룹 ID 목록
+            send_one: 그룹 ID를 받아 성공 여부(bool)를 반환하는 코루틴 함수
+        
+        Returns:
+            (그룹 ID, 성공 여부) 튜플 목록 (group_ids 순서 유지)
+        """
+        semaphore = asyncio.Semaphore(max(1, FANOUT_CONCURRENCY))
+        
+        async def run(group_id: str):
+            async with semaphore:
+                try:
+                    return group_id, bool(await send_one(group_id))
+                except Exception as e:
+                    logger.error(f"❌ 그룹 {group_id} 전송 중 예외 발생: {e}", exc_info=True)
+                    return group_id, False
+        
+        return await asyncio.gather(*(run(group_id) for group_id in group_ids))
+    
+    def record_delivery(self, group_id: str, success: bool, error: str = None):
+        """그룹별 마지막 성공 시각/연속 실패 횟수 기록"""
+        group_id = self.current_group_id(group_id)
+        group_forwards.inc(result='success' if success else 'failure')
+        if success:
+            self.health.record_forward()
+            capability = self.chat_cache.get(group_id)
+            registered_group_ids.record_success(group_id, title=capability.title if capability else None)
+        else:
+            registered_group_ids.record_failure(group_id, error)
+    
+    def delivery_outcome(self, message_id: int, group_id: str, success: bool) -> str:
+        """전송 결과를 전송 대기열 처리 방식으로 변환 (제거된 그룹/삭제된 원본은 재시도하지 않음)"""
+        if success:
+            return SENT
+        if self.current_group_id(group_id) not in registered_group_ids or message_id in self.missing_message_ids:
+            return DROP
+        return RETRY
     
-    async def load_message_ids_from_file(self):
-        """파일에서 메시지 ID 목록 불러오기 (중복 제거)"""
-        global channel_message_ids
+    async def settle_outbox_item(self, message_id: int, group_id: str, outcome: str, error: str = None):
+        """전송 대기열 행 정리 - 성공/포기는 삭제, 재시도는 다음 시도 시각 기록, 미룸은 시도 횟수 없이 다시 예약"""
+        # 전송 중에 그룹 ID가 바뀌었으면 행도 새 ID로 옮겨져 있음
+        group_id = self.current_group_id(group_id)
         try:
-            from pathlib import Path
-            ids_file = Path(__file__).parent / 'message_ids.txt'
-            logger.info(f"메시지 ID 파일 경로: {ids_file.absolute()}")
-            
-            if ids_file.exists():
-                loaded_ids = set()  # 중복 제거를 위해 set 사용
-                file_content = []
-                with open(ids_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        file_content.append(line)
-                        # 주석이나 빈 줄 건너뛰기
-                        if line and not line.startswith('#'):
-                            try:
-                                msg_id = int(line)
-                                loaded_ids.add(msg_id)  # set에 추가 (자동 중복 제거)
-                            except ValueError as ve:
-                                logger.debug(f"라인 '{line}'을 정수로 변환 실패: {ve}")
-                                continue
-                
-                # 기존 리스트와 병합하면서 중복 제거
-                before_count = len(channel_message_ids)
-                channel_message_ids = list(set(channel_message_ids) | loaded_ids)  # 중복 제거된 합집합
-                after_count = len(channel_message_ids)
-                new_count = after_count - before_count
-                
-                logger.info(f"파일 내용 (처음 10줄): {file_content[:10]}")
-                if new_count > 0:
-                    logger.info(f"파일에서 메시지 ID {new_count}개를 새로 불러왔습니다. (총 {after_count}개, 중복 제거됨)")
-                    logger.info(f"로드된 메시지 ID 목록: {sorted(channel_message_ids)}")
-                elif after_count > 0:
-                    logger.info(f"파일에서 메시지 ID를 불러왔지만 모두 이미 등록되어 있습니다. (총 {after_count}개)")
-                else:
-                    logger.warning(f"파일에서 메시지 ID를 불러왔지만 등록된 메시지가 없습니다. (파일 내용: {file_content})")
+            if outcome == RETRY:
+                await self.outbox.fail(message_id, group_id, error)
+            elif outcome == DEFER:
+                await self.outbox.defer(message_id, group_id, self.circuit_wait(group_id))
             else:
-                logger.warning(f"message_ids.txt 파일이 없습니다. 경로: {ids_file.absolute()}")
+                await self.outbox.complete(message_id, group_id)
         except Exception as e:
-            logger.error(f"메시지 ID 파일 읽기 실패: {e}", exc_info=True)
+            logger.error(f"❌ 전송 대기열 기록 실패 (메시지: {message_id}, 그룹: {group_id}): {e}")
     
-    async def save_message_ids_to_file(self):
-        """메시지 ID 목록을 파일에 저장 (봇 재시작 시에도 유지됨, Render에서도 자동 저장, 중복 제거)"""
-        global channel_message_ids
-        max_retries = 3
-        retry_delay = 1
+    async def deliver_outbox_item(self, item: OutboxItem) -> str:
+        """전송 대기열 워커의 재전송 - SENT/RETRY/DROP/DEFER 반환"""
+        import time
         
-        # 저장 전에 중복 제거
-        channel_message_ids = list(set(channel_message_ids))  # 중복 제거
+        if self.current_group_id(item.group_id) not in registered_group_ids:
+            send_logger.info("📮 등록되지 않은 그룹의 대기 전송을 버립니다. (메시지: %s, 그룹: %s)", item.message_id, item.group_id)
+            return DROP
+        send_logger.info("📮 대기 전송 재시도 (메시지: %s, 그룹: %s, 이전 시도: %s회)", item.message_id, item.group_id, item.attempts)
+        message_data = {
+            'chat_id': item.from_chat_id,
+            'message_id': item.message_id,
+            'date': None
+        }
+        success = await self.forward_message_to_group(item.group_id, message_data)
+        if success is None:
+            await self.settle_outbox_item(item.message_id, item.group_id, DEFER)
+            return DEFER
+        self.record_delivery(item.group_id, success)
+        outcome = self.delivery_outcome(item.message_id, item.group_id, success)
+        if success:
+            self.mark_sent([item.message_id], time.time())
+        if item.message_id in self.missing_message_ids:
+            await self.remove_missing_messages()
+        if self.current_group_id(item.group_id) != item.group_id:
+            # 전송 중에 그룹 ID가 바뀜 - 워커는 예전 ID로 정리하므로 새 ID로 옮겨진 행은 여기서 정리
+            await self.settle_outbox_item(item.message_id, item.group_id, outcome)
+        return outcome
+    
+    async def forward_message_to_group(self, group_id: str, msg_data: dict) -> Optional[bool]:
+        """개별 메시지를 하나의 그룹으로 전달 (회로가 열린 그룹은 API 호출 없이 건너뜀)
         
-        for attempt in range(max_retries):
-            try:
-                from pathlib import Path
-                ids_file = Path(__file__).parent / 'message_ids.txt'
-                file_path = str(ids_file.absolute())
-                
-                with open(ids_file, 'w', encoding='utf-8') as f:
-                    f.write("# 채널에 있는 메시지 ID 목록\n")
-                    f.write("# 한 줄에 하나씩 메시지 ID만 입력\n")
-                    f.write("# 봇이 자동으로 관리하므로 수동 수정 불필요\n\n")
-                    for msg_id in sorted(channel_message_ids):
-                        f.write(f"{msg_id}\n")
-                
-                # 파일이 제대로 저장되었는지 확인
-                if ids_file.exists():
-                    file_size = ids_file.stat().st_size
-                    logger.info(f"💾 메시지 ID {len(channel_message_ids)}개를 파일에 저장했습니다 (경로: {file_path}, 크기: {file_size} bytes)")
-                    logger.info(f"📋 저장된 메시지 ID: {sorted(channel_message_ids)}")
-                    return  # 성공하면 종료
-                else:
-                    raise Exception("파일이 생성되지 않았습니다.")
-                    
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"⚠️ 메시지 ID 파일 저장 시도 {attempt + 1}/{max_retries} 실패, 재시도 중...: {e}")
-                    await asyncio.sleep(retry_delay)
-                else:
-                    logger.error(f"❌ 메시지 ID 파일 저장 최종 실패 ({max_retries}회 시도): {e}", exc_info=True)
+        Returns:
+            전송 성공 여부 (회로가 열려 건너뛰었으면 None - 실패와 같이 거짓이지만 전송 실패로 세지 않음)
+        """
+        breaker = self.breakers.get(group_id)
+        if not breaker.allow():
+            send_logger.debug("회로 열림 - 전송 건너뜀 (그룹: %s, %.0f초 남음)", group_id, breaker.remaining())
+            return None
+        # 확인 전송(half_open)은 재시도 없이 1번만
+        try:
+            success = await self.attempt_forward_to_group(group_id, msg_data, policy='probe' if breaker.probing else 'forward')
+        except BaseException:
+            # 예외/취소로 결과를 기록하지 못하면 확인 전송 기회를 돌려줌 (안 그러면 half_open에 영영 묶임)
+            self.breakers.release(group_id)
+            raise
+        self.record_group_outcome(group_id, success, [msg_data['message_id']])
+        return success
+    
+    def circuit_wait(self, group_id: str) -> float:
+        """회로가 열린 그룹에 다시 보낼 때까지 기다릴 시간 (확인 전송이 진행 중이면 재시도 기본 대기)"""
+        return self.breakers.get(group_id).remaining() or self.outbox.base_delay
     
-    async def load_groups_from_file(self):
-        """파일에서 등록된 그룹 ID 목록 불러오기"""
-        global registered_group_ids
+    def record_group_outcome(self, group_id: str, success: bool, message_ids: List[int]):
+        """전송 결과를 그룹의 회로 차단기에 반영 (원본 메시지 문제나 제거된 그룹은 그룹 실패로 세지 않음)"""
+        group_id = self.current_group_id(group_id)
+        if success:
+            self.breakers.record_success(group_id)
+        elif group_id not in registered_group_ids:
+            self.breakers.forget(group_id)
+        elif any(message_id in self.missing_message_ids or message_id in self.unverified_message_ids for message_id in message_ids):
+            self.breakers.release(group_id)
+        else:
+            self.breakers.record_failure(group_id)
+    
+    async def attempt_forward_to_group(self, group_id: str, msg_data: dict, policy: str = 'forward') -> bool:
+        """개별 메시지를 하나의 그룹으로 전달 (재시도는 retry_policy의 정책에 따름, 고정 포함)
+        
+        봇 상태/권한은 chat_cache에서 확인하므로 평소에는 forward_message 호출 1번
+        (고정 권한이 있으면 pin_chat_message 1번 추가)으로 끝납니다.
+        
+        Returns:
+            전송 성공 여부
+        """
+        group_id = self.current_group_id(group_id)
+        if not await self.ensure_group_available(group_id):
+            if self.current_group_id(group_id) != group_id:
+                return await self.attempt_forward_to_group(group_id, msg_data, policy)
+            return False
+        
+        send_logger.info("📤 메시지 전달 시도: 채널=%s, 메시지ID=%s, 그룹=%s", msg_data['chat_id'], msg_data['message_id'], group_id)
         try:
-            from pathlib import Path
-            groups_file = Path(__file__).parent / 'registered_groups.txt'
-            if groups_file.exists():
-                loaded_count = 0
-                loaded_groups = []
-                with open(groups_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            if line not in registered_group_ids:
-                                registered_group_ids.append(line)
-                                loaded_groups.append(line)
-                                loaded_count += 1
-                if loaded_count > 0:
-                    logger.info(f"✅ 파일에서 그룹 ID {loaded_count}개를 불러왔습니다: {loaded_groups}")
-                    logger.info(f"📋 현재 등록된 그룹 총 {len(registered_group_ids)}개: {registered_group_ids}")
-                else:
-                    logger.info(f"📋 파일에서 불러온 그룹이 없습니다. 현재 등록된 그룹: {len(registered_group_ids)}개")
+            # 텔레그램의 forward_message API를 사용하여 원본 메시지를 그대로 전달
+            result = await call_with_policy(
+                policy,
+                lambda: self.application.bot.forward_message(
+                    chat_id=group_id,
+                    from_chat_id=msg_data['chat_id'],
+                    message_id=msg_data['message_id']
+                ),
+                f"그룹 {group_id}, 메시지 {msg_data['message_id']}",
+            )
+        except Exception as e:
+            if await self.follow_migration(group_id, e):
+                return await self.attempt_forward_to_group(group_id, msg_data, policy)
+            await self.handle_send_error(group_id, e, [msg_data['message_id']])
+            return False
+        
+        if result is None or getattr(result, 'message_id', None) is None:
+            logger.error(f"❌ 메시지 전달 실패: 결과에 message_id가 없습니다 (그룹: {group_id}, ID: {msg_data['message_id']})")
+            return False
+        
+        forwarded_message_id = result.message_id
+        self.chat_cache.mark_sent(group_id)
+        send_logger.info("✅ 메시지 전달 성공! (원본 ID: %s, 전달된 메시지 ID: %s, 그룹: %s)", msg_data['message_id'], forwarded_message_id, group_id)
+        
+        # 메시지 고정 (텔레그램 그룹은 여러 메시지를 동시에 고정 가능 #0, #1, #2...)
+        await self.pin_message(group_id, forwarded_message_id)
+        return True
+    
+    async def handle_send_error(self, group_id: str, error: Exception, message_ids: List[int]):
+        """전달 실패(재시도 후) 처리 - 오류 종류에 따라 원본 삭제 표시, 그룹 제거, 캐시 갱신"""
+        info = classify(error)
+        send_errors.inc(kind=info.kind)
+        if info.kind == MESSAGE_MISSING:
+            if len(message_ids) == 1:
+                # 원본 메시지가 채널에서 삭제된 경우 (사이클에서 목록 제거)
+                logger.warning(f"메시지 {message_ids[0]}가 채널에 존재하지 않습니다. (그룹: {group_id})")
+                self.missing_message_ids.add(message_ids[0])
             else:
-                # 파일이 없으면 config의 기본 그룹만 사용
-                logger.info(f"⚠️ registered_groups.txt 파일이 없습니다. config.py의 기본 그룹을 사용합니다.")
-                logger.info(f"📋 현재 등록된 그룹: {len(registered_group_ids)}개 - {registered_group_ids}")
+                # 배치 중 어떤 메시지가 없는지 모르므로 다음 사이클에서 개별 전송으로 확인
+                logger.warning(f"배치의 메시지를 채널에서 찾을 수 없습니다. (그룹: {group_id}, {message_ids})")
+                self.unverified_message_ids.update(message_ids)
+        elif info.kind == CHAT_GONE:
+            logger.warning(f"그룹 {group_id}을 찾을 수 없거나 봇이 제거되었습니다. 목록에서 제거합니다. ({error})")
+            self.chat_cache.mark_removed(group_id, info.removed_status)
+            await self.remove_group(group_id)
+        elif info.kind == MIGRATED:
+            # 새 ID를 알 수 없는 경우만 여기로 옴 (새 ID가 있으면 follow_migration에서 다시 전송)
+            logger.warning(f"⚠️ 그룹 {group_id}이 슈퍼그룹으로 바뀌었지만 새 ID를 알 수 없습니다. ({error})")
+        elif info.kind in (FORBIDDEN, NO_RIGHTS):
+            logger.warning(f"그룹 {group_id}에서 권한이 없습니다. (메시지 전송 권한 필요)")
+            # 권한이 바뀌었을 수 있으므로 다음 전송 때 상태를 다시 확인
+            self.chat_cache.invalidate(group_id)
+        elif info.kind == INTERNAL:
+            logger.error(f"❌ 전달 중 예외 발생 (그룹: {group_id}, ID: {message_ids}): {error!r}", exc_info=error)
+        else:
+            logger.error(f"❌ 메시지 전달 최종 실패 ({info.kind}, 그룹: {group_id}, ID: {message_ids}): {error}")
+    
+    async def forward_messages_batch_to_group(self, group_id: str, message_ids: List[int]) -> Optional[int]:
+        """여러 메시지를 하나의 그룹으로 전달 (회로가 열린 그룹은 API 호출 없이 건너뜀)
+        
+        Returns:
+            전달된 메시지 수 (0이면 실패, 회로가 열려 건너뛰었으면 None)
+        """
+        breaker = self.breakers.get(group_id)
+        if not breaker.allow():
+            send_logger.debug("회로 열림 - 배치 전송 건너뜀 (그룹: %s, %.0f초 남음)", group_id, breaker.remaining())
+            return None
+        try:
+            delivered = await self.attempt_forward_batch_to_group(group_id, message_ids, policy='probe' if breaker.probing else 'forward_batch')
+        except BaseException:
+            # 예외/취소로 결과를 기록하지 못하면 확인 전송 기회를 돌려줌
+            self.breakers.release(group_id)
+            raise
+        self.record_group_outcome(group_id, delivered > 0, message_ids)
+        return delivered
+    
+    async def attempt_forward_batch_to_group(self, group_id: str, message_ids: List[int], policy: str = 'forward_batch') -> int:
+        """여러 메시지를 forward_messages 1번 호출로 하나의 그룹에 전달 (Bot API 7.0+, 최대 100개)
+        
+        채널에서 삭제된 메시지는 텔레그램이 건너뛰므로, 전달된 개수가 요청보다 적으면
+        어떤 메시지가 빠졌는지는 호출한 쪽에서 개별 전송으로 확인해야 합니다.
+        고정은 배치의 마지막 메시지만 합니다.
+        
+        Returns:
+            전달된 메시지 수 (0이면 실패)
+        """
+        group_id = self.current_group_id(group_id)
+        if not await self.ensure_group_available(group_id):
+            if self.current_group_id(group_id) != group_id:
+                return await self.attempt_forward_batch_to_group(group_id, message_ids, policy)
+            return 0
+        
+        send_logger.info("📤 배치 전달 시도: 메시지 %s개 (%s~%s), 그룹=%s", len(message_ids), message_ids[0], message_ids[-1], group_id)
+        try:
+            result = await call_with_policy(
+                policy,
+                lambda: self.application.bot.forward_messages(
+                    chat_id=group_id,
+                    from_chat_id=int(SOURCE_CHANNEL_ID),
+                    message_ids=message_ids
+                ),
+                f"그룹 {group_id}, 메시지 {len(message_ids)}개",
+            )
         except Exception as e:
-            logger.error(f"❌ 그룹 ID 파일 읽기 실패: {e}", exc_info=True)
+            if await self.follow_migration(group_id, e):
+                return await self.attempt_forward_batch_to_group(group_id, message_ids, policy)
+            await self.handle_send_error(group_id, e, message_ids)
+            return 0
+        
+        self.chat_cache.mark_sent(group_id)
+        if result:
+            await self.pin_message(group_id, result[-1].message_id)
+        send_logger.info("✅ 배치 전달 완료: %s/%s개 (그룹: %s)", len(result), len(message_ids), group_id)
+        return len(result)
     
-    async def save_groups_to_file(self):
-        """등록된 그룹 ID 목록을 파일에 저장 (Render에서도 자동 저장, 재배포 없이 유지됨)"""
-        global registered_group_ids
-        max_retries = 3
-        retry_delay = 1
+    async def ensure_group_available(self, group_id: str) -> bool:
+        """봇이 그룹에 있는지 캐시로 확인 (캐시가 없거나 만료된 경우에만 조회)
         
-        for attempt in range(max_retries):
+        Returns:
+            전송을 시도해도 되면 True (봇이 제거된 그룹은 목록에서 제거하고 False)
+        """
+        capability = self.chat_cache.get(group_id)
+        if capability is None:
             try:
-                from pathlib import Path
-                groups_file = Path(__file__).parent / 'registered_groups.txt'
-                file_path = str(groups_file.absolute())
-                
-                with open(groups_file, 'w', encoding='utf-8') as f:
-                    f.write("# 등록된 그룹 ID 목록\n")
-                    f.write("# 한 줄에 하나씩 그룹 ID만 입력\n")
-                    f.write("# 그룹에서 /월하 명령어로 자동 추가됨\n\n")
-                    for group_id in registered_group_ids:
-                        f.write(f"{group_id}\n")
-                
-                # 파일이 제대로 저장되었는지 확인
-                if groups_file.exists():
-                    file_size = groups_file.stat().st_size
-                    logger.info(f"💾 그룹 ID {len(registered_group_ids)}개를 파일에 저장했습니다 (경로: {file_path}, 크기: {file_size} bytes)")
-                    logger.info(f"📋 저장된 그룹 목록: {registered_group_ids}")
-                    return  # 성공하면 종료
-                else:
-                    raise Exception("파일이 생성되지 않았습니다.")
-                    
+                capability = await call_with_policy(
+                    'chat_info',
+                    lambda: self.chat_cache.refresh(self.application.bot, group_id),
+                    f"그룹 {group_id}",
+                )
+                self.apply_slow_mode(group_id, capability.slow_mode_delay)
+            except Exception as member_error:
+                if await self.follow_migration(group_id, member_error):
+                    return False
+                if classify(member_error).kind == CHAT_GONE:
+                    logger.error(f"❌ 그룹 {group_id}을 찾을 수 없거나 봇이 제거되었습니다.")
+                    await self.remove_group(group_id)
+                    return False
+                # 네트워크 오류 등은 경고만 하고 계속 진행
+                logger.warning(f"⚠️ 그룹 멤버 확인 중 오류 발생 (계속 진행): {member_error}")
+        
+        if capability is not None and capability.is_removed:
+            logger.error(f"❌ 봇이 그룹 {group_id}에 없습니다. (상태: {capability.status})")
+            await self.remove_group(group_id)
+            return False
+        return True
+    
+    async def pin_message(self, group_id: str, message_id: int):
+        """전달된 메시지를 고정 (고정 권한이 없는 것으로 캐시된 그룹은 건너뜀)"""
+        capability = self.chat_cache.get(group_id)
+        if capability is not None and capability.can_pin is False:
+            send_logger.debug("고정 권한 없음 (캐시) - 고정 건너뜀 (그룹: %s)", group_id)
+            return
+        try:
+            await call_with_policy(
+                'pin',
+                lambda: self.application.bot.pin_chat_message(
+                    chat_id=group_id,
+                    message_id=message_id,
+                    disable_notification=True
+                ),
+                f"그룹 {group_id}, 메시지 {message_id}",
+            )
+            send_logger.info("📌 메시지 고정 완료 (그룹: %s, 메시지 ID: %s)", group_id, message_id)
+        except Exception as pin_error:
+            kind = classify(pin_error).kind
+            if kind in (NO_RIGHTS, FORBIDDEN):
+                logger.warning(f"⚠️ 메시지 고정 실패: 봇에 고정 권한이 없습니다 (그룹: {group_id})")
+                self.chat_cache.mark_pin_denied(group_id)
+            elif kind == MESSAGE_MISSING:
+                logger.warning(f"⚠️ 메시지 고정 실패: 메시지를 찾을 수 없습니다 (그룹: {group_id}, 메시지 ID: {message_id})")
+            else:
+                logger.warning(f"⚠️ 메시지 고정 실패 (그룹: {group_id}, 메시지 ID: {message_id}): {pin_error}")
+    
+    def apply_slow_mode(self, group_id: str, slow_mode_delay: int):
+        """그룹의 슬로우 모드 간격을 레이트 리미터에 반영"""
+        if slow_mode_delay and self.rate_limiter:
+            bucket = self.rate_limiter.get_chat_bucket(group_id)
+            bucket.set_rate(min(bucket.rate, 1 / slow_mode_delay), capacity=1)
+    
+    async def remove_group(self, group_id: str):
+        """봇이 제거되었거나 찾을 수 없는 그룹을 등록 목록에서 제거하고 저장"""
+        if registered_group_ids.remove(group_id) is not None:
+            logger.warning(f"⚠️ 등록 목록에서 제거합니다: {group_id}")
+            self.supervisor.remove(group_id)
+            self.breakers.forget(group_id)
+            self.persister.remove_group(group_id)
+            try:
+                await self.outbox.drop_group(group_id)
             except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"⚠️ 그룹 ID 파일 저장 시도 {attempt + 1}/{max_retries} 실패, 재시도 중...: {e}")
-                    await asyncio.sleep(retry_delay)
-                else:
-                    logger.error(f"❌ 그룹 ID 파일 저장 최종 실패 ({max_retries}회 시도): {e}", exc_info=True)
+                logger.error(f"❌ 전송 대기열에서 그룹 제거 실패 (그룹: {group_id}): {e}", exc_info=True)
+            logger.info(f"💾 그룹 제거 완료 (남은 그룹: {len(registered_group_ids)}개)")
+    
+    def current_group_id(self, group_id: str) -> str:
+        """슈퍼그룹으로 바뀐 그룹이면 새 ID, 아니면 그대로"""
+        group_id = str(group_id)
+        for _ in range(len(self.migrated_groups)):
+            if group_id not in self.migrated_groups:
+                break
+            group_id = self.migrated_groups[group_id]
+        return group_id
+    
+    async def follow_migration(self, group_id: str, error: Exception) -> bool:
+        """ChatMigrated 오류면 그룹을 새 ID로 옮기고 True (호출한 쪽에서 새 ID로 다시 전송)"""
+        info = classify(error)
+        if info.kind != MIGRATED or info.new_chat_id is None or str(info.new_chat_id) == str(group_id):
+            return False
+        await self.migrate_group(group_id, info.new_chat_id)
+        logger.info(f"🔁 새 그룹 ID로 다시 전송합니다: {group_id} → {info.new_chat_id}")
+        return True
+    
+    async def migrate_group(self, old_group_id: str, new_group_id: str) -> str:
+        """일반 그룹이 슈퍼그룹으로 바뀌어 ID가 변경됨 - 등록 목록, 액터, 사이클 위치, 전송 대기열을 새 ID로 옮김
+        
+        등록 목록/사이클 위치/ID 변경 기록은 상태 DB에 한 트랜잭션으로 기록되고,
+        전송 대기열의 남은 전송은 바로 새 ID로 옮겨집니다. 이미 옮긴 그룹이면 아무것도 하지 않습니다.
+        
+        Returns:
+            새 그룹 ID
+        """
+        old_group_id, new_group_id = str(old_group_id), str(new_group_id)
+        self.migrated_groups[old_group_id] = new_group_id
+        if not registered_group_ids.migrate(old_group_id, new_group_id):
+            return new_group_id
+        
+        logger.warning(f"🔀 그룹 {old_group_id}이 슈퍼그룹으로 바뀌었습니다. 새 ID {new_group_id}로 옮깁니다.")
+        self.supervisor.rename(old_group_id, new_group_id)
+        if old_group_id in self.saved_rotation:
+            self.saved_rotation.setdefault(new_group_id, self.saved_rotation.pop(old_group_id))
+        self.breakers.forget(old_group_id)
+        self.chat_cache.invalidate(old_group_id)
+        self.persister.migrate_group(old_group_id, new_group_id)
+        try:
+            moved = await self.outbox.migrate_group(old_group_id, new_group_id)
+            if moved:
+                logger.info(f"📮 남은 전송 {moved}개를 새 그룹 ID로 옮겼습니다. ({new_group_id})")
+        except Exception as e:
+            logger.error(f"❌ 전송 대기열 그룹 ID 변경 실패 ({old_group_id} → {new_group_id}): {e}", exc_info=True)
+        return new_group_id
     
-    async def load_settings_from_file(self):
-        """설정값 불러오기 (우선순위: 환경 변수 > 파일 > 기본값)"""
+    async def handle_chat_migration(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """그룹 → 슈퍼그룹 전환 서비스 메시지 처리 (예전 그룹과 새 슈퍼그룹에 각각 하나씩 옴)"""
+        message = update.effective_message
+        if not message:
+            return
+        if message.migrate_to_chat_id:
+            old_group_id, new_group_id = message.chat.id, message.migrate_to_chat_id
+        elif message.migrate_from_chat_id:
+            old_group_id, new_group_id = message.migrate_from_chat_id, message.chat.id
+        else:
+            return
+        await self.migrate_group(old_group_id, new_group_id)
+    
+    async def load_group_migrations(self):
+        """상태 DB에서 그룹 ID 변경 기록을 불러와 등록 목록에 반영"""
+        try:
+            migrations = await asyncio.to_thread(self.state.load_group_migrations)
+        except Exception as e:
+            logger.error(f"❌ 그룹 ID 변경 기록 불러오기 실패: {e}", exc_info=True)
+            return
+        self.migrated_groups.update(migrations)
+        for old_group_id, new_group_id in migrations.items():
+            if registered_group_ids.migrate(old_group_id, self.current_group_id(new_group_id)):
+                logger.info(f"🔀 예전 그룹 ID {old_group_id} 대신 새 ID {self.current_group_id(new_group_id)}로 전송합니다.")
+    
+    async def handle_my_chat_member(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """봇 자신의 그룹 멤버 상태 변경(my_chat_member)을 받아 캐시 갱신"""
+        chat_member_update = update.my_chat_member
+        if not chat_member_update:
+            return
+        group_id = str(chat_member_update.chat.id)
+        new_member = chat_member_update.new_chat_member
+        capability = self.chat_cache.update_member(group_id, new_member, chat_member_update.chat)
+        registered_group_ids.set_status(group_id, new_member.status, title=capability.title)
+        logger.info(f"👤 봇 상태 변경: 그룹={group_id}, {chat_member_update.old_chat_member.status} → {new_member.status} (고정 권한: {capability.can_pin})")
+        if capability.is_removed:
+            await self.remove_group(group_id)
+    
+    async def load_message_ids_from_store(self):
+        """상태 DB에서 메시지 ID 목록 불러오기 (중복 제거)"""
+        try:
+            loaded_ids = await asyncio.to_thread(self.state.load_message_ids)
+            
+            # 기존 목록과 병합 (중복은 추가되지 않음)
+            new_count = channel_message_ids.update(loaded_ids)
+            after_count = len(channel_message_ids)
+            
+            if new_count > 0:
+                logger.info(f"상태 DB에서 메시지 ID {new_count}개를 새로 불러왔습니다. (총 {after_count}개, 중복 제거됨)")
+            elif after_count > 0:
+                logger.info(f"상태 DB에서 메시지 ID를 불러왔지만 모두 이미 등록되어 있습니다. (총 {after_count}개)")
+            else:
+                logger.warning(f"상태 DB에 등록된 메시지가 없습니다. ({self.state.path})")
+        except Exception as e:
+            logger.error(f"메시지 ID 불러오기 실패: {e}", exc_info=True)
+    
+    async def load_delivery_history(self):
+        """상태 DB에서 그룹별 사이클 위치와 재전송 간격 안의 메시지 전송 시각 불러오기"""
+        import time
+        try:
+            self.saved_rotation = await asyncio.to_thread(self.state.load_rotation)
+            history = await asyncio.to_thread(self.state.load_sent_messages, time.time() - current_resend_wait_time)
+            now = time.time()
+            for message_id, sent_at in history.items():
+                # 재전송 간격 중 남은 시간만큼만 보관
+                sent_messages.set(message_id, sent_at, ttl=sent_at + current_resend_wait_time - now)
+            logger.info(f"📋 상태 DB에서 사이클 위치 {len(self.saved_rotation)}개, 최근 전송 기록 {len(history)}개를 불러왔습니다.")
+        except Exception as e:
+            logger.error(f"사이클 위치/전송 기록 불러오기 실패 (처음부터 전송): {e}", exc_info=True)
+    
+    def mark_sent(self, message_ids: List[int], sent_at: float):
+        """메시지 전송 시각 기록 (재시작 후에도 재전송 간격을 지키도록 상태 DB에도 기록)"""
+        for message_id in message_ids:
+            sent_messages[message_id] = sent_at
+        self.persister.mark_sent(message_ids, sent_at)
+    
+    async def load_groups_from_store(self):
+        """상태 DB에서 등록된 그룹 ID 목록 불러오기"""
+        try:
+            loaded_groups = registered_group_ids.update(await asyncio.to_thread(self.state.load_group_ids))
+            if loaded_groups:
+                logger.info(f"✅ 상태 DB에서 그룹 ID {len(loaded_groups)}개를 불러왔습니다: {loaded_groups[:20]}{' ...' if len(loaded_groups) > 20 else ''}")
+                logger.info(f"📋 현재 등록된 그룹 총 {len(registered_group_ids)}개")
+            else:
+                logger.info(f"📋 상태 DB에서 불러온 그룹이 없습니다. 현재 등록된 그룹: {len(registered_group_ids)}개")
+        except Exception as e:
+            logger.error(f"❌ 그룹 ID 불러오기 실패: {e}", exc_info=True)
+    
+    async def load_settings(self):
+        """설정값 불러오기 (우선순위: 환경 변수 > 상태 DB > 기본값)"""
         global current_message_interval, current_resend_wait_time
         import os
         
@@ -1025,72 +1391,30 @@ class TelegramChannelForwarder:
             except ValueError:
                 logger.warning(f"⚠️ 환경 변수 RESEND_WAIT_TIME_SECONDS 파싱 실패: {env_resend}")
         
-        # 2. 환경 변수가 없으면 파일에서 로드
+        # 2. 환경 변수가 없으면 상태 DB에서 로드
         if not env_interval or not env_resend:
             try:
-                from pathlib import Path
-                settings_file = Path(__file__).parent / 'settings.txt'
-                if settings_file.exists():
-                    with open(settings_file, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line and not line.startswith('#'):
-                                if '=' in line:
-                                    key, value = line.split('=', 1)
-                                    key = key.strip()
-                                    value = value.strip()
-                                    try:
-                                        if key == 'message_interval' and not env_interval:
-                                            current_message_interval = int(value)
-                                            logger.info(f"✅ 파일에서 설정 로드: 메시지 간격 = {current_message_interval // 60}분 ({current_message_interval}초)")
-                                        elif key == 'resend_wait_time' and not env_resend:
-                                            current_resend_wait_time = int(value)
-                                            logger.info(f"✅ 파일에서 설정 로드: 재전송 간격 = {current_resend_wait_time // 60}분 ({current_resend_wait_time}초)")
-                                    except ValueError:
-                                        logger.warning(f"⚠️ 설정값 파싱 실패: {key}={value}")
-                else:
-                    logger.info(f"⚠️ settings.txt 파일이 없습니다.")
+                settings = await asyncio.to_thread(self.state.load_settings)
+                for key, value in settings.items():
+                    try:
+                        if key == 'message_interval' and not env_interval:
+                            current_message_interval = int(value)
+                            logger.info(f"✅ 상태 DB에서 설정 로드: 메시지 간격 = {current_message_interval // 60}분 ({current_message_interval}초)")
+                        elif key == 'resend_wait_time' and not env_resend:
+                            current_resend_wait_time = int(value)
+                            logger.info(f"✅ 상태 DB에서 설정 로드: 재전송 간격 = {current_resend_wait_time // 60}분 ({current_resend_wait_time}초)")
+                    except ValueError:
+                        logger.warning(f"⚠️ 설정값 파싱 실패: {key}={value}")
             except Exception as e:
-                logger.error(f"❌ 설정 파일 읽기 실패: {e}", exc_info=True)
+                logger.error(f"❌ 설정값 불러오기 실패: {e}", exc_info=True)
         
         logger.info(f"📋 최종 적용된 설정: 메시지 간격={current_message_interval // 60}분, 재전송 간격={current_resend_wait_time // 60}분")
+        sent_messages.ttl = current_resend_wait_time
     
-    async def save_settings_to_file(self):
-        """설정값을 파일에 저장 (메시지 간격, 재전송 간격) - Render 재시작 시 유지"""
-        global current_message_interval, current_resend_wait_time
-        import os
-        max_retries = 3
-        retry_delay = 1
-        
-        # 파일에 저장 (서비스 실행 중에는 유지됨)
-        for attempt in range(max_retries):
-            try:
-                from pathlib import Path
-                settings_file = Path(__file__).parent / 'settings.txt'
-                file_path = str(settings_file.absolute())
-                
-                with open(settings_file, 'w', encoding='utf-8') as f:
-                    f.write("# 봇 설정값 (초 단위)\n")
-                    f.write("# 메시지 간 전송 간격 (초)\n")
-                    f.write(f"message_interval={current_message_interval}\n")
-                    f.write("# 같은 메시지 재전송 간격 (초)\n")
-                    f.write(f"resend_wait_time={current_resend_wait_time}\n")
-                
-                # 파일이 제대로 저장되었는지 확인
-                if settings_file.exists():
-                    file_size = settings_file.stat().st_size
-                    logger.info(f"💾 설정값을 파일에 저장했습니다 (경로: {file_path}, 크기: {file_size} bytes)")
-                    logger.info(f"📋 저장된 설정: 메시지 간격={current_message_interval // 60}분, 재전송 간격={current_resend_wait_time // 60}분")
-                    break  # 성공하면 루프 종료
-                else:
-                    raise Exception("파일이 생성되지 않았습니다.")
-                    
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"⚠️ 설정 파일 저장 시도 {attempt + 1}/{max_retries} 실패, 재시도 중...: {e}")
-                    await asyncio.sleep(retry_delay)
-                else:
-                    logger.error(f"❌ 설정 파일 저장 최종 실패 ({max_retries}회 시도): {e}", exc_info=True)
+    async def save_settings(self):
+        """설정값을 상태 DB에 저장 (메시지 간격, 재전송 간격)"""
+        self.persister.set_settings(message_interval=current_message_interval, resend_wait_time=current_resend_wait_time)
+        logger.info(f"💾 설정값 저장: 메시지 간격={current_message_interval // 60}분, 재전송 간격={current_resend_wait_time // 60}분")
         
         # 참고: 환경 변수는 Python에서 직접 변경할 수 없으므로
         # Render 대시보드에서 수동으로 설정해야 합니다.
@@ -1099,346 +1423,180 @@ class TelegramChannelForwarder:
         logger.info(f"   MESSAGE_INTERVAL_SECONDS={current_message_interval}")
         logger.info(f"   RESEND_WAIT_TIME_SECONDS={current_resend_wait_time}")
     
-    async def send_first_message_to_new_group(self, group_id: str, message_id: int):
-        """새로 등록된 그룹에 첫 메시지만 즉시 전송 (중복 방지)"""
-        global new_group_first_message_sent
+    async def send_existing_messages_sequentially(self):
+        """기존 채널 메시지를 그룹별 액터로 무한 반복 전송 (메시지 간격/재전송 간격은 설정값 사용)"""
+        # 상태 DB에서 기존 메시지 ID 불러오기 (봇 재시작 시에도 유지됨, 중복 제거됨)
+        await self.load_message_ids_from_store()
+        
+        # getUpdates는 Conflict 오류를 일으킬 수 있으므로 제거
+        # 새 메시지는 handle_channel_message에서 자동으로 추가됨
         
+        logger.info(f"현재 등록된 메시지: {len(channel_message_ids)}개 (상태 DB에서 불러옴)")
+        if len(channel_message_ids) > 0:
+            snapshot = channel_message_ids.snapshot()
+            preview = ', '.join(str(message_id) for message_id in snapshot[:20])
+            logger.info(f"등록된 메시지 ID: {preview}{' ...' if len(snapshot) > 20 else ''}")
+        logger.info("이제 비공개 채널에 올라오는 모든 새 메시지를 자동으로 감지하여 순환 전송합니다.")
+        logger.info("봇을 재시작해도 등록된 메시지 목록은 유지됩니다.")
+        
+        # 그룹마다 독립적인 액터가 자체 커서로 무한 반복 전송 (느린 그룹이 다른 그룹을 막지 않음)
+        logger.info(f"채널 메시지 {len(channel_message_ids)}개를 그룹별로 {current_message_interval // 60}분 간격 무한 반복 전송 시작...")
+        scheduler_task = asyncio.create_task(self.scheduler.run())
+        self.supervisor.sync(registered_group_ids)
+        
+        # 액터 감독: 그룹 목록과 액터를 주기적으로 맞춤 (죽은 액터 재시작은 ActorSupervisor가 처리)
+        # 종료 시에는 stop_rotation이 액터를 먼저 정지시키고 사이클 위치를 저장함
         try:
-            # 봇이 완전히 시작될 때까지 대기 (최대 60초, 배포 시간 고려)
-            max_wait_time = 60
-            wait_interval = 2
-            waited = 0
-            
-            while not self.is_fully_started and waited < max_wait_time:
-                await asyncio.sleep(wait_interval)
-                waited += wait_interval
-                if waited % 10 == 0:  # 10초마다 로그
-                    logger.info(f"봇 시작 대기 중... ({waited}/{max_wait_time}초)")
-            
-            if not self.is_fully_started:
-                logger.warning(f"봇이 {max_wait_time}초 내에 시작되지 않았습니다. 첫 메시지 전송을 건너뜁니다.")
-                return
-            
-            # application이 초기화되었는지 확인
-            if not self.application or not self.application.bot:
-                logger.warning("봇 application이 초기화되지 않았습니다. 첫 메시지 전송을 건너뜁니다.")
-                return
-            
-            # 추가 안정성 확인: 봇이 실제로 작동하는지 테스트
-            try:
-                await asyncio.sleep(3)  # 배포 완료 후 안정화 대기
-                await self.application.bot.get_me()
-            except Exception as e:
-                logger.warning(f"봇 상태 확인 실패, 전송을 건너뜁니다: {e}")
-                return
-            
-            # 이미 전송했는지 확인 (중복 방지)
-            if new_group_first_message_sent.get(group_id, False):
-                logger.info(f"그룹 {group_id}에 첫 메시지는 이미 전송되었습니다.")
-                return
-            
-            message_data = {
-                'chat_id': int(SOURCE_CHANNEL_ID),
-                'message_id': message_id,
-                'date': None
-            }
-            
-            # 재시도 로직 (최대 3회)
-            max_retries = 3
-            retry_delay = 2
-            
-            for attempt in range(max_retries):
+            while self.is_running:
                 try:
-                    # 특정 그룹에만 전송
-                    result = await self.application.bot.forward_message(
-                        chat_id=group_id,
-                        from_chat_id=message_data['chat_id'],
-                        message_id=message_data['message_id']
-                    )
-                    
-                    # 메시지 고정 (텔레그램이 자동으로 이전 고정 메시지를 해제함)
-                    try:
-                        await self.application.bot.pin_chat_message(
-                            chat_id=group_id,
-                            message_id=result.message_id,
-                            disable_notification=True
-                        )
-                        logger.info(f"📌 메시지 고정 완료 (그룹: {group_id}, 메시지 ID: {result.message_id})")
-                    except Exception as pin_error:
-                        error_msg = str(pin_error).lower()
-                        if "not enough rights" in error_msg or "no rights" in error_msg:
-                            logger.warning(f"⚠️ 메시지 고정 실패: 봇에 고정 권한이 없습니다 (그룹: {group_id})")
-                        elif "message to pin not found" in error_msg or "message not found" in error_msg:
-                            logger.warning(f"⚠️ 메시지 고정 실패: 메시지를 찾을 수 없습니다 (그룹: {group_id}, 메시지 ID: {result.message_id})")
-                        else:
-                            logger.warning(f"⚠️ 메시지 고정 실패 (그룹: {group_id}): {pin_error}")
-                    
-                    # 전송 완료 플래그 설정
-                    new_group_first_message_sent[group_id] = True
-                    logger.info(f"[새 그룹 첫 메시지] 그룹 {group_id}에 전송 완료 (ID: {message_id})")
-                    break  # 성공하면 재시도 루프 종료
-                    
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    
-                    # 메시지가 존재하지 않는 경우 재시도 불필요
-                    if "message to forward not found" in error_msg or "message not found" in error_msg:
-                        logger.warning(f"메시지 {message_id}가 채널에 존재하지 않습니다. 건너뜁니다.")
-                        break
-                    
-                    # 네트워크 오류나 일시적 오류인 경우 재시도
-                    if attempt < max_retries - 1:
-                        logger.warning(f"첫 메시지 전송 실패 (그룹: {group_id}, ID: {message_id}, 시도 {attempt + 1}/{max_retries}): {e}")
-                        await asyncio.sleep(retry_delay)
-                    else:
-                        logger.error(f"첫 메시지 전송 최종 실패 (그룹: {group_id}, ID: {message_id}): {e}")
-            
-        except Exception as e:
-            logger.error(f"첫 메시지 전송 중 오류: {e}", exc_info=True)
+                    await asyncio.wait_for(self.shutdown_event.wait(), 30)
+                except asyncio.TimeoutError:
+                    pass
+                if self.is_running:
+                    self.supervisor.sync(registered_group_ids)
+                    self.purge_expired_entries()
+                    await self.update_gauges()
+        finally:
+            await self.supervisor.stop_all(timeout=10)
+            self.scheduler.stop()
+            await scheduler_task
     
-    async def send_existing_messages_to_new_group(self, group_id: str):
-        """새로 등록된 그룹에 기존 메시지들을 전송 (봇이 완전히 시작되고 배포가 완료된 후)"""
+    async def update_gauges(self):
+        """대기열 크기 등 현재 상태 지표 갱신 (감독 루프에서 주기적으로 호출)"""
+        registered_groups_gauge.set(len(registered_group_ids))
+        channel_messages_gauge.set(len(channel_message_ids))
+        open_circuits_gauge.set(len(self.breakers.open_keys()))
         try:
-            # 봇이 완전히 시작될 때까지 대기 (최대 60초, 배포 시간 고려)
-            max_wait_time = 60
-            wait_interval = 2
-            waited = 0
-            
-            while not self.is_fully_started and waited < max_wait_time:
-                await asyncio.sleep(wait_interval)
-                waited += wait_interval
-                if waited % 10 == 0:  # 10초마다 로그
-                    logger.info(f"봇 시작 대기 중... ({waited}/{max_wait_time}초)")
-            
-            if not self.is_fully_started:
-                logger.warning(f"봇이 {max_wait_time}초 내에 시작되지 않았습니다. 기존 메시지 전송을 건너뜁니다.")
-                return
-            
-            # application이 초기화되었는지 확인
-            if not self.application or not self.application.bot:
-                logger.warning("봇 application이 초기화되지 않았습니다. 기존 메시지 전송을 건너뜁니다.")
-                return
-            
-            # 추가 안정성 확인: 봇이 실제로 작동하는지 테스트
-            try:
-                await asyncio.sleep(3)  # 배포 완료 후 안정화 대기
-                # 간단한 API 호출로 봇 상태 확인
-                await self.application.bot.get_me()
-            except Exception as e:
-                logger.warning(f"봇 상태 확인 실패, 전송을 건너뜁니다: {e}")
-                return
-            
-            if not channel_message_ids:
-                return
-            
-            logger.info(f"그룹 {group_id}에 기존 메시지 {len(channel_message_ids)}개 전송 시작 (첫 메시지만 즉시, 나머지는 10분 간격)...")
-            
-            for idx, message_id in enumerate(channel_message_ids, 1):
-                message_data = {
-                    'chat_id': int(SOURCE_CHANNEL_ID),
-                    'message_id': message_id,
-                    'date': None
-                }
-                
-                # 재시도 로직 (최대 3회)
-                max_retries = 3
-                retry_delay = 2  # 재시도 간격 (초)
-                
-                for attempt in range(max_retries):
-                    try:
-                        # 특정 그룹에만 전송
-                        result = await self.application.bot.forward_message(
-                            chat_id=group_id,
-                            from_chat_id=message_data['chat_id'],
-                            message_id=message_data['message_id']
-                        )
-                        
-                        # 메시지 고정
-                        try:
-                            await self.application.bot.pin_chat_message(
-                                chat_id=group_id,
-                                message_id=result.message_id,
-                                disable_notification=True
-                            )
-                            logger.info(f"📌 메시지 고정 완료 (그룹: {group_id}, 메시지 ID: {result.message_id})")
-                        except Exception as pin_error:
-                            error_msg = str(pin_error).lower()
-                            if "not enough rights" in error_msg or "no rights" in error_msg:
-                                logger.warning(f"⚠️ 메시지 고정 실패: 봇에 고정 권한이 없습니다 (그룹: {group_id})")
-                            elif "message to pin not found" in error_msg or "message not found" in error_msg:
-                                logger.warning(f"⚠️ 메시지 고정 실패: 메시지를 찾을 수 없습니다 (그룹: {group_id}, 메시지 ID: {result.message_id})")
-                            else:
-                                logger.warning(f"⚠️ 메시지 고정 실패 (그룹: {group_id}, 메시지 ID: {result.message_id}): {pin_error}")
-                        
-                        logger.info(f"[기존 메시지 {idx}/{len(channel_message_ids)}] 그룹 {group_id}에 전송 완료 (ID: {message_id})")
-                        break  # 성공하면 재시도 루프 종료
-                        
-                    except Exception as e:
-                        error_msg = str(e).lower()
-                        
-                        # 메시지가 존재하지 않는 경우 재시도 불필요
-                        if "message to forward not found" in error_msg or "message not found" in error_msg:
-                            logger.warning(f"메시지 {message_id}가 채널에 존재하지 않습니다. 건너뜁니다.")
-                            break
-                        
-                        # 네트워크 오류나 일시적 오류인 경우 재시도
-                        if attempt < max_retries - 1:
-                            logger.warning(f"기존 메시지 전송 실패 (그룹: {group_id}, ID: {message_id}, 시도 {attempt + 1}/{max_retries}): {e}")
-                            await asyncio.sleep(retry_delay)
-                        else:
-                            logger.error(f"기존 메시지 전송 최종 실패 (그룹: {group_id}, ID: {message_id}): {e}")
-                
-                # 첫 메시지는 즉시 전송, 나머지는 10분 간격으로 전송
-                if idx < len(channel_message_ids):
-                    interval_min = current_message_interval // 60
-                    logger.info(f"다음 메시지까지 {interval_min}분 대기 중...")
-                    await asyncio.sleep(current_message_interval)
-            
-            logger.info(f"그룹 {group_id}에 기존 메시지 전송 완료")
+            stats = await self.outbox.stats()
         except Exception as e:
-            logger.error(f"기존 메시지 전송 중 오류: {e}", exc_info=True)
+            logger.debug(f"전송 대기열 통계 조회 실패: {e}")
+            return
+        for status in ('pending', 'dead'):
+            outbox_rows.set(stats.get(status, 0), status=status)
     
-    async def send_existing_messages_sequentially(self):
-        """기존 채널 메시지를 순차적으로 무한 반복 전송 (10분 간격)"""
-        import time
+    def observe_ingestion_lag(self, msg_data: dict):
+        """채널 게시 시각부터 첫 그룹 전송 완료까지 걸린 시간 기록 (게시 시각을 모르면 건너뜀)"""
+        if not msg_data.get('date'):
+            return
+        posted_at = datetime.fromisoformat(msg_data['date']).timestamp()
+        ingestion_lag.observe(max(0.0, datetime.now().timestamp() - posted_at))
+    
+    def observe_api_request(self, method: str, seconds: float, error):
+        """HTTP 전송 계층에서 실제로 보낸 Bot API 요청마다 호출 (getUpdates 포함, 메서드별 요청 수/응답 시간 기록)"""
+        api_requests.inc(method=method, outcome='ok' if error is None else classify(error).kind)
+        api_latency.observe(seconds, method=method)
+        if method == 'getUpdates' and error is None:
+            self.health.record_updates()
+    
+    def observe_loop_lag(self, lag: float):
+        """하트비트가 측정한 이벤트 루프 지연 기록 (LOOP_LAG_SAMPLE_SECONDS마다)"""
+        loop_lag.set(lag)
+        loop_lag_distribution.observe(lag)
+    
+    def purge_expired_entries(self):
+        """만료된 전송 기록과 비밀번호 입력 대기를 정리 (감독 루프에서 주기적으로 호출)"""
+        expired_sent = sent_messages.purge()
+        expired_pending = pending_registrations.purge()
+        if expired_pending:
+            logger.info(f"⌛ 비밀번호 입력 대기 {expired_pending}개가 만료되었습니다.")
+        if expired_sent:
+            logger.debug(f"전송 기록 {expired_sent}개 만료 (남은 기록 {sent_messages.stats()['size']}개)")
+    
+    def build_rotation_batches(self, message_ids: Sequence[int]) -> List[List[int]]:
+        """사이클 전송 단위 생성
         
-        # 파일에서 기존 메시지 ID 불러오기 (봇 재시작 시에도 유지됨)
-        await self.load_message_ids_from_file()
+        ROTATION_BATCH_SIZE가 1보다 크면 목록에서 이웃한 메시지 ID를 최대 100개까지 묶어
+        그룹당 forward_messages 1번으로 보냅니다. 배치 전달에서 일부가 빠졌던 메시지는
+        어떤 메시지가 삭제되었는지 확인하기 위해 단독으로 보냅니다.
+        """
+        batch_size = max(1, min(ROTATION_BATCH_SIZE, 100))
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for message_id in message_ids:
+            if batch_size == 1 or message_id in self.unverified_message_ids:
+                if current:
+                    batches.append(current)
+                    current = []
+                batches.append([message_id])
+                continue
+            current.append(message_id)
+            if len(current) >= batch_size:
+                batches.append(current)
+                current = []
+        if current:
+            batches.append(current)
+        return batches
+    
+    def create_group_actor(self, group_id: str) -> GroupDeliveryActor:
+        """그룹별 사이클 전송 액터 생성 (ActorSupervisor가 호출)"""
+        import time
         
-        # 중복 제거 (혹시 모를 중복 방지)
-        global channel_message_ids
-        before_dedup = len(channel_message_ids)
-        channel_message_ids = list(set(channel_message_ids))
-        after_dedup = len(channel_message_ids)
-        if before_dedup != after_dedup:
-            logger.warning(f"⚠️ 중복된 메시지 ID {before_dedup - after_dedup}개를 제거했습니다. (총 {before_dedup}개 → {after_dedup}개)")
-            await self.save_message_ids_to_file()  # 중복 제거된 목록 저장
+        actor = GroupDeliveryActor(
+            group_id,
+            scheduler=self.scheduler,
+            deliver=self.deliver_rotation_batch,
+            rotation_source=lambda: self.build_rotation_batches(channel_message_ids.snapshot()),
+            interval=lambda: current_message_interval,
+            resend_wait=lambda: current_resend_wait_time,
+            catchup_policy=ROTATION_CATCHUP_POLICY,
+            on_advance=lambda actor: None if actor.stopping else self.persister.set_rotation(actor.group_id, actor.snapshot()),
+            on_cycle_complete=lambda actor, seconds: rotation_cycle_seconds.observe(seconds),
+        )
+        # 이전 실행에서 저장된 위치가 있으면 이어서 전송 (처음 한 번만)
+        position = self.saved_rotation.pop(group_id, None)
+        if position is not None:
+            actor.resume(position)
+            wait = max(0.0, (position.get('next_due_at') or 0) - time.time())
+            logger.info(f"⏯️ 그룹 {group_id}: {actor.cycle}번째 사이클 이어서 전송 (다음 메시지 ID: {position.get('next_message_id')}, {wait / 60:.0f}분 후)")
+        return actor
+    
+    async def deliver_rotation_batch(self, group_id: str, batch: List[int]) -> bool:
+        """그룹 액터의 사이클 전송 - 메시지 1개는 forward_message, 여러 개는 forward_messages로 전송"""
+        import time
         
-        # getUpdates는 Conflict 오류를 일으킬 수 있으므로 제거
-        # 새 메시지는 handle_channel_message에서 자동으로 추가됨
+        if len(batch) == 1:
+            message_id = batch[0]
+            message_data = {
+                'chat_id': int(SOURCE_CHANNEL_ID),
+                'message_id': message_id,
+                'date': None
+            }
+            success = await self.forward_message_to_group(group_id, message_data)
+            if success or message_id in self.missing_message_ids:
+                # 개별 전송 결과로 메시지 존재 여부가 확인됨
+                self.unverified_message_ids.discard(message_id)
+        else:
+            delivered = await self.forward_messages_batch_to_group(group_id, batch)
+            success = None if delivered is None else delivered == len(batch)
+            if delivered and delivered < len(batch):
+                # 어떤 메시지가 빠졌는지 알 수 없으므로 다음 사이클에서 개별 전송으로 확인
+                logger.warning(f"⚠️ 배치 전송이 완전하지 않습니다 ({delivered}/{len(batch)}, 그룹: {group_id}). 다음 사이클에서 개별 전송으로 확인합니다: {batch}")
+                self.unverified_message_ids.update(batch)
         
-        logger.info(f"현재 등록된 메시지: {len(channel_message_ids)}개 (파일에서 불러옴, 중복 제거됨)")
-        if len(channel_message_ids) > 0:
-            logger.info(f"등록된 메시지 ID: {sorted(channel_message_ids)}")
-        logger.info("이제 비공개 채널에 올라오는 모든 새 메시지를 자동으로 감지하여 순환 전송합니다.")
-        logger.info("봇을 재시작해도 등록된 메시지 목록은 유지됩니다.")
+        if success is None:
+            # 회로가 열려 보내지 않음 - 그룹 실패로 세지 않음 (액터는 실패와 같이 다음 차례에 다시 보냄)
+            return False
+        self.record_delivery(group_id, success)
+        if success:
+            self.mark_sent(batch, time.time())
         
-        # 무한 반복 전송
-        while self.is_running:
-            try:
-                if not channel_message_ids:
-                    logger.info("전송할 메시지가 없습니다. 비공개 채널에 새 메시지를 올리면 자동으로 등록됩니다.")
-                    await asyncio.sleep(60)  # 1분마다 체크
-                    continue
-                
-                logger.info(f"채널 메시지 {len(channel_message_ids)}개를 {current_message_interval // 60}분 간격으로 무한 반복 전송 시작...")
-                
-                cycle = 1
-                while self.is_running and channel_message_ids:  # 메시지가 있을 때만 사이클 실행
-                    logger.info(f"=== {cycle}번째 사이클 시작 (총 {len(channel_message_ids)}개 메시지) ===")
-                    logger.info(f"📋 전송할 메시지 ID 목록: {sorted(channel_message_ids)}")
-                    
-                    # 사이클 시작 시 첫 메시지 스킵 플래그 초기화 (모든 메시지를 정상적으로 전송하기 위해)
-                    # 첫 메시지 스킵 로직은 새 그룹 등록 시에만 필요하므로, 사이클에서는 모든 메시지를 전송해야 함
-                    global new_group_first_message_sent
-                    for group_id in registered_group_ids:
-                        if new_group_first_message_sent.get(group_id, False):
-                            logger.debug(f"그룹 {group_id}의 첫 메시지 스킵 플래그 초기화 (사이클 시작)")
-                    new_group_first_message_sent.clear()
-                    
-                    for idx, message_id in enumerate(channel_message_ids, 1):
-                        if not self.is_running:
-                            logger.warning("봇이 중지되어 메시지 전송을 중단합니다.")
-                            return
-                        
-                        logger.info(f"🔄 메시지 {idx}/{len(channel_message_ids)} 처리 시작 (ID: {message_id})")
-                        message_data = {
-                            'chat_id': int(SOURCE_CHANNEL_ID),
-                            'message_id': message_id,
-                            'date': None
-                        }
-                        
-                        try:
-                            # forward_message는 성공 시 True, 실패 시 False 반환
-                            # 사이클에서는 첫 메시지 스킵 로직을 사용하지 않음 (모든 메시지 전송)
-                            success = await self.forward_message(message_data, skip_first_message_check=True)
-                            
-                            if success:
-                                # 전송 성공 시 기록 (로그용)
-                                sent_messages[message_id] = time.time()
-                                logger.info(f"✅ [사이클 {cycle}, {idx}/{len(channel_message_ids)}] 메시지 전송 완료 (ID: {message_id})")
-                            else:
-                                # 전송 실패 시 재시도 (최대 3회)
-                                logger.warning(f"⚠️ [사이클 {cycle}, {idx}/{len(channel_message_ids)}] 메시지 전송 실패 (ID: {message_id}). 재시도 중...")
-                                retry_success = False
-                                for retry in range(3):
-                                    await asyncio.sleep(2)  # 2초 대기 후 재시도
-                                    retry_success = await self.forward_message(message_data, skip_first_message_check=True)
-                                    if retry_success:
-                                        logger.info(f"✅ 재시도 성공! (ID: {message_id}, 시도: {retry + 1}/3)")
-                                        sent_messages[message_id] = time.time()
-                                        break
-                                    else:
-                                        logger.warning(f"⚠️ 재시도 실패 (ID: {message_id}, 시도: {retry + 1}/3)")
-                                
-                                if not retry_success:
-                                    logger.error(f"❌ [사이클 {cycle}, {idx}/{len(channel_message_ids)}] 메시지 전송 최종 실패 (ID: {message_id}). 다음 메시지로 진행합니다.")
-                            
-                            # 마지막 메시지가 아니면 설정된 간격만큼 대기
-                            # 주의: current_message_interval은 전역 변수이므로 설정 변경 시 즉시 반영됨
-                            if idx < len(channel_message_ids):
-                                # 현재 설정값을 다시 읽어서 최신 값 사용 (설정 변경 즉시 반영)
-                                interval_min = current_message_interval // 60
-                                interval_sec = current_message_interval
-                                logger.info(f"⏳ 다음 메시지까지 {interval_min}분 ({interval_sec}초) 대기 중... (현재 설정값 적용)")
-                                try:
-                                    await asyncio.sleep(current_message_interval)
-                                    logger.info(f"✅ 대기 완료. 다음 메시지 전송 시작...")
-                                except Exception as sleep_error:
-                                    logger.error(f"❌ 대기 중 오류 발생: {sleep_error}", exc_info=True)
-                                    # 오류가 발생해도 다음 메시지로 진행
-                                    await asyncio.sleep(1)  # 최소 1초 대기 후 계속
-                        except Exception as e:
-                            error_msg = str(e).lower()
-                            # 메시지가 실제로 존재하지 않는 경우에만 목록에서 제거
-                            if "message to forward not found" in error_msg or "message not found" in error_msg:
-                                logger.warning(f"메시지 {message_id}가 채널에 존재하지 않습니다. 목록에서 제거합니다.")
-                                if message_id in channel_message_ids:
-                                    channel_message_ids.remove(message_id)
-                                    await self.save_message_ids_to_file()
-                            else:
-                                # 다른 이유로 실패한 경우 (권한, 네트워크 등)는 제거하지 않음
-                                logger.error(f"메시지 전달 실패 (ID: {message_id}): {e} (목록에서 제거하지 않음)")
-                            # 실패해도 다음 메시지로 진행
-                            if idx < len(channel_message_ids):
-                                interval_min = current_message_interval // 60
-                                interval_sec = current_message_interval
-                                logger.info(f"⏳ 다음 메시지까지 {interval_min}분 ({interval_sec}초) 대기 중... (오류 후)")
-                                await asyncio.sleep(current_message_interval)
-                                logger.info(f"✅ 대기 완료. 다음 메시지 전송 시작... (오류 후)")
-                    
-                    # 한 사이클 완료 후 재전송 대기 시간만큼 대기 후 다시 시작
-                    # 메시지가 없으면 사이클 종료
-                    if not channel_message_ids:
-                        logger.info("등록된 메시지가 없어 사이클을 종료합니다.")
-                        break
-                    
-                    # 사이클 간 재전송 대기 시간 적용
-                    resend_wait_min = current_resend_wait_time // 60
-                    resend_wait_sec = current_resend_wait_time
-                    logger.info(f"✅ {cycle}번째 사이클 완료! (총 {len(channel_message_ids)}개 메시지 전송 완료)")
-                    logger.info(f"⏳ 다음 사이클까지 {resend_wait_min}분 ({resend_wait_sec}초) 대기 중...")
-                    await asyncio.sleep(current_resend_wait_time)
-                    logger.info(f"✅ 대기 완료! {cycle + 1}번째 사이클 시작합니다...")
-                    cycle += 1
-                    
-            except Exception as e:
-                logger.error(f"기존 메시지 가져오기 중 오류: {e}", exc_info=True)
-                await asyncio.sleep(60)  # 오류 발생 시 1분 후 재시도
+        # 채널에서 삭제된 것으로 확인된 메시지는 목록에서 제거
+        await self.remove_missing_messages()
+        return success
     
-    async def send_messages_to_group_callback(self, context: ContextTypes.DEFAULT_TYPE):
-        """주기적으로 메시지를 전송하는 콜백"""
-        await self.send_messages_to_group()
+    async def remove_missing_messages(self):
+        """채널에서 삭제된 것으로 확인된 메시지를 목록에서 제거하고 저장"""
+        if not self.missing_message_ids:
+            return
+        # 목록에서 지우고 tombstone을 남김 (늦게 도착한 업데이트 등으로 다시 추가되지 않음)
+        removed = channel_message_ids.remove(self.missing_message_ids)
+        self.missing_message_ids.clear()
+        if removed:
+            for message_id in removed:
+                self.unverified_message_ids.discard(message_id)
+                await self.outbox.drop_message(message_id)
+            logger.warning(f"메시지 {removed}가 채널에 존재하지 않습니다. 목록에서 제거합니다.")
+            self.persister.remove_messages(removed)
 
 def run_keepalive_server():
     """KeepAlive 웹서버를 별도 스레드에서 실행 (Render에서도 작동)"""
@@ -1456,12 +1614,13 @@ def run_keepalive_server():
     except Exception as e:
         logger.warning(f"⚠️ KeepAlive 서버 시작 실패: {e} (봇은 정상 작동합니다)")
 
-def main():
-    """메인 함수"""
+def main(forwarder: Optional[TelegramChannelForwarder] = None):
+    """메인 함수 (app.py처럼 다른 스레드에서 실행할 때는 만들어 둔 forwarder를 넘겨 종료 요청을 전달받음)"""
     # KeepAlive 서버 시작 (Replit용)
     run_keepalive_server()
     
-    forwarder = TelegramChannelForwarder()
+    if forwarder is None:
+        forwarder = TelegramChannelForwarder()
     
     try:
         asyncio.run(forwarder.start())
@@ -1469,6 +1628,9 @@ def main():
         logger.info("봇이 종료되었습니다.")
     except Exception as e:
         logger.error(f"봇 실행 중 오류 발생: {e}", exc_info=True)
+    finally:
+        # 큐에 남은 로그를 모두 기록
+        stop_logging()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,109 @@
+"""
+그룹별 봇 상태/권한 캐시
+전송할 때마다 get_chat_member, get_chat을 호출하지 않도록
+봇의 멤버 상태, 고정 권한, 슬로우 모드 간격을 TTL 동안 보관합니다.
+my_chat_member 업데이트와 실제 전송 에러로 캐시를 최신 상태로 유지합니다.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# 봇이 그룹에 없는 상태
+REMOVED_STATUSES = ('left', 'kicked')
+
+
+@dataclass
+class ChatCapability:
+    """그룹 하나에 대한 봇의 상태와 권한"""
+    status: Optional[str] = None  # creator/administrator/member/restricted/left/kicked (모르면 None)
+    can_pin: Optional[bool] = None  # 고정 권한 (모르면 None → 시도 후 결과로 판단)
+    slow_mode_delay: int = 0  # 슬로우 모드 간격 (초)
+    title: Optional[str] = None
+    updated_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_removed(self) -> bool:
+        return self.status in REMOVED_STATUSES
+
+
+class ChatCapabilityCache:
+    """채팅 ID별 ChatCapability를 TTL 동안 보관하는 캐시"""
+
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+        self._entries: Dict[str, ChatCapability] = {}
+
+    def get(self, chat_id: Union[int, str]) -> Optional[ChatCapability]:
+        """유효한 캐시 항목 반환 (없거나 만료되었으면 None)"""
+        entry = self._entries.get(str(chat_id))
+        if entry is None:
+            return None
+        if time.monotonic() - entry.updated_at > self.ttl:
+            return None
+        return entry
+
+    def _entry(self, chat_id: Union[int, str]) -> ChatCapability:
+        key = str(chat_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = ChatCapability()
+            self._entries[key] = entry
+        entry.updated_at = time.monotonic()
+        return entry
+
+    def update_member(self, chat_id: Union[int, str], member, chat=None) -> ChatCapability:
+        """ChatMember(봇 자신)와 Chat 정보로 캐시 갱신"""
+        entry = self._entry(chat_id)
+        entry.status = member.status
+        if member.status == 'creator':
+            entry.can_pin = True
+        elif member.status == 'administrator':
+            entry.can_pin = bool(getattr(member, 'can_pin_messages', False))
+        elif member.status in REMOVED_STATUSES:
+            entry.can_pin = False
+        elif member.status == 'restricted':
+            entry.can_pin = bool(getattr(member, 'can_pin_messages', False))
+        else:
+            # 일반 멤버는 그룹 기본 권한에 따름 (모르면 시도해봄)
+            permissions = getattr(chat, 'permissions', None) if chat is not None else None
+            entry.can_pin = permissions.can_pin_messages if permissions is not None else None
+        if chat is not None:
+            entry.title = getattr(chat, 'title', None)
+            # slow_mode_delay는 get_chat 결과(ChatFullInfo)에만 있음
+            if hasattr(chat, 'slow_mode_delay'):
+                entry.slow_mode_delay = chat.slow_mode_delay or 0
+        return entry
+
+    def mark_removed(self, chat_id: Union[int, str], status: str = 'left'):
+        """전송 에러 등으로 봇이 그룹에서 제거된 것을 확인했을 때"""
+        entry = self._entry(chat_id)
+        entry.status = status
+        entry.can_pin = False
+
+    def mark_sent(self, chat_id: Union[int, str]):
+        """전송 성공 - 봇이 그룹에 있다는 것이 확인됨"""
+        key = str(chat_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry.is_removed:
+            entry.status = None
+
+    def mark_pin_denied(self, chat_id: Union[int, str]):
+        """고정 권한이 없다는 에러를 받았을 때 (다음부터 고정 시도 안 함)"""
+        self._entry(chat_id).can_pin = False
+
+    def invalidate(self, chat_id: Union[int, str]):
+        self._entries.pop(str(chat_id), None)
+
+    async def refresh(self, bot, chat_id: Union[int, str]) -> ChatCapability:
+        """get_chat_member + get_chat으로 캐시를 다시 채움 (TTL당 한 번)"""
+        member = await bot.get_chat_member(chat_id=chat_id, user_id=bot.id)
+        chat = None
+        if member.status not in REMOVED_STATUSES:
+            try:
+                chat = await bot.get_chat(chat_id=chat_id)
+            except Exception as e:
+                logger.debug(f"그룹 정보 조회 실패 (그룹: {chat_id}): {e}")
+        return self.update_member(chat_id, member, chat)
@@ -28,3 +28,108 @@ SEND_INTERVAL_MINUTES = float(os.environ.get("SEND_INTERVAL_MINUTES", "1.0"))
 # 그룹 등록 비밀번호 (환경변수 우선, 없으면 기본값)
 REGISTER_PASSWORD = os.environ.get("REGISTER_PASSWORD", "asd0203")
 
+
+# 그룹 동시 전송 수 (한 메시지를 여러 그룹에 동시에 전송할 최대 개수, 기본값: 20)
+FANOUT_CONCURRENCY = int(os.environ.get("FANOUT_CONCURRENCY", "20"))
+
+# 텔레그램 전송 속도 제한 (전체 초당 요청 수, 그룹별 분당 메시지 수, 개인 채팅 초당 메시지 수)
+GLOBAL_RATE_LIMIT_PER_SECOND = float(os.environ.get("GLOBAL_RATE_LIMIT_PER_SECOND", "30"))
+GROUP_RATE_LIMIT_PER_MINUTE = float(os.environ.get("GROUP_RATE_LIMIT_PER_MINUTE", "20"))
+PRIVATE_RATE_LIMIT_PER_SECOND = float(os.environ.get("PRIVATE_RATE_LIMIT_PER_SECOND", "1"))
+
+# 그룹별로 연속 전송 가능한 최대 메시지 수 (버킷 크기)
+GROUP_RATE_LIMIT_BURST = float(os.environ.get("GROUP_RATE_LIMIT_BURST", "5"))
+
+# 그룹별 봇 상태/권한 캐시 유지 시간 (초, 기본값: 1시간)
+CHAT_CACHE_TTL_SECONDS = float(os.environ.get("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+# 사이클 배치 전송 크기 (1이면 메시지를 하나씩 전송, 2~100이면 이웃한 메시지를 묶어 그룹당 1번에 전송)
+ROTATION_BATCH_SIZE = int(os.environ.get("ROTATION_BATCH_SIZE", "1"))
+
+# 사이클 전송이 늦어져 예정 시각을 놓쳤을 때의 처리 방식
+# skip: 건너뛰고 다음 예정 시각에 전송, coalesce: 한 번만 즉시 전송 후 원래 주기로 복귀, burst: 놓친 만큼 연달아 전송
+ROTATION_CATCHUP_POLICY = os.environ.get("ROTATION_CATCHUP_POLICY", "coalesce").strip().lower()
+
+# 봇 상태 DB 파일 경로 (SQLite, 상대 경로면 bot.py 폴더 기준)
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "bot_state.db")
+
+# 전송 대기열 (실패한 새 메시지 전송 재시도) - 워커 수, 최대 시도 횟수, 임대 시간(초)
+OUTBOX_WORKERS = int(os.environ.get("OUTBOX_WORKERS", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_LEASE_SECONDS = float(os.environ.get("OUTBOX_LEASE_SECONDS", "300"))
+# 최대 시도 횟수를 넘겨 포기한 전송을 DB에 남겨 두는 시간 (시간, 지나면 워커가 지움)
+OUTBOX_DEAD_RETENTION_HOURS = float(os.environ.get("OUTBOX_DEAD_RETENTION_HOURS", "168"))
+
+# 상태 변경(그룹 등록/제거, 새 메시지, 설정)을 모아서 기록하는 시간 (초, 첫 변경 후 이 시간 안에 한 번에 기록)
+PERSIST_FLUSH_WINDOW_SECONDS = float(os.environ.get("PERSIST_FLUSH_WINDOW_SECONDS", "1.0"))
+
+# 업데이트 수신 방식 (polling: getUpdates, webhook: keepalive 웹서버로 텔레그램이 직접 전송)
+UPDATE_MODE = os.environ.get("UPDATE_MODE", "polling").strip().lower()
+
+# webhook 모드 설정 - 외부에서 접속 가능한 주소 (예: https://내서비스.onrender.com), 경로, 비밀 토큰
+# WEBHOOK_URL이 비어 있으면 텔레그램에 등록하지 않고 수신만 함 (로컬 시험용)
+# WEBHOOK_SECRET이 비어 있으면 WEBHOOK_URL이 있을 때는 시작할 때마다 새로 만들어 등록하고,
+# WEBHOOK_URL도 없으면 비밀 토큰을 확인하지 않음 (로컬 시험 전용, A-Z, a-z, 0-9, _, - 만 사용 가능)
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+
+# 단일 실행 인스턴스 선출 (리더 임대) - 임대 유지 시간과 연장/재시도 간격 (초)
+# 배포 시 새 인스턴스는 이전 인스턴스가 임대를 놓은 뒤 약 LEADER_HEARTBEAT_SECONDS 안에 넘겨받음
+LEADER_LEASE_TTL_SECONDS = float(os.environ.get("LEADER_LEASE_TTL_SECONDS", "30"))
+LEADER_HEARTBEAT_SECONDS = float(os.environ.get("LEADER_HEARTBEAT_SECONDS", "5"))
+
+# 리더 임대는 상태 DB 파일에 있으므로 이전/새 인스턴스가 같은 파일을 볼 때만 배포 간에 조정됨
+# STATE_DB_PATH가 두 인스턴스가 함께 쓰는 영구 디스크에 있을 때만 true로 설정 (Render 등에서 디스크 없이 실행하면 false)
+# false이면 임대를 믿지 않고 polling 시작 전에 LEADER_STARTUP_WAIT_SECONDS만큼 이전 인스턴스 종료를 기다림
+LEADER_LEASE_SHARED = os.environ.get("LEADER_LEASE_SHARED", "false").strip().lower() in ("1", "true", "yes")
+LEADER_STARTUP_WAIT_SECONDS = float(os.environ.get("LEADER_STARTUP_WAIT_SECONDS", "20"))
+
+# polling 시작 중 Conflict(다른 인스턴스가 아직 getUpdates 사용 중)이면 재시도 - 최대 횟수와 대기 시간 (초)
+# 대기 시간은 시도마다 POLLING_CONFLICT_DELAY_SECONDS씩 늘어남 (기본값: 10, 20, 30, 40초)
+POLLING_CONFLICT_RETRIES = int(os.environ.get("POLLING_CONFLICT_RETRIES", "5"))
+POLLING_CONFLICT_DELAY_SECONDS = float(os.environ.get("POLLING_CONFLICT_DELAY_SECONDS", "10"))
+
+# 종료 신호(SIGTERM)를 받은 뒤 진행 중인 전송을 마무리하고 종료하기까지 최대 시간 (초, Render는 30초 후 강제 종료)
+SHUTDOWN_TIMEOUT_SECONDS = float(os.environ.get("SHUTDOWN_TIMEOUT_SECONDS", "20"))
+
+# /월하 비밀번호 입력 대기 유지 시간 (초, 입력하지 않으면 자동으로 취소됨)
+PENDING_REGISTRATION_TTL_SECONDS = float(os.environ.get("PENDING_REGISTRATION_TTL_SECONDS", "600"))
+
+# 메모리에 보관하는 메시지 전송 기록의 최대 개수 (재전송 간격이 지난 기록은 자동으로 사라짐)
+SENT_MESSAGES_MAX_ENTRIES = int(os.environ.get("SENT_MESSAGES_MAX_ENTRIES", "100000"))
+
+# 그룹별 회로 차단기 - 연속 실패가 이 횟수가 되면 일정 시간 그 그룹의 전송을 건너뜀
+# 처음 건너뛰는 시간(초)은 CIRCUIT_BASE_DELAY_SECONDS이고, 다시 실패할 때마다 두 배 (최대 CIRCUIT_MAX_DELAY_SECONDS)
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_BASE_DELAY_SECONDS = float(os.environ.get("CIRCUIT_BASE_DELAY_SECONDS", "60"))
+CIRCUIT_MAX_DELAY_SECONDS = float(os.environ.get("CIRCUIT_MAX_DELAY_SECONDS", "3600"))
+
+# 이벤트 루프 지연 측정 간격 (초) - /metrics의 forwarder_event_loop_lag_seconds
+LOOP_LAG_SAMPLE_SECONDS = float(os.environ.get("LOOP_LAG_SAMPLE_SECONDS", "1"))
+
+# 상태 확인 (keepalive 서버의 /health/live, /health/ready)
+# 이벤트 루프 하트비트가 HEALTH_LIVENESS_TIMEOUT_SECONDS 동안 없으면 liveness 실패 (플랫폼이 재시작)
+# 이벤트 루프 지연이 HEALTH_MAX_LOOP_LAG_SECONDS보다 크거나, polling 모드에서 getUpdates가
+# HEALTH_UPDATES_STALL_SECONDS 동안 성공하지 못하면 readiness 실패
+# 봇이 상태 기록을 시작하기 전에는 HEALTH_STARTUP_GRACE_SECONDS 동안만 liveness 성공으로 응답
+HEALTH_LIVENESS_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_LIVENESS_TIMEOUT_SECONDS", "30"))
+HEALTH_MAX_LOOP_LAG_SECONDS = float(os.environ.get("HEALTH_MAX_LOOP_LAG_SECONDS", "5"))
+HEALTH_UPDATES_STALL_SECONDS = float(os.environ.get("HEALTH_UPDATES_STALL_SECONDS", "120"))
+HEALTH_STARTUP_GRACE_SECONDS = float(os.environ.get("HEALTH_STARTUP_GRACE_SECONDS", "180"))
+
+# 로그 설정 - 로그 파일, 기본(lifecycle) 레벨과 전송 경로(send: 메시지/그룹마다 남는 로그) 레벨
+# LOG_SEND_LEVEL=WARNING이면 전송마다 남는 INFO 로그를 만들지도 않음
+LOG_FILE = os.environ.get("LOG_FILE", "bot.log")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_SEND_LEVEL = os.environ.get("LOG_SEND_LEVEL", "INFO")
+
+# bot.log 회전 - LOG_ROTATE_WHEN이 비어 있으면 LOG_MAX_BYTES 크기 기준, 'midnight' 등이면 시간 기준
+# 지난 파일은 LOG_BACKUP_COUNT개까지 보관하고 LOG_COMPRESS=true면 gzip으로 압축
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", "5"))
+LOG_ROTATE_WHEN = os.environ.get("LOG_ROTATE_WHEN", "").strip()
+LOG_COMPRESS = os.environ.get("LOG_COMPRESS", "true").strip().lower() in ("1", "true", "yes")
+
+# 전송 경로의 같은 문구 INFO 로그를 1분에 남길 최대 개수 (0이면 모두 남김, 생략한 수는 다음 로그에 표시)
+LOG_SAMPLE_PER_MINUTE = int(os.environ.get("LOG_SAMPLE_PER_MINUTE", "60"))
@@ -0,0 +1,131 @@
+"""
+만료 시간이 있는 딕셔너리
+전송 기록(sent_messages)이나 비밀번호 입력 대기(pending_registrations)처럼
+일정 시간이 지나면 의미가 없어지는 항목을 보관합니다.
+항목은 넣은 뒤 ttl초(time.monotonic 기준)가 지나면 사라지고, 최대 개수를 넘으면 가장 오래된 항목부터 버립니다.
+
+만료된 항목은 조회할 때(lazy), 쓸 때마다 앞쪽 몇 개씩, 그리고 purge()를 주기적으로 호출할 때 정리되므로
+몇 달 동안 실행해도 메모리가 늘어나지 않습니다.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+# 쓸 때마다 앞쪽에서 확인하는 만료 항목 수 (정리 비용을 쓰기 횟수에 나눠서 부담)
+SWEEP_PER_WRITE = 4
+
+
+class ExpiringDict:
+    """TTL과 최대 크기가 있는 딕셔너리 (dict와 같은 방식으로 사용)
+
+    Args:
+        ttl: 항목 유지 시간 (초, 바꾸면 이후에 넣는 항목부터 적용)
+        max_entries: 최대 항목 수 (넘으면 가장 오래 전에 넣은 항목부터 버림)
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 키 → (값, 만료 시각), 넣은/갱신한 순서대로 정렬
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0  # 만료되어 사라진 항목 수
+        self.evicted = 0  # 최대 크기를 넘어 버린 항목 수
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """항목 저장 (ttl을 주면 이 항목만 다른 유지 시간 사용)"""
+        now = time.monotonic()
+        self._entries[key] = (value, now + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        self._sweep(now, SWEEP_PER_WRITE)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        del self._entries[key]
+        return value
+
+    def remaining(self, key: Hashable) -> float:
+        """항목이 만료되기까지 남은 시간 (초, 없으면 0)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry[1] - time.monotonic())
+
+    def purge(self) -> int:
+        """만료된 항목을 모두 정리하고 정리한 수 반환 (주기적으로 호출)"""
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self.expired += len(expired)
+        return len(expired)
+
+    def _sweep(self, now: float, limit: int):
+        """앞쪽(오래된) 항목 중 만료된 것을 최대 limit개 정리"""
+        for _ in range(limit):
+            if not self._entries:
+                return
+            key, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                return
+            del self._entries[key]
+            self.expired += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
+
+    # --- dict 호환 ---
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: Hashable):
+        del self._entries[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def __len__(self) -> int:
+        """만료되지 않은 항목 수 (purge 후 개수)"""
+        self.purge()
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        now = time.monotonic()
+        return iter([key for key, (_, expires_at) in self._entries.items() if expires_at > now])
+
+
+_MISSING = object()
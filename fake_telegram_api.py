@@ -0,0 +1,311 @@
+"""
+로컬 가짜 텔레그램 Bot API 서버 (성능 측정/시험용)
+api.telegram.org 대신 이 서버에 요청을 보내면 실제 그룹에 보내지 않고 봇을 실행해 볼 수 있습니다.
+bot.py가 쓰는 엔드포인트만 구현합니다:
+    getMe, getUpdates, getWebhookInfo, deleteWebhook, setWebhook, forwardMessage, forwardMessages,
+    sendMessage, getChatMember, getChat, pinChatMessage
+
+- 응답마다 지연 시간(latency ± jitter)을 줄 수 있습니다.
+- 전체/채팅별 초당 요청 수를 넘으면 실제 API처럼 429(retry_after)로 응답합니다.
+- /fake/post로 채널 포스트를 넣으면 getUpdates로 받아 갈 수 있고, /fake/stats로 호출 수를 봅니다.
+
+사용법:
+    python fake_telegram_api.py --port 8081 --latency 0.05 --chat-rate 1
+    (봇 쪽은 Application.builder().base_url("http://127.0.0.1:8081/bot")로 연결)
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from flask import Flask, request
+
+BOT_USER = {'id': 1000001, 'is_bot': True, 'first_name': 'FakeForwarder', 'username': 'fake_forwarder_bot'}
+
+# 그룹으로 메시지가 생기는 요청 (채팅별 속도 제한 적용)
+CHAT_LIMITED_METHODS = {'forwardMessage', 'forwardMessages', 'sendMessage', 'pinChatMessage'}
+
+
+class _Bucket:
+    """초당 rate개, 최대 capacity개까지 모아 두는 토큰 버킷 (스레드 안전하지 않음 - 서버 잠금 안에서 사용)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """토큰 1개 사용 (없으면 사용하지 않고 기다려야 하는 시간 반환, 있으면 0)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FakeTelegramAPI:
+    """가짜 Bot API 상태 (채팅별 메시지 ID, 대기 중인 업데이트, 호출 통계)
+
+    Args:
+        latency: 응답 지연 (초)
+        jitter: 응답 지연을 흔드는 범위 (초, latency ± jitter)
+        global_rate: 전체 초당 요청 수 제한 (0이면 제한 없음)
+        chat_rate: 채팅별 초당 전송 수 제한 (0이면 제한 없음)
+        chat_burst: 채팅별로 연달아 보낼 수 있는 수
+        can_pin: getChatMember에서 봇에 고정 권한을 줄지
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, global_rate: float = 0, chat_rate: float = 0,
+                 chat_burst: float = 5, can_pin: bool = True):
+        self.latency = latency
+        self.jitter = jitter
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.can_pin = can_pin
+        self.removed_chats: Set[str] = set()  # 봇이 제거된 그룹 (전송하면 403)
+        self.deleted_messages: Set[int] = set()  # 채널에서 삭제된 메시지 (전달하면 400)
+        self._lock = threading.Lock()
+        self._updates_ready = threading.Condition(self._lock)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls: Counter = Counter()  # 메서드별 호출 수 (429 포함)
+            self.rate_limited: Counter = Counter()  # 메서드별 429 응답 수
+            self.delivered = 0  # 그룹에 전달된 메시지 수 (forwardMessage 1 + forwardMessages 개수)
+            self._next_message_id: Dict[str, int] = {}
+            self._updates: List[dict] = []
+            self._next_update_id = 1
+            self._global_bucket = _Bucket(self.global_rate, self.global_rate) if self.global_rate else None
+            self._chat_buckets: Dict[str, _Bucket] = {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.calls.values())
+            return {
+                'calls': dict(self.calls),
+                'total_calls': total,
+                'rate_limited': dict(self.rate_limited),
+                'delivered': self.delivered,
+                'calls_per_delivered': round(total / self.delivered, 3) if self.delivered else None,
+            }
+
+    # --- 채널 포스트 넣기 (getUpdates로 전달) ---
+
+    def post_channel_message(self, channel_id: int, message_id: int, text: str = 'benchmark') -> dict:
+        with self._updates_ready:
+            update = {
+                'update_id': self._next_update_id,
+                'channel_post': {
+                    'message_id': message_id,
+                    'date': int(time.time()),
+                    'chat': {'id': channel_id, 'type': 'channel', 'title': 'Fake Channel'},
+                    'text': text,
+                },
+            }
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._updates_ready.notify_all()
+            return update
+
+    # --- 요청 처리 ---
+
+    def _throttle(self, method: str, chat_id: Optional[str]) -> float:
+        """속도 제한에 걸리면 retry_after(초), 아니면 0"""
+        with self._lock:
+            self.calls[method] += 1
+            wait = self._global_bucket.take() if self._global_bucket is not None else 0.0
+            if not wait and self.chat_rate and chat_id is not None and method in CHAT_LIMITED_METHODS:
+                bucket = self._chat_buckets.get(chat_id)
+                if bucket is None:
+                    bucket = self._chat_buckets[chat_id] = _Bucket(self.chat_rate, self.chat_burst)
+                wait = bucket.take()
+            if wait:
+                self.rate_limited[method] += 1
+            return wait
+
+    def _message(self, chat_id: str, **fields) -> dict:
+        with self._lock:
+            message_id = self._next_message_id.get(chat_id, 0) + 1
+            self._next_message_id[chat_id] = message_id
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(chat_id), 'type': 'supergroup', 'title': f'Fake Group {chat_id}'},
+            **fields,
+        }
+
+    def handle(self, method: str, params: dict):
+        """(HTTP 상태 코드, 응답 JSON) 반환"""
+        chat_id = str(params['chat_id']) if params.get('chat_id') is not None else None
+        wait = self._throttle(method, chat_id)
+        if wait:
+            retry_after = max(1, math.ceil(wait))
+            return 429, {'ok': False, 'error_code': 429, 'description': f'Too Many Requests: retry after {retry_after}',
+                         'parameters': {'retry_after': retry_after}}
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if chat_id is not None and chat_id in self.removed_chats and method != 'getChatMember':
+            return 403, {'ok': False, 'error_code': 403, 'description': 'Forbidden: bot was kicked from the supergroup chat'}
+
+        handler = getattr(self, f'_api_{method}', None)
+        if handler is None:
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        return handler(params, chat_id)
+
+    def _api_getMe(self, params, chat_id):
+        return 200, {'ok': True, 'result': BOT_USER}
+
+    def _api_getUpdates(self, params, chat_id):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = min(float(params.get('timeout') or 0), 5.0)  # 종료가 오래 걸리지 않도록 최대 5초만 기다림
+        deadline = time.monotonic() + timeout
+        with self._updates_ready:
+            # offset보다 작은 업데이트는 확인된 것으로 보고 버림
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            while not self._updates and time.monotonic() < deadline:
+                self._updates_ready.wait(deadline - time.monotonic())
+            return 200, {'ok': True, 'result': self._updates[:limit]}
+
+    def _api_getWebhookInfo(self, params, chat_id):
+        return 200, {'ok': True, 'result': {'url': '', 'has_custom_certificate': False, 'pending_update_count': 0}}
+
+    def _api_deleteWebhook(self, params, chat_id):
+        return 200, {'ok': True, 'result': True}
+
+    def _api_setWebhook(self, params, chat_id):
+        return 200, {'ok': True, 'result': True}
+
+    def _api_forwardMessage(self, params, chat_id):
+        message_id = int(params['message_id'])
+        if message_id in self.deleted_messages:
+            return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message to forward not found'}
+        with self._lock:
+            self.delivered += 1
+        return 200, {'ok': True, 'result': self._message(chat_id, text='forwarded')}
+
+    def _api_forwardMessages(self, params, chat_id):
+        message_ids = [message_id for message_id in params['message_ids'] if message_id not in self.deleted_messages]
+        if not message_ids:
+            return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: messages to forward not found'}
+        with self._lock:
+            self.delivered += len(message_ids)
+        return 200, {'ok': True, 'result': [{'message_id': self._message(chat_id)['message_id']} for _ in message_ids]}
+
+    def _api_sendMessage(self, params, chat_id):
+        return 200, {'ok': True, 'result': self._message(chat_id, text=params.get('text', ''))}
+
+    def _api_pinChatMessage(self, params, chat_id):
+        return 200, {'ok': True, 'result': True}
+
+    def _api_getChatMember(self, params, chat_id):
+        if chat_id in self.removed_chats:
+            return 200, {'ok': True, 'result': {'status': 'kicked', 'user': BOT_USER, 'until_date': 0}}
+        rights = dict.fromkeys((
+            'can_be_edited', 'is_anonymous', 'can_manage_chat', 'can_delete_messages', 'can_manage_video_chats',
+            'can_restrict_members', 'can_promote_members', 'can_change_info', 'can_invite_users',
+            'can_post_stories', 'can_edit_stories', 'can_delete_stories',
+        ), False)
+        return 200, {'ok': True, 'result': {'status': 'administrator', 'user': BOT_USER, **rights, 'can_pin_messages': self.can_pin}}
+
+    def _api_getChat(self, params, chat_id):
+        return 200, {'ok': True, 'result': {
+            'id': int(chat_id), 'type': 'supergroup', 'title': f'Fake Group {chat_id}',
+            'accent_color_id': 0, 'max_reaction_count': 11,
+        }}
+
+
+def _request_params() -> dict:
+    """python-telegram-bot은 값을 JSON으로 인코딩한 form으로 보냄 (JSON 본문도 허용)"""
+    if request.is_json:
+        return request.get_json(silent=True) or {}
+    params = {}
+    for key, value in request.values.items():
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def create_app(api: FakeTelegramAPI) -> Flask:
+    """가짜 Bot API Flask 앱 (/bot<토큰>/<메서드>, /fake/*)"""
+    app = Flask(__name__)
+
+    @app.route('/bot<token>/<method>', methods=['GET', 'POST'])
+    def bot_api(token, method):
+        status, body = api.handle(method, _request_params())
+        return body, status
+
+    @app.route('/fake/post', methods=['POST'])
+    def fake_post():
+        data = request.get_json(silent=True) or {}
+        return {'ok': True, 'result': api.post_channel_message(int(data['channel_id']), int(data['message_id']), data.get('text', 'benchmark'))}
+
+    @app.route('/fake/stats')
+    def fake_stats():
+        return api.stats()
+
+    @app.route('/fake/reset', methods=['POST'])
+    def fake_reset():
+        api.reset()
+        return {'ok': True}
+
+    return app
+
+
+class FakeTelegramServer:
+    """가짜 Bot API 서버를 백그라운드 스레드에서 실행 (port=0이면 빈 포트 사용)"""
+
+    def __init__(self, api: FakeTelegramAPI, host: str = '127.0.0.1', port: int = 0):
+        from werkzeug.serving import make_server
+        # 요청마다 남는 접근 로그는 끔 (벤치마크 결과에 영향)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.api = api
+        self.server = make_server(host, port, create_app(api), threaded=True)
+        self.host = host
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-telegram-api', daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """Application.builder().base_url(...)에 넣을 주소"""
+        return f'http://{self.host}:{self.port}/bot'
+
+    def start(self) -> 'FakeTelegramServer':
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 가짜 텔레그램 Bot API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='응답 지연 (초)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='응답 지연 흔들기 범위 (초)')
+    parser.add_argument('--global-rate', type=float, default=0, help='전체 초당 요청 수 제한 (0이면 없음)')
+    parser.add_argument('--chat-rate', type=float, default=0, help='채팅별 초당 전송 수 제한 (0이면 없음)')
+    parser.add_argument('--chat-burst', type=float, default=5, help='채팅별 연달아 보낼 수 있는 수')
+    args = parser.parse_args()
+
+    api = FakeTelegramAPI(args.latency, args.jitter, args.global_rate, args.chat_rate, args.chat_burst)
+    print(f"가짜 Bot API 서버 시작: http://{args.host}:{args.port}/bot<토큰>/<메서드> (통계: /fake/stats)")
+    create_app(api).run(host=args.host, port=args.port, threaded=True, debug=False, use_reloader=False)
+
+
+if __name__ == '__main__':
+    main()
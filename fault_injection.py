@@ -0,0 +1,379 @@
+"""
+장애 주입 계층 (복원력 측정용)
+봇의 HTTP 전송 계층(HTTPXRequest) 앞에서 정해진 규칙대로 텔레그램 오류를 흉내 냅니다.
+레이트 리미터, retry_policy, 회로 차단기, 전송 대기열은 실제 운영과 똑같이 이 오류를 받으므로
+재시도/백오프 설정을 바꿨을 때 전달 완료율, 낭비된 API 호출, 복구 시간이 어떻게 달라지는지 숫자로 비교할 수 있습니다.
+
+장애 종류 (kind):
+    retry_after      - 429 Too Many Requests (retry_after초)
+    timeout          - delay초 동안 응답이 없다가 TimedOut (after_send면 요청은 전달되고 응답만 사라짐 → 중복 전송)
+    network_error    - 연결 실패 (NetworkError)
+    server_error     - 502 Bad Gateway
+    conflict         - 409 Conflict (다른 인스턴스가 getUpdates 사용 중)
+    kicked           - 그룹에서 봇이 제거됨 (한 번 발생하면 그 그룹의 이후 요청은 모두 403)
+    message_deleted  - 채널에서 원본 메시지가 삭제됨 (한 번 발생하면 그 메시지의 이후 전달은 모두 400)
+
+규칙은 시나리오 파일(scenarios/*.json)의 "faults"에 적고 benchmark.py --scenario로 실행합니다.
+    {"kind": "retry_after", "methods": ["forwardMessage"], "start": 0, "end": 3, "probability": 0.3, "retry_after": 2}
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from telegram.error import NetworkError, TimedOut
+from telegram.request import RequestData
+from telegram.request._requestparameter import RequestParameter
+
+from observed_request import ObservedRequest, RequestObserver
+
+# 장애 종류
+RETRY_AFTER = 'retry_after'
+TIMEOUT = 'timeout'
+NETWORK_ERROR = 'network_error'
+SERVER_ERROR = 'server_error'
+CONFLICT = 'conflict'
+KICKED = 'kicked'
+MESSAGE_DELETED = 'message_deleted'
+
+FAULT_KINDS = (RETRY_AFTER, TIMEOUT, NETWORK_ERROR, SERVER_ERROR, CONFLICT, KICKED, MESSAGE_DELETED)
+
+# 한 번 발생하면 계속 유지되는 장애 (복구되지 않으므로 복구 시간 계산에서 제외)
+STICKY_KINDS = frozenset({KICKED, MESSAGE_DELETED})
+
+# 그룹에 메시지를 전달하는 요청 (전달 수/중복 계산)
+FORWARD_METHODS = frozenset({'forwardMessage', 'forwardMessages'})
+
+# methods를 비워 두었을 때 장애를 적용할 요청
+DEFAULT_METHODS: Dict[str, FrozenSet[str]] = {
+    CONFLICT: frozenset({'getUpdates'}),
+    MESSAGE_DELETED: FORWARD_METHODS,
+}
+
+# 실제 응답이 이 상태 코드면 다시 보내도 결과가 같으므로 복구 시간 계산에서 제외
+PERMANENT_STATUS = frozenset({400, 403, 404})
+
+
+@dataclass(frozen=True)
+class FaultRule:
+    """장애 규칙 하나
+
+    Args:
+        kind: 장애 종류 (FAULT_KINDS)
+        methods: 적용할 Bot API 메서드 (비우면 kind별 기본값, 기본값도 없으면 모든 요청)
+        chat_ids: 적용할 채팅 ID (비우면 모든 채팅)
+        message_ids: 적용할 원본 메시지 ID (비우면 모든 메시지, message_deleted는 꼭 지정)
+        probability: 조건에 맞는 요청마다 장애를 일으킬 확률
+        start: 측정 시작 후 이 시간(초)부터 적용
+        end: 측정 시작 후 이 시간(초)까지 적용 (None이면 끝까지)
+        skip: 조건에 맞는 요청을 처음 몇 개는 그대로 통과 (예: 전송 도중에 그룹에서 제거)
+        limit: 최대 장애 횟수 (None이면 제한 없음)
+        retry_after: retry_after의 대기 시간 (초)
+        delay: timeout에서 TimedOut까지 기다리는 시간 (초)
+        after_send: timeout에서 요청은 실제로 보내고 응답만 잃어버림
+    """
+    kind: str
+    methods: FrozenSet[str] = frozenset()
+    chat_ids: FrozenSet[str] = frozenset()
+    message_ids: FrozenSet[int] = frozenset()
+    probability: float = 1.0
+    start: float = 0.0
+    end: Optional[float] = None
+    skip: int = 0
+    limit: Optional[int] = None
+    retry_after: int = 1
+    delay: float = 0.0
+    after_send: bool = False
+
+    def __post_init__(self):
+        if self.kind not in FAULT_KINDS:
+            raise ValueError(f"알 수 없는 장애 종류: {self.kind} (가능: {', '.join(FAULT_KINDS)})")
+        if self.kind == MESSAGE_DELETED and not self.message_ids:
+            raise ValueError("message_deleted 규칙에는 messages(삭제할 메시지 ID)가 필요합니다.")
+
+    @property
+    def target_methods(self) -> FrozenSet[str]:
+        return self.methods or DEFAULT_METHODS.get(self.kind, frozenset())
+
+    def applies_to(self, method: str, chat_id: Optional[str], message_ids: Sequence[int], elapsed: float) -> bool:
+        if self.target_methods and method not in self.target_methods:
+            return False
+        if self.kind == KICKED and chat_id is None:
+            return False
+        if self.chat_ids and chat_id not in self.chat_ids:
+            return False
+        if self.message_ids and not self.message_ids.intersection(message_ids):
+            return False
+        return elapsed >= self.start and (self.end is None or elapsed < self.end)
+
+
+def _request_target(params: dict) -> Tuple[Optional[str], List[int]]:
+    """요청 인자에서 (채팅 ID, 원본 메시지 ID 목록)"""
+    chat_id = str(params['chat_id']) if params.get('chat_id') is not None else None
+    if 'message_ids' in params:
+        message_ids = [int(message_id) for message_id in params['message_ids']]
+    elif params.get('message_id') is not None:
+        message_ids = [int(params['message_id'])]
+    else:
+        message_ids = []
+    return chat_id, message_ids
+
+
+class FaultInjector:
+    """규칙에 따라 장애를 결정하고 요청 결과를 집계 (전달 수, 낭비된 호출, 복구 시간)
+
+    이벤트 루프 하나에서만 쓰지만 report()는 다른 스레드에서도 읽을 수 있도록 잠금 안에서 기록합니다.
+
+    Args:
+        rules: 장애 규칙 목록
+        seed: 확률 판정용 난수 시드 (같은 시드면 같은 순서로 장애 발생)
+    """
+
+    def __init__(self, rules: Iterable[FaultRule] = (), seed: Optional[int] = None):
+        self.rules = list(rules)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.begin()
+
+    def begin(self):
+        """측정 시작 (규칙의 start/end 기준 시각, 집계 초기화)"""
+        with self._lock:
+            self.started_at = time.monotonic()
+            self.matched = [0] * len(self.rules)  # 규칙별 조건에 맞은 요청 수
+            self.fired = [0] * len(self.rules)  # 규칙별 장애 횟수
+            self.kicked_chats: Dict[str, float] = {}  # 제거된 그룹 → 측정 시작 후 시각
+            self.deleted_messages: Dict[int, float] = {}  # 삭제된 메시지 → 측정 시작 후 시각
+            self.requests: Counter = Counter()  # 메서드별 전송 계층까지 온 요청 수
+            self.failures: Counter = Counter()  # 실패 원인별 수 ('injected:<kind>' 또는 'http:<상태 코드>')
+            self.deliveries: Counter = Counter()  # (그룹, 메시지) → 전달 수
+            self.delivered_at: Dict[Tuple[str, int], float] = {}  # (그룹, 메시지) → 처음 전달된 시각
+            self._lost_responses: Set[Tuple[str, int]] = set()  # 전달됐지만 응답을 잃어버린 (그룹, 메시지)
+            self.redelivered = 0  # 응답을 잃어버린 뒤 같은 메시지를 같은 그룹에 다시 전달한 수 (중복 전송)
+            self.last_fault_at: Optional[float] = None
+            self._outages: Dict[str, float] = {}  # 실패가 이어지는 대상(채팅 또는 메서드) → 첫 실패 시각
+            self.recoveries: List[float] = []  # 실패 후 같은 대상의 첫 성공까지 걸린 시간 (초)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    # --- 전송 계층에서 호출 ---
+
+    def intercept(self, method: str, params: dict) -> Optional[FaultRule]:
+        """이번 요청에 일으킬 장애 규칙 (없으면 None)
+
+        kicked/message_deleted는 한 번 발생하면 기록해 두고 이후 요청에는 unavailable()로 적용합니다.
+        """
+        chat_id, message_ids = _request_target(params)
+        elapsed = self.elapsed()
+        with self._lock:
+            for index, rule in enumerate(self.rules):
+                if not rule.applies_to(method, chat_id, message_ids, elapsed):
+                    continue
+                self.matched[index] += 1
+                if self.matched[index] <= rule.skip:
+                    continue
+                if rule.limit is not None and self.fired[index] >= rule.limit:
+                    continue
+                if self._random.random() >= rule.probability:
+                    continue
+                self.fired[index] += 1
+                if rule.kind == KICKED:
+                    self.kicked_chats.setdefault(chat_id, elapsed)
+                elif rule.kind == MESSAGE_DELETED:
+                    for message_id in rule.message_ids.intersection(message_ids):
+                        self.deleted_messages.setdefault(message_id, elapsed)
+                return rule
+        return None
+
+    def unavailable(self, method: str, params: dict) -> Tuple[Optional[str], List[int]]:
+        """이미 발생한 kicked/message_deleted 중 이 요청에 해당하는 것 - (제거된 채팅 ID, 삭제된 메시지 ID 목록)"""
+        chat_id, message_ids = _request_target(params)
+        with self._lock:
+            kicked = chat_id if chat_id is not None and chat_id in self.kicked_chats else None
+            deleted = [message_id for message_id in message_ids if message_id in self.deleted_messages] if method in FORWARD_METHODS else []
+        return kicked, deleted
+
+    def record(self, method: str, params: dict, failure: Optional[str] = None, delivered: Sequence[int] = (), permanent: bool = False):
+        """전송 계층까지 온 요청 1개의 결과 기록
+
+        Args:
+            failure: 실패 원인 (성공이면 None)
+            delivered: 그룹에 실제로 전달된 메시지 ID (응답을 잃어버렸어도 전달됐으면 포함)
+            permanent: 다시 보내도 결과가 같은 실패 (복구 시간 계산에서 제외)
+        """
+        chat_id, _ = _request_target(params)
+        key = chat_id or method
+        now = time.monotonic()
+        with self._lock:
+            self.requests[method] += 1
+            if chat_id is not None:
+                for message_id in delivered:
+                    pair = (chat_id, message_id)
+                    self.deliveries[pair] += 1
+                    self.delivered_at.setdefault(pair, now - self.started_at)
+                    if pair in self._lost_responses:
+                        self._lost_responses.discard(pair)
+                        self.redelivered += 1
+                    if failure is not None:
+                        self._lost_responses.add(pair)
+            if failure is None:
+                outage_started = self._outages.pop(key, None)
+                if outage_started is not None:
+                    self.recoveries.append(now - outage_started)
+                return
+            self.failures[failure] += 1
+            if failure.startswith('injected:'):
+                self.last_fault_at = now - self.started_at
+            if not permanent:
+                self._outages.setdefault(key, now)
+
+    # --- 결과 ---
+
+    def blocked(self, chat_id: str, message_id: int) -> bool:
+        """kicked/message_deleted 때문에 전달할 수 없게 된 (그룹, 메시지)인지"""
+        return chat_id in self.kicked_chats or message_id in self.deleted_messages
+
+    def report(self) -> dict:
+        with self._lock:
+            recoveries = sorted(self.recoveries)
+            total = sum(self.requests.values())
+            failed = sum(self.failures.values())
+            return {
+                'requests': total,
+                'requests_by_method': dict(self.requests),
+                'failed_requests': failed,
+                'failures': dict(self.failures),
+                'injected': {f"{index}:{rule.kind}": count for index, (rule, count) in enumerate(zip(self.rules, self.fired)) if count},
+                'deliveries': sum(self.deliveries.values()),
+                'delivered_pairs': len(self.deliveries),
+                'redelivered': self.redelivered,
+                'kicked_chats': sorted(self.kicked_chats),
+                'deleted_messages': sorted(self.deleted_messages),
+                'last_fault_at': None if self.last_fault_at is None else round(self.last_fault_at, 3),
+                'recoveries': len(recoveries),
+                'recovery_p50_seconds': round(recoveries[len(recoveries) // 2], 3) if recoveries else None,
+                'recovery_max_seconds': round(recoveries[-1], 3) if recoveries else None,
+                'unrecovered': len(self._outages),
+            }
+
+
+def _error_response(status: int, description: str, retry_after: Optional[int] = None) -> Tuple[int, bytes]:
+    body = {'ok': False, 'error_code': status, 'description': description}
+    if retry_after is not None:
+        body['parameters'] = {'retry_after': retry_after}
+    return status, json.dumps(body).encode('utf-8')
+
+
+def _replace_parameter(request_data: RequestData, name: str, value) -> RequestData:
+    """요청 인자 하나를 바꾼 RequestData (forwardMessages에서 삭제된 메시지만 빼고 보낼 때)"""
+    parameters = [parameter for parameter in request_data._parameters if parameter.name != name]
+    parameters.append(RequestParameter.from_input(name, value))
+    return RequestData(parameters)
+
+
+class FaultInjectingRequest(ObservedRequest):
+    """FaultInjector의 규칙대로 장애를 일으키는 HTTPXRequest (주입한 장애도 observer에 실패로 기록됨)
+
+    장애 응답은 실제 텔레그램과 같은 형식(HTTP 상태 코드 + JSON)으로 돌려주므로
+    python-telegram-bot이 RetryAfter/Forbidden/BadRequest/Conflict 등 실제와 같은 예외를 만듭니다.
+
+        Application.builder().request(FaultInjectingRequest(injector)).get_updates_request(FaultInjectingRequest(injector))
+    """
+
+    def __init__(self, injector: FaultInjector, observer: Optional[RequestObserver] = None, **kwargs):
+        super().__init__(observer, **kwargs)
+        self.injector = injector
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None, **timeouts) -> Tuple[int, bytes]:
+        endpoint = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        # 이미 제거된 그룹으로 가는 요청에는 새 장애를 일으키지 않음
+        rule = None
+        if self.injector.unavailable(endpoint, params)[0] is None:
+            rule = self.injector.intercept(endpoint, params)
+        kicked, deleted = self.injector.unavailable(endpoint, params)
+
+        if kicked is not None:
+            self.injector.record(endpoint, params, f'injected:{KICKED}', permanent=True)
+            return _error_response(403, 'Forbidden: bot was kicked from the supergroup chat')
+        if deleted:
+            remaining = [message_id for message_id in params.get('message_ids', []) if message_id not in deleted]
+            if not remaining:
+                self.injector.record(endpoint, params, f'injected:{MESSAGE_DELETED}', permanent=True)
+                text = 'messages to forward not found' if endpoint == 'forwardMessages' else 'message to forward not found'
+                return _error_response(400, f'Bad Request: {text}')
+            # 배치 전달은 남은 메시지만 전달됨 (실제 API와 같음)
+            request_data = _replace_parameter(request_data, 'message_ids', remaining)
+            params = request_data.parameters
+            rule = None if rule is not None and rule.kind in STICKY_KINDS else rule
+
+        if rule is not None and rule.kind not in STICKY_KINDS:
+            failure = f'injected:{rule.kind}'
+            if rule.kind == RETRY_AFTER:
+                self.injector.record(endpoint, params, failure)
+                return _error_response(429, f'Too Many Requests: retry after {rule.retry_after}', rule.retry_after)
+            if rule.kind == SERVER_ERROR:
+                self.injector.record(endpoint, params, failure)
+                return _error_response(502, 'Bad Gateway')
+            if rule.kind == CONFLICT:
+                self.injector.record(endpoint, params, failure)
+                return _error_response(409, 'Conflict: terminated by other getUpdates request; make sure that only one bot instance is running')
+            if rule.kind == NETWORK_ERROR:
+                self.injector.record(endpoint, params, failure)
+                raise NetworkError('httpx.ConnectError: fault injected')
+            if rule.kind == TIMEOUT:
+                delivered: Sequence[int] = ()
+                if rule.after_send:
+                    status, payload = await super().do_request(url, method, request_data, **timeouts)
+                    delivered = self._delivered(endpoint, params, status)
+                await asyncio.sleep(rule.delay)
+                self.injector.record(endpoint, params, failure, delivered=delivered)
+                raise TimedOut('Timed out (fault injected)')
+
+        status, payload = await super().do_request(url, method, request_data, **timeouts)
+        if 200 <= status < 300:
+            self.injector.record(endpoint, params, delivered=self._delivered(endpoint, params, status))
+        else:
+            self.injector.record(endpoint, params, f'http:{status}', permanent=status in PERMANENT_STATUS)
+        return status, payload
+
+    @staticmethod
+    def _delivered(endpoint: str, params: dict, status: int) -> Sequence[int]:
+        if endpoint not in FORWARD_METHODS or not 200 <= status < 300:
+            return ()
+        return _request_target(params)[1]
+
+
+def build_rules(specs: Iterable[dict], group_ids: Sequence[str] = ()) -> List[FaultRule]:
+    """시나리오 파일의 "faults" 항목을 FaultRule로 변환
+
+    "groups"는 group_ids의 순번(0부터) 또는 그룹 ID 문자열, "messages"는 원본 메시지 ID입니다.
+    """
+    rules = []
+    for spec in specs:
+        spec = dict(spec)
+        groups = spec.pop('groups', ())
+        chat_ids = frozenset(group_ids[group] if isinstance(group, int) else str(group) for group in groups)
+        rules.append(FaultRule(
+            kind=spec.pop('kind'),
+            methods=frozenset(spec.pop('methods', ())),
+            chat_ids=chat_ids,
+            message_ids=frozenset(int(message_id) for message_id in spec.pop('messages', ())),
+            **spec,
+        ))
+    return rules
+
+
+def load_scenario(path) -> dict:
+    """시나리오 파일(JSON) 읽기 - 이름이 없으면 파일 이름 사용"""
+    path = Path(path)
+    with open(path, encoding='utf-8') as file:
+        scenario = json.load(file)
+    scenario.setdefault('name', path.stem)
+    scenario.setdefault('faults', [])
+    return scenario
@@ -4,6 +4,7 @@
 1. 이 스크립트를 실행
 2. 채널에 메시지를 하나 보냄
 3. 출력된 메시지 ID를 message_ids.txt에 복사
+   (봇은 상태 DB를 처음 만들 때만 message_ids.txt를 읽음, 이미 실행 중인 봇에는 채널에 새로 올리면 자동 추가)
 """
 import requests
 import json
@@ -38,7 +39,7 @@ if data.get("ok") and data.get("result"):
             print(msg_id)
         
         print("\n" + "=" * 60)
-        print("이 메시지 ID들을 message_ids.txt 파일에 복사하세요!")
+        print("이 메시지 ID들을 message_ids.txt 파일에 복사하세요! (봇의 상태 DB가 처음 만들어질 때만 읽습니다)")
         print("=" * 60)
     else:
         print("\n채널 메시지를 찾을 수 없습니다.")
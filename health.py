@@ -0,0 +1,134 @@
+"""
+봇 상태 확인 (liveness / readiness)
+봇(이벤트 루프)이 실제 상태를 기록하고, keepalive 웹서버가 다른 스레드에서 읽어 응답합니다.
+
+    liveness  - 이벤트 루프가 살아 있는지. 하트비트 코루틴이 일정 시간 안에 깨어나지 못하면
+                (루프가 막혔거나 봇 스레드가 죽은 경우) 실패 → 플랫폼이 프로세스를 재시작
+    readiness - 업데이트를 받고 전송할 수 있는 상태인지. 시작 완료, 사이클 전송 작업 실행 중,
+                최근 getUpdates 성공(polling 모드), 이벤트 루프 지연이 기준 이하일 때만 성공
+
+시각은 모두 time.monotonic() 기준이며, 값 하나씩만 대입하므로 스레드 간에 잠금 없이 읽습니다.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class HealthMonitor:
+    """봇 상태 기록과 liveness/readiness 판정
+
+    Args:
+        heartbeat_interval: 하트비트(이벤트 루프 지연 측정) 간격 (초)
+        liveness_timeout: 마지막 하트비트 후 이 시간이 지나면 liveness 실패 (초)
+        max_loop_lag: 이벤트 루프 지연이 이보다 크면 readiness 실패 (초)
+        updates_stall: 마지막 getUpdates 성공 후 이 시간이 지나면 readiness 실패 (초, None이면 확인 안 함 - webhook 모드)
+    """
+
+    def __init__(
+        self,
+        heartbeat_interval: float = 1.0,
+        liveness_timeout: float = 30.0,
+        max_loop_lag: float = 5.0,
+        updates_stall: Optional[float] = 120.0,
+    ):
+        self.heartbeat_interval = heartbeat_interval
+        self.liveness_timeout = liveness_timeout
+        self.max_loop_lag = max_loop_lag
+        self.updates_stall = updates_stall
+        self.created_at = time.monotonic()
+        self.is_fully_started = False
+        self.stopped = False  # 종료 절차 시작 (이후 liveness/readiness 모두 실패)
+        self.last_heartbeat_at: Optional[float] = None
+        self.loop_lag = 0.0  # 최근 측정한 이벤트 루프 지연 (초)
+        self.last_updates_at: Optional[float] = None  # 마지막 getUpdates 성공 (또는 webhook 업데이트 수신)
+        self.last_forward_at: Optional[float] = None  # 마지막 그룹 전송 성공
+        self.rotation_alive: Callable[[], bool] = lambda: False  # 사이클 전송 작업이 실행 중인지
+
+    # --- 봇(이벤트 루프)에서 기록 ---
+
+    def mark_started(self):
+        self.is_fully_started = True
+
+    def mark_stopped(self):
+        self.stopped = True
+
+    def record_updates(self):
+        self.last_updates_at = time.monotonic()
+
+    def record_forward(self):
+        self.last_forward_at = time.monotonic()
+
+    async def run_heartbeat(self, stop_event: asyncio.Event, on_lag: Optional[Callable[[float], None]] = None):
+        """heartbeat_interval마다 깨어나 하트비트 시각과 이벤트 루프 지연을 기록 (stop_event가 설정되면 종료)
+
+        지연이 크면 어떤 코루틴이 루프를 막고 있다는 뜻 (동기 I/O, 긴 계산 등)
+        """
+        loop = asyncio.get_running_loop()
+        self.last_heartbeat_at = time.monotonic()
+        while not stop_event.is_set():
+            expected = loop.time() + self.heartbeat_interval
+            try:
+                await asyncio.wait_for(stop_event.wait(), self.heartbeat_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            self.loop_lag = max(0.0, loop.time() - expected)
+            self.last_heartbeat_at = time.monotonic()
+            if on_lag is not None:
+                on_lag(self.loop_lag)
+
+    # --- keepalive 스레드에서 판정 ---
+
+    @staticmethod
+    def _age(at: Optional[float], now: float) -> Optional[float]:
+        return None if at is None else round(now - at, 3)
+
+    def liveness(self) -> Tuple[bool, Dict]:
+        """이벤트 루프가 살아 있는지 (하트비트가 liveness_timeout 안에 있었는지)"""
+        now = time.monotonic()
+        if self.stopped:
+            return False, {'reason': 'stopped'}
+        # 아직 하트비트를 시작하지 않았으면 시작 후 liveness_timeout까지는 기다림
+        last = self.last_heartbeat_at if self.last_heartbeat_at is not None else self.created_at
+        age = now - last
+        if age > self.liveness_timeout:
+            return False, {'reason': 'heartbeat stalled', 'heartbeat_age_seconds': round(age, 3)}
+        return True, {'heartbeat_age_seconds': round(age, 3)}
+
+    def readiness(self) -> Tuple[bool, Dict]:
+        """업데이트를 받고 전송할 수 있는 상태인지 (실패 이유 목록 포함)"""
+        now = time.monotonic()
+        live, _ = self.liveness()
+        reasons = []
+        if not live:
+            reasons.append('not live')
+        if not self.is_fully_started:
+            reasons.append('not started')
+        if self.is_fully_started and not self.rotation_alive():
+            reasons.append('rotation task not running')
+        if self.loop_lag > self.max_loop_lag:
+            reasons.append(f'event loop lag {self.loop_lag:.2f}s')
+        if self.updates_stall is not None and self.is_fully_started:
+            updates_age = self._age(self.last_updates_at or self.created_at, now)
+            if updates_age > self.updates_stall:
+                reasons.append(f'no successful getUpdates for {updates_age:.0f}s')
+        return not reasons, {'reasons': reasons}
+
+    def report(self) -> Dict:
+        """현재 상태 전체 (/health 응답용)"""
+        now = time.monotonic()
+        live, _ = self.liveness()
+        ready, detail = self.readiness()
+        return {
+            'live': live,
+            'ready': ready,
+            'reasons': detail['reasons'],
+            'is_fully_started': self.is_fully_started,
+            'stopped': self.stopped,
+            'rotation_alive': self.rotation_alive(),
+            'event_loop_lag_seconds': round(self.loop_lag, 4),
+            'heartbeat_age_seconds': self._age(self.last_heartbeat_at, now),
+            'seconds_since_updates': self._age(self.last_updates_at, now),
+            'seconds_since_forward': self._age(self.last_forward_at, now),
+            'uptime_seconds': round(now - self.created_at, 1),
+        }
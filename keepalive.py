@@ -1,12 +1,53 @@
 """
 KeepAlive 웹서버 - Replit이 잠들지 않도록 유지
 UptimeRobot이 5분마다 이 서버에 요청을 보내서 Replit을 깨워둡니다.
+webhook 모드(UPDATE_MODE=webhook)에서는 텔레그램 업데이트도 이 서버의 WEBHOOK_PATH로 받습니다.
 """
-from flask import Flask
+from flask import Flask, Response, request
+import hmac
 import threading
 import time
 
+from config import WEBHOOK_PATH, HEALTH_STARTUP_GRACE_SECONDS
+
 app = Flask(__name__)
+_started_at = time.monotonic()
+
+# webhook 모드에서 받은 업데이트를 넘길 함수와 비밀 토큰 (봇이 시작할 때 set_webhook_sink로 등록)
+_webhook_sink = None
+_webhook_secret = None
+
+def set_webhook_sink(sink, secret_token):
+    """텔레그램 webhook 업데이트(JSON dict)를 받을 함수 등록 (secret_token이 None이면 비밀 토큰을 확인하지 않음)"""
+    global _webhook_sink, _webhook_secret
+    _webhook_secret = secret_token
+    _webhook_sink = sink
+
+# /metrics에 내보낼 지표 텍스트를 만드는 함수 (봇이 시작할 때 set_metrics_source로 등록)
+_metrics_source = None
+
+def set_metrics_source(source):
+    """Prometheus 텍스트 형식 문자열을 반환하는 함수 등록"""
+    global _metrics_source
+    _metrics_source = source
+
+# 봇 상태 (health.HealthMonitor, 봇이 시작할 때 set_health_monitor로 등록)
+_health_monitor = None
+
+def set_health_monitor(monitor):
+    global _health_monitor
+    _health_monitor = monitor
+
+def _unmonitored_status():
+    """봇이 상태 기록을 시작하기 전 - 유예 시간 안이면 시작 중, 지나면 봇 스레드가 죽은 것으로 봄"""
+    waited = time.monotonic() - _started_at
+    if waited <= HEALTH_STARTUP_GRACE_SECONDS:
+        return {"status": "starting", "waited_seconds": round(waited, 1)}, 200
+    return {"status": "down", "reason": "bot did not start", "waited_seconds": round(waited, 1)}, 503
+
+def clear_webhook_sink():
+    global _webhook_sink
+    _webhook_sink = None
 
 @app.route('/')
 def home():
@@ -19,11 +60,59 @@ def home():
 
 @app.route('/health')
 def health():
-    """헬스 체크 엔드포인트"""
-    return {
-        "status": "healthy",
-        "bot": "running"
-    }, 200
+    """헬스 체크 엔드포인트 - 봇의 실제 상태 전체 (liveness 기준으로 200/503)"""
+    monitor = _health_monitor
+    if monitor is None:
+        return _unmonitored_status()
+    report = monitor.report()
+    report["status"] = "healthy" if report["ready"] else ("degraded" if report["live"] else "down")
+    return report, 200 if report["live"] else 503
+
+@app.route('/health/live')
+def health_live():
+    """liveness - 이벤트 루프가 멈췄거나 봇 스레드가 죽었으면 503 (플랫폼이 재시작)"""
+    monitor = _health_monitor
+    if monitor is None:
+        return _unmonitored_status()
+    live, detail = monitor.liveness()
+    return {"status": "alive" if live else "dead", **detail}, 200 if live else 503
+
+@app.route('/health/ready')
+def health_ready():
+    """readiness - 업데이트를 받고 전송할 수 있는 상태가 아니면 503"""
+    monitor = _health_monitor
+    if monitor is None:
+        return {"status": "not ready", "reasons": ["bot not started"]}, 503
+    ready, detail = monitor.readiness()
+    return {"status": "ready" if ready else "not ready", **detail}, 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 지표 엔드포인트 (텍스트 형식 0.0.4)"""
+    source = _metrics_source
+    if source is None:
+        return Response("# 봇이 아직 시작되지 않았습니다\n", status=503, mimetype='text/plain')
+    return Response(source(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route(WEBHOOK_PATH, methods=['POST'])
+def telegram_webhook():
+    """텔레그램 webhook 엔드포인트 - 비밀 토큰 확인 후 업데이트를 봇으로 전달"""
+    sink = _webhook_sink
+    if sink is None:
+        # 봇이 아직 시작 중이면 텔레그램이 잠시 후 다시 보냄
+        return {"ok": False, "error": "webhook mode is not active"}, 503
+    token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if _webhook_secret is not None and not hmac.compare_digest(token, _webhook_secret):
+        return {"ok": False, "error": "invalid secret token"}, 403
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'update_id' not in data:
+        return {"ok": False, "error": "invalid update"}, 400
+    try:
+        sink(data)
+    except Exception as e:
+        print(f"webhook 업데이트 처리 오류: {e}")
+        return {"ok": False, "error": "update rejected"}, 500
+    return {"ok": True}, 200
 
 def run_keepalive(port=None):
     """KeepAlive 서버 실행 (Render에서도 작동)"""
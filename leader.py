@@ -0,0 +1,179 @@
+"""
+단일 실행 인스턴스 선출 (리더 임대)
+배포 중 이전/새 인스턴스가 동시에 polling하거나 사이클 전송을 하지 않도록
+상태 DB의 leader_lease 행을 임대(lease)처럼 사용합니다.
+
+- 임대를 가진 인스턴스만 업데이트를 받고 전송합니다. 나머지는 대기하며 heartbeat 간격으로 다시 시도합니다.
+- 리더는 heartbeat 간격마다 만료 시각을 연장하고, 종료할 때 임대를 바로 놓아 줍니다.
+  (새 인스턴스는 약 heartbeat 간격 안에 넘겨받음, 놓지 못하고 죽은 경우에는 ttl 후)
+- 임대를 얻을 때마다 fencing token이 1씩 늘어납니다. 전송 대기열은 행을 가져갈 때 자신의 토큰이
+  아직 유효한지 같은 트랜잭션에서 확인하므로, 임대를 잃은 예전 리더는 더 이상 전송을 가져가지 못합니다.
+- 연장에 실패하면(다른 인스턴스가 가져감) lost 이벤트가 설정되고 봇은 스스로 물러납니다.
+
+같은 상태 DB 파일을 보는 인스턴스끼리만 조정됩니다. Render처럼 배포마다 새 컨테이너가 뜨고 디스크를
+공유하지 않으면 이전/새 인스턴스가 서로의 임대를 보지 못하므로, 이 경우(LEADER_LEASE_SHARED=false)
+봇은 임대에 기대지 않고 polling 시작 전 대기와 Conflict 재시도로 겹침을 넘깁니다.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from outbox import instance_id, open_database
+
+logger = logging.getLogger(__name__)
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leader_lease (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    token INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    acquired_at REAL NOT NULL
+)
+"""
+
+
+class LeaderLease:
+    """SQLite 행 기반 리더 임대
+
+    Args:
+        path: 상태 DB 파일 경로
+        ttl: 임대 유지 시간 (초, 이 시간 동안 연장하지 않으면 다른 인스턴스가 가져갈 수 있음)
+        heartbeat_interval: 연장/재시도 간격 (초)
+        name: 임대 이름 (봇 하나당 하나)
+    """
+
+    def __init__(self, path: str, ttl: float = 30, heartbeat_interval: float = 5, name: str = 'telegram-bot'):
+        self.path = path
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.name = name
+        self.owner = instance_id()
+        self.token: Optional[int] = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self.lost = asyncio.Event()
+        self._lock = threading.Lock()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def open(self):
+        self.conn = open_database(self.path)
+        with self._lock:
+            self.conn.execute(LEASE_SCHEMA)
+
+    def close(self):
+        if self.conn is not None:
+            with self._lock:
+                self.conn.close()
+            self.conn = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None and not self.lost.is_set()
+
+    # --- 동기 DB 작업 ---
+
+    def _try_acquire(self) -> Optional[int]:
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT owner, token, expires_at FROM leader_lease WHERE name = ?", (self.name,)).fetchone()
+                if row is not None and row[0] != self.owner and row[2] > now:
+                    self.conn.execute("ROLLBACK")
+                    return None
+                token = (row[1] if row else 0) + 1
+                self.conn.execute(
+                    """INSERT INTO leader_lease (name, owner, token, expires_at, acquired_at) VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, token = excluded.token,
+                           expires_at = excluded.expires_at, acquired_at = excluded.acquired_at""",
+                    (self.name, self.owner, token, now + self.ttl, now),
+                )
+                self.conn.execute("COMMIT")
+                return token
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _current_holder(self):
+        with self._lock:
+            return self.conn.execute("SELECT owner, token, expires_at FROM leader_lease WHERE name = ?", (self.name,)).fetchone()
+
+    def _renew(self) -> bool:
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE leader_lease SET expires_at = ? WHERE name = ? AND owner = ? AND token = ?",
+                (time.time() + self.ttl, self.name, self.owner, self.token),
+            )
+            return cursor.rowcount == 1
+
+    def _release(self):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE leader_lease SET expires_at = 0 WHERE name = ? AND owner = ? AND token = ?",
+                (self.name, self.owner, self.token),
+            )
+
+    def holds_fence(self, conn: sqlite3.Connection) -> bool:
+        """conn의 현재 트랜잭션 안에서 이 인스턴스의 fencing token이 아직 유효한지 확인"""
+        if self.token is None:
+            return False
+        row = conn.execute("SELECT owner, token, expires_at FROM leader_lease WHERE name = ?", (self.name,)).fetchone()
+        return row is not None and row[0] == self.owner and row[1] == self.token and row[2] > time.time()
+
+    # --- 비동기 API ---
+
+    async def acquire(self) -> int:
+        """임대를 얻을 때까지 heartbeat 간격으로 재시도하고 fencing token 반환"""
+        waited_logged = False
+        while True:
+            token = await asyncio.to_thread(self._try_acquire)
+            if token is not None:
+                self.token = token
+                self.lost.clear()
+                logger.info(f"👑 리더 임대 획득 (인스턴스: {self.owner}, 토큰: {token})")
+                return token
+            if not waited_logged:
+                holder = await asyncio.to_thread(self._current_holder)
+                remaining = max(0.0, holder[2] - time.time()) if holder else 0.0
+                logger.info(f"⏳ 다른 인스턴스({holder[0] if holder else '?'})가 실행 중입니다. 임대가 풀릴 때까지 대기... (최대 {remaining:.0f}초)")
+                waited_logged = True
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def start_heartbeat(self):
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(), name='leader-heartbeat')
+
+    async def _heartbeat(self):
+        failures = 0
+        while not self.lost.is_set():
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if await asyncio.to_thread(self._renew):
+                    failures = 0
+                    continue
+                logger.error("❌ 리더 임대를 다른 인스턴스가 가져갔습니다. 전송을 멈추고 물러납니다.")
+                self.lost.set()
+            except Exception as e:
+                # DB 오류가 ttl 동안 계속되면 임대가 만료된 것으로 보고 물러남
+                failures += 1
+                logger.warning(f"⚠️ 리더 임대 연장 실패 ({failures}회): {e}")
+                if failures * self.heartbeat_interval >= self.ttl:
+                    logger.error("❌ 리더 임대를 연장하지 못해 만료되었습니다. 물러납니다.")
+                    self.lost.set()
+
+    async def release(self):
+        """heartbeat 중지 후 임대 반납 (다음 인스턴스가 바로 가져갈 수 있음)"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        if self.token is None or self.conn is None:
+            return
+        try:
+            await asyncio.to_thread(self._release)
+            logger.info(f"👋 리더 임대 반납 (토큰: {self.token})")
+        except Exception as e:
+            logger.warning(f"⚠️ 리더 임대 반납 실패 (ttl 후 자동 만료): {e}")
+        self.token = None
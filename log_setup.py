@@ -0,0 +1,189 @@
+"""
+로깅 설정 (비동기 큐 + 파일 회전/압축 + 분류별 레벨 + 반복 로그 샘플링)
+
+- 로그를 남기는 쪽(이벤트 루프)은 레코드를 큐에 넣기만 하고, 문자열 만들기와 파일/콘솔 쓰기는
+  QueueListener 스레드가 합니다. 그래서 디스크가 느려도 전송이 기다리지 않습니다.
+- 메시지는 logger.info("... %s", 값)처럼 인자를 따로 넘기면, 레벨에 걸러진 로그는 문자열을 만들지 않고
+  남길 로그도 리스너 스레드에서 만듭니다. (f-string은 호출하는 순간 만들어지므로 전송 경로에서는 쓰지 않음)
+- bot.log는 크기(LOG_MAX_BYTES) 또는 시간(LOG_ROTATE_WHEN) 기준으로 회전하고, 지난 파일은 gzip으로 압축합니다.
+- 로거를 분류로 묶어 레벨을 따로 정합니다.
+      send      - 메시지마다/그룹마다 남는 전송 경로 로그 (bot.send, actors, ratelimit, retry_policy, httpx 등)
+      lifecycle - 시작/종료, 설정, 그룹 등록 등 나머지 전체
+- send 분류의 INFO 이하 로그는 같은 문구(템플릿)마다 1분에 LOG_SAMPLE_PER_MINUTE개까지만 남기고,
+  생략한 수는 다음에 남는 같은 문구 로그 끝에 붙입니다. (WARNING 이상은 항상 남김)
+"""
+import atexit
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 분류별 로거 이름 (하위 로거 포함)
+SEND_LOGGERS = ('bot.send', 'actors', 'ratelimit', 'retry_policy', 'resilience', 'httpx', 'httpcore')
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """레코드를 만들지 않고 그대로 큐에 넣는 QueueHandler
+
+    기본 QueueHandler.prepare()는 다른 프로세스로 보낼 수 있도록 호출한 스레드에서 메시지를 만들지만,
+    여기서는 같은 프로세스의 리스너 스레드가 받으므로 문자열 만들기를 리스너로 미룹니다.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """send 분류의 반복 로그를 문구(템플릿)마다 interval초에 limit개까지만 통과
+
+    Args:
+        limit: interval초 동안 문구마다 남길 최대 개수 (0이면 샘플링 안 함)
+        interval: 집계 구간 (초)
+        prefixes: 샘플링할 로거 이름 (하위 로거 포함)
+    """
+
+    def __init__(self, limit: int, interval: float = 60.0, prefixes: Iterable[str] = SEND_LOGGERS):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.prefixes = tuple(prefixes)
+        self._windows: Dict[Tuple[str, str], list] = {}  # (로거, 문구) → [구간 시작, 남긴 수, 생략한 수]
+        self._lock = threading.Lock()
+        self.suppressed = 0  # 생략한 로그 수 (누적)
+
+    def _sampled(self, name: str) -> bool:
+        return any(name == prefix or name.startswith(prefix + '.') for prefix in self.prefixes)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno >= logging.WARNING or not self._sampled(record.name):
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, 0]
+                if len(self._windows) > 10000:
+                    # 문구가 끝없이 늘어나는 경우(f-string 등) 오래된 구간 정리
+                    for stale in [k for k, w in self._windows.items() if now - w[0] >= self.interval]:
+                        del self._windows[stale]
+            else:
+                dropped = 0
+            if window[1] >= self.limit:
+                window[2] += 1
+                self.suppressed += 1
+                return False
+            window[1] += 1
+            if window[1] == 1 and dropped:
+                record.sampled_dropped = dropped
+            elif window[2]:
+                record.sampled_dropped, window[2] = window[2], 0
+        return True
+
+
+class SamplingFormatter(logging.Formatter):
+    """생략한 로그 수를 메시지 끝에 붙이는 Formatter"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        dropped = getattr(record, 'sampled_dropped', 0)
+        if dropped:
+            text += f" (비슷한 로그 {dropped}개 생략)"
+        return text
+
+
+def _gzip_namer(name: str) -> str:
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str):
+    """회전된 로그 파일을 gzip으로 압축 (리스너 스레드에서 실행)"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _file_handler(path: str, max_bytes: int, backup_count: int, rotate_when: str, compress: bool) -> logging.Handler:
+    if rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=rotate_when, backupCount=backup_count, encoding='utf-8')
+    else:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    if compress:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+def _parse_level(value, default: int) -> int:
+    if isinstance(value, int):
+        return value
+    level = logging.getLevelName(str(value).strip().upper())
+    return level if isinstance(level, int) else default
+
+
+def setup_logging(
+    path: str = 'bot.log',
+    level='INFO',
+    send_level='INFO',
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    rotate_when: str = '',
+    compress: bool = True,
+    sample_per_minute: int = 60,
+) -> logging.handlers.QueueListener:
+    """루트 로거를 큐 기반으로 설정하고 리스너 시작 (여러 번 호출해도 한 번만 설정)
+
+    Args:
+        path: 로그 파일 경로
+        level: lifecycle 분류(기본) 레벨
+        send_level: send 분류 레벨 (WARNING이면 메시지마다 남는 INFO 로그를 만들지도 않음)
+        max_bytes: 크기 기준 회전 (rotate_when이 없을 때)
+        backup_count: 보관할 지난 파일 수
+        rotate_when: 시간 기준 회전 ('midnight', 'H' 등 TimedRotatingFileHandler의 when, 비우면 크기 기준)
+        compress: 지난 파일을 gzip으로 압축
+        sample_per_minute: send 분류의 같은 문구 INFO 로그를 1분에 남길 최대 개수 (0이면 모두 남김)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = SamplingFormatter(LOG_FORMAT)
+    handlers = [_file_handler(path, max_bytes, backup_count, rotate_when, compress), logging.StreamHandler(sys.stdout)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_per_minute))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(_parse_level(level, logging.INFO))
+    for name in SEND_LOGGERS:
+        logging.getLogger(name).setLevel(_parse_level(send_level, logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """큐에 남은 로그를 모두 쓰고 리스너 종료 (종료 시 호출, 여러 번 호출해도 됨)"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
@@ -0,0 +1,165 @@
+"""
+봇 성능 지표 (Prometheus 텍스트 형식)
+카운터/게이지/히스토그램을 보관하고 keepalive 웹서버의 /metrics에서 Prometheus 텍스트 형식으로 내보냅니다.
+(prometheus_client 없이 텍스트 형식 0.0.4만 구현)
+
+지표는 봇 이벤트 루프에서 기록하고 keepalive 스레드에서 읽으므로 모든 접근은 잠금 안에서 합니다.
+라벨 값은 지표마다 처음 기록될 때 생성되므로 그룹 ID처럼 개수가 정해지지 않은 라벨은 꼭 필요한 지표에만 씁니다.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 기본 히스토그램 구간 (초) - Bot API 응답 시간용
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric(ABC):
+    """지표 하나 (라벨 값 조합별 값 보관, 종류마다 render로 샘플 줄을 만듦)"""
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 라벨이 맞지 않습니다 (필요: {self.labelnames}, 받음: {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """# HELP / # TYPE 줄을 뺀 샘플 줄 목록 (잠금은 호출하는 쪽에서 잡음)"""
+
+
+class Counter(_Metric):
+    """계속 증가하는 값 (요청 수, 실패 수 등)"""
+    kind = 'counter'
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """오르내리는 값 (대기열 크기, 이벤트 루프 지연 등)"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """값의 분포 (응답 시간, 사이클 길이 등) - 구간별 누적 개수, 합계, 개수"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], lock: threading.Lock, buckets: Iterable[float]):
+        super().__init__(name, help_text, labelnames, lock)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[Tuple[str, ...], list] = {}  # 라벨 → [구간별 개수..., 합계, 개수]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[index] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[-1] if entry else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, entry in self._values.items():
+            cumulative = 0
+            for index, bound in enumerate(self.buckets):
+                cumulative += entry[index]
+                le = (('le', _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {entry[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """지표 모음 (이름이 같은 지표는 한 번만 생성)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self.started_at = time.time()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if existing.kind != metric.kind:
+                raise ValueError(f"{metric.name}이 이미 {existing.kind}로 등록되어 있습니다.")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames, self._lock))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, self._lock))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Optional[Iterable[float]] = None) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, self._lock, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (Content-Type: text/plain; version=0.0.4)"""
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,48 @@
+"""
+Bot API 요청 관찰 계층 (HTTP 전송 계층)
+봇의 모든 Bot API 요청이 실제로 나갈 때마다 (메서드, 응답 시간(초), 예외 또는 None)을 관찰 함수에 넘깁니다.
+getUpdates는 python-telegram-bot이 레이트 리미터를 거치지 않고 보내므로 전송 계층에서 재야 빠지지 않습니다.
+
+    observe = forwarder.observe_api_request
+    Application.builder().request(ObservedRequest(observe, connection_pool_size=256)).get_updates_request(ObservedRequest(observe))
+"""
+import logging
+import time
+from typing import Callable, Optional
+
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+# (메서드, 응답 시간(초), 예외 또는 None)
+RequestObserver = Callable[[str, float, Optional[BaseException]], None]
+
+
+class ObservedRequest(HTTPXRequest):
+    """요청마다 observer를 호출하는 HTTPXRequest
+
+    응답 파싱까지 끝난 뒤 호출하므로 RetryAfter/Conflict 같은 텔레그램 오류도 예외로 함께 넘어갑니다.
+    observer에서 난 오류는 요청 결과에 영향을 주지 않도록 무시합니다.
+    """
+
+    def __init__(self, observer: Optional[RequestObserver] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.observer = observer
+
+    async def post(self, url: str, *args, **kwargs):
+        started_at = time.monotonic()
+        try:
+            result = await super().post(url, *args, **kwargs)
+        except Exception as e:
+            self._observe(url, started_at, e)
+            raise
+        self._observe(url, started_at, None)
+        return result
+
+    def _observe(self, url: str, started_at: float, error: Optional[BaseException]):
+        if self.observer is None:
+            return
+        try:
+            self.observer(url.rsplit('/', 1)[-1], time.monotonic() - started_at, error)
+        except Exception as e:
+            logger.debug(f"요청 관찰 함수 오류 (무시): {e!r}")
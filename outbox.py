@@ -0,0 +1,402 @@
+"""
+영구 전송 대기열 (SQLite outbox)
+새 채널 메시지를 (메시지, 그룹) 단위 행으로 먼저 저장한 뒤 전송하고, 전송이 끝난 행은 지웁니다.
+실패한 행은 시도 횟수와 다음 시도 시각(지수 백오프)을 기록해 두었다가 워커가 다시 보냅니다.
+봇이 재시작되거나 Render 재배포로 중간에 죽어도 남은 행은 DB에 있으므로 전송이 사라지지 않습니다.
+
+행을 가져갈 때는 임대(lease)를 걸어 다른 워커/인스턴스가 같은 행을 동시에 보내지 않게 하고,
+임대를 건 프로세스가 죽으면 임대 만료 후 다른 워커가 이어서 보냅니다.
+(텔레그램 전송과 DB 기록은 한 트랜잭션이 아니므로 전송 직후 죽은 경우에만 한 번 더 보낼 수 있습니다.)
+"""
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 전송 결과 (워커의 deliver 함수가 반환)
+SENT = 'sent'  # 전송 완료 → 행 삭제
+RETRY = 'retry'  # 일시적 실패 → 백오프 후 재시도
+DROP = 'drop'  # 다시 보내도 소용없음 (그룹 제거, 원본 삭제 등) → 행 삭제
+DEFER = 'defer'  # 보내지 않고 미룸 (그룹 회로 열림) → deliver가 defer()로 다시 예약, 시도 횟수는 그대로
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    message_id INTEGER NOT NULL,
+    group_id TEXT NOT NULL,
+    from_chat_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (message_id, group_id)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+@dataclass
+class OutboxItem:
+    """전송 대기열의 행 하나 (메시지 하나를 그룹 하나에 보내는 작업)"""
+    message_id: int
+    group_id: str
+    from_chat_id: int
+    attempts: int = 0
+
+
+def instance_id() -> str:
+    """이 프로세스를 구분하는 ID (호스트-PID-난수)"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """WAL 모드 SQLite 연결 (여러 스레드에서 잠금과 함께 사용)"""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class Outbox:
+    """SQLite 기반 전송 대기열
+
+    Args:
+        path: SQLite 파일 경로
+        lease_seconds: 가져간 행의 임대 시간 (이 시간 안에 완료/실패를 기록하지 않으면 다른 워커가 가져감)
+        max_attempts: 최대 시도 횟수 (넘으면 'dead' 상태로 남기고 더 이상 보내지 않음)
+        base_delay: 첫 재시도 대기 시간 (초, 시도마다 2배)
+        max_delay: 최대 재시도 대기 시간 (초)
+        dead_retention: 포기한('dead') 행을 남겨 두는 시간 (초, 지나면 워커가 쉬는 동안 지움)
+    """
+
+    # 포기한 행 정리 간격 (초, 워커가 할 일이 없을 때 이 간격으로 한 번)
+    purge_interval = 3600
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 8, base_delay: float = 10, max_delay: float = 1800,
+                 dead_retention: float = 7 * 86400):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_retention = dead_retention
+        self.owner = instance_id()
+        # 행을 가져가기 전에 같은 트랜잭션에서 호출하는 확인 함수 (False면 가져가지 않음, 예: 리더 임대 확인)
+        self.fence: Optional[Callable[[sqlite3.Connection], bool]] = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._running = False
+        self._purged_at: Optional[float] = None
+
+    def open(self):
+        self.conn = open_database(self.path)
+        with self._lock:
+            self.conn.executescript(OUTBOX_SCHEMA)
+        pending = self._count('pending')
+        if pending:
+            logger.info(f"📮 전송 대기열에 남은 전송 {pending}개를 이어서 처리합니다. ({self.path})")
+
+    def close(self):
+        if self.conn is not None:
+            with self._lock:
+                self.conn.close()
+            self.conn = None
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.base_delay * (2 ** max(attempts - 1, 0)), self.max_delay)
+
+    # --- 동기 DB 작업 (asyncio.to_thread로 실행) ---
+
+    def _count(self, status: str) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (status,)).fetchone()[0]
+
+    def _enqueue(self, message_id: int, from_chat_id: int, group_ids: List[str], leased: bool) -> List[str]:
+        """행 추가 후 이번 호출이 넣거나 가져간 그룹 ID 반환 (다른 곳에서 임대 중인 행은 빠짐)"""
+        now = time.time()
+        owner = self.owner if leased else None
+        expires = now + self.lease_seconds if leased else None
+        rows = [(message_id, str(group_id), from_chat_id, now, owner, expires, now) for group_id in group_ids]
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.fence is not None and not self.fence(self.conn):
+                    self.conn.execute("ROLLBACK")
+                    logger.warning(f"⚠️ 리더 임대가 없어 전송 대기열에 넣지 않습니다. (메시지: {message_id})")
+                    return []
+                # 이미 있는 행은 임대가 없거나 만료된 경우에만 이 프로세스가 가져옴
+                # (포기했던 행을 다시 넣으면 새 전송이므로 시도 횟수와 마지막 오류를 초기화)
+                taken = []
+                for row in rows:
+                    cursor = self.conn.execute(
+                        """INSERT INTO outbox (message_id, group_id, from_chat_id, next_attempt_at, lease_owner, lease_expires_at, created_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)
+                           ON CONFLICT (message_id, group_id) DO UPDATE SET
+                               attempts = CASE WHEN outbox.status = 'dead' THEN 0 ELSE outbox.attempts END,
+                               last_error = CASE WHEN outbox.status = 'dead' THEN NULL ELSE outbox.last_error END,
+                               status = 'pending',
+                               next_attempt_at = excluded.next_attempt_at,
+                               lease_owner = excluded.lease_owner,
+                               lease_expires_at = excluded.lease_expires_at
+                           WHERE outbox.lease_expires_at IS NULL OR outbox.lease_expires_at < excluded.created_at""",
+                        row,
+                    )
+                    # 임대 중인 행은 DO UPDATE의 WHERE에 걸려 바뀌지 않음 (rowcount 0)
+                    if cursor.rowcount:
+                        taken.append(row[1])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return taken
+
+    def _claim(self, limit: int) -> List[OutboxItem]:
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.fence is not None and not self.fence(self.conn):
+                    self.conn.execute("ROLLBACK")
+                    return []
+                rows = self.conn.execute(
+                    """SELECT message_id, group_id, from_chat_id, attempts FROM outbox
+                       WHERE status = 'pending' AND next_attempt_at <= ?
+                         AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+                       ORDER BY next_attempt_at, created_at LIMIT ?""",
+                    (now, now, limit),
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE outbox SET lease_owner = ?, lease_expires_at = ? WHERE message_id = ? AND group_id = ?",
+                    [(self.owner, now + self.lease_seconds, row[0], row[1]) for row in rows],
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [OutboxItem(*row) for row in rows]
+
+    # 완료/실패 기록은 임대를 가진 프로세스만 (임대가 만료되어 다른 워커가 가져간 행은 건드리지 않음)
+
+    def _complete(self, message_id: int, group_id: str):
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM outbox WHERE message_id = ? AND group_id = ? AND lease_owner = ?",
+                (message_id, str(group_id), self.owner),
+            )
+
+    def _fail(self, message_id: int, group_id: str, error: Optional[str]) -> Optional[float]:
+        """시도 횟수를 늘리고 다음 시도 시각을 정함 (대기 시간 반환, 최대 횟수를 넘으면 None)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT attempts FROM outbox WHERE message_id = ? AND group_id = ? AND lease_owner = ?",
+                    (message_id, str(group_id), self.owner),
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("ROLLBACK")
+                    return 0.0  # 이미 다른 곳에서 처리했거나 임대가 넘어감
+                attempts = row[0] + 1
+                if attempts >= self.max_attempts:
+                    # dead 행의 next_attempt_at은 포기한 시각 (보관 기간 계산용)
+                    self.conn.execute(
+                        """UPDATE outbox SET status = 'dead', attempts = ?, next_attempt_at = ?, last_error = ?, lease_owner = NULL, lease_expires_at = NULL
+                           WHERE message_id = ? AND group_id = ? AND lease_owner = ?""",
+                        (attempts, time.time(), error, message_id, str(group_id), self.owner),
+                    )
+                    delay = None
+                else:
+                    delay = self.retry_delay(attempts)
+                    self.conn.execute(
+                        """UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, lease_owner = NULL, lease_expires_at = NULL
+                           WHERE message_id = ? AND group_id = ? AND lease_owner = ?""",
+                        (attempts, time.time() + delay, error, message_id, str(group_id), self.owner),
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return delay
+
+    def _defer(self, message_id: int, group_id: str, delay: float):
+        """시도 횟수와 마지막 오류는 그대로 두고 다음 시도 시각만 미룸"""
+        with self._lock:
+            self.conn.execute(
+                """UPDATE outbox SET next_attempt_at = ?, lease_owner = NULL, lease_expires_at = NULL
+                   WHERE message_id = ? AND group_id = ? AND lease_owner = ?""",
+                (time.time() + delay, message_id, str(group_id), self.owner),
+            )
+
+    def _drop_group(self, group_id: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM outbox WHERE group_id = ?", (str(group_id),))
+
+    def _migrate_group(self, old_group_id: str, new_group_id: str) -> int:
+        """남은 전송을 새 그룹 ID로 옮김 (임대 중인 행 포함, 새 ID에 이미 있는 행은 유지) 후 옮긴 행 수 반환"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                moved = self.conn.execute(
+                    "UPDATE OR IGNORE outbox SET group_id = ? WHERE group_id = ?", (str(new_group_id), str(old_group_id))
+                ).rowcount
+                self.conn.execute("DELETE FROM outbox WHERE group_id = ?", (str(old_group_id),))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return moved
+
+    def _drop_message(self, message_id: int):
+        with self._lock:
+            self.conn.execute("DELETE FROM outbox WHERE message_id = ?", (message_id,))
+
+    def _purge_dead(self) -> int:
+        """보관 기간이 지난 'dead' 행을 지우고 지운 행 수 반환"""
+        with self._lock:
+            return self.conn.execute(
+                "DELETE FROM outbox WHERE status = 'dead' AND next_attempt_at < ?", (time.time() - self.dead_retention,)
+            ).rowcount
+
+    def _next_due(self) -> Optional[float]:
+        """다음에 가져갈 수 있는 행의 시각 (임대 중인 행은 임대 만료 후부터 가져갈 수 있음)"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                """SELECT MIN(CASE WHEN lease_expires_at > ? THEN MAX(lease_expires_at, next_attempt_at) ELSE next_attempt_at END)
+                   FROM outbox WHERE status = 'pending'""",
+                (now,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    # --- 비동기 API ---
+
+    async def enqueue(self, message_id: int, from_chat_id: int, group_ids: Iterable[str], leased: bool = False) -> List[str]:
+        """(메시지, 그룹) 행 추가 - leased=True이면 호출한 쪽이 바로 보낼 것이므로 워커가 가져가지 않게 임대
+
+        Returns:
+            이번 호출이 넣거나 가져간 그룹 ID 목록 (leased=True이면 호출한 쪽은 이 그룹에만 보내야 함)
+        """
+        taken = await asyncio.to_thread(self._enqueue, message_id, from_chat_id, list(group_ids), leased)
+        if not leased:
+            self.wake()
+        return taken
+
+    async def claim(self, limit: int = 1) -> List[OutboxItem]:
+        return await asyncio.to_thread(self._claim, limit)
+
+    async def complete(self, message_id: int, group_id: str):
+        await asyncio.to_thread(self._complete, message_id, group_id)
+
+    async def fail(self, message_id: int, group_id: str, error: Optional[str] = None):
+        delay = await asyncio.to_thread(self._fail, message_id, group_id, error)
+        if delay is None:
+            logger.error(f"❌ 전송 대기열: 최대 시도 횟수 초과로 포기합니다. (메시지: {message_id}, 그룹: {group_id}, 오류: {error})")
+        elif delay > 0:
+            logger.info(f"📮 전송 대기열: {delay:.0f}초 후 재시도 예정 (메시지: {message_id}, 그룹: {group_id})")
+
+    async def defer(self, message_id: int, group_id: str, delay: float):
+        await asyncio.to_thread(self._defer, message_id, group_id, delay)
+        logger.debug(f"📮 전송 대기열: {delay:.0f}초 미룸 (메시지: {message_id}, 그룹: {group_id})")
+
+    async def drop_group(self, group_id: str):
+        await asyncio.to_thread(self._drop_group, group_id)
+
+    async def migrate_group(self, old_group_id: str, new_group_id: str) -> int:
+        return await asyncio.to_thread(self._migrate_group, old_group_id, new_group_id)
+
+    async def drop_message(self, message_id: int):
+        await asyncio.to_thread(self._drop_message, message_id)
+
+    async def purge_dead(self) -> int:
+        purged = await asyncio.to_thread(self._purge_dead)
+        if purged:
+            logger.info(f"🧹 전송 대기열: 보관 기간이 지난 포기한 전송 {purged}개를 지웠습니다.")
+        return purged
+
+    async def stats(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self._stats)
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # --- 워커 ---
+
+    def start_workers(self, deliver: Callable[[OutboxItem], Awaitable[str]], count: int = 4, poll_interval: float = 30):
+        """deliver(item)이 SENT/RETRY/DROP/DEFER를 반환하는 워커 count개 시작 (DEFER면 deliver가 이미 defer()로 다시 예약함)"""
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._workers = [
+            asyncio.create_task(self._run_worker(deliver, poll_interval), name=f"outbox-worker-{i}")
+            for i in range(max(1, count))
+        ]
+        logger.info(f"📮 전송 대기열 워커 {len(self._workers)}개 시작")
+
+    async def stop_workers(self, timeout: Optional[float] = None):
+        """워커 정지 (진행 중인 전송은 timeout까지 기다린 뒤 취소, 임대는 만료 후 다시 처리됨)"""
+        self._running = False
+        self.wake()
+        if not self._workers:
+            return
+        done, pending = await asyncio.wait(self._workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _wait_for_work(self, poll_interval: float):
+        self._wakeup.clear()
+        timeout = poll_interval
+        next_due = await asyncio.to_thread(self._next_due)
+        if next_due is not None:
+            timeout = min(timeout, max(0.0, next_due - time.time()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_worker(self, deliver: Callable[[OutboxItem], Awaitable[str]], poll_interval: float):
+        while self._running:
+            try:
+                items = await self.claim(1)
+                if not items:
+                    if self._purged_at is None or time.monotonic() - self._purged_at >= self.purge_interval:
+                        # 워커 하나만 정리하도록 먼저 시각을 기록
+                        self._purged_at = time.monotonic()
+                        await self.purge_dead()
+                    await self._wait_for_work(poll_interval)
+                    continue
+                item = items[0]
+                error = None
+                try:
+                    outcome = await deliver(item)
+                except Exception as e:
+                    logger.error(f"❌ 전송 대기열 처리 중 예외 (메시지: {item.message_id}, 그룹: {item.group_id}): {e}", exc_info=True)
+                    outcome, error = RETRY, repr(e)
+                if outcome == SENT or outcome == DROP:
+                    await self.complete(item.message_id, item.group_id)
+                elif outcome != DEFER:
+                    await self.fail(item.message_id, item.group_id, error)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ 전송 대기열 워커 오류: {e}", exc_info=True)
+                await asyncio.sleep(poll_interval)
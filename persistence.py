@@ -0,0 +1,173 @@
+"""
+상태 DB 지연 기록 (write-behind)
+그룹 등록/제거, 새 채널 메시지, 설정 변경, 사이클 위치, 메시지 전송 시각은 메모리에 '변경됨'으로 표시만 하고 바로 돌아갑니다.
+별도 스레드가 첫 변경 후 flush_window초 동안 모인 변경을 합쳐 한 트랜잭션으로 기록하므로
+디스크가 느려도 이벤트 루프(전송/업데이트 처리)가 멈추지 않습니다.
+같은 항목이 여러 번 바뀌면 마지막 상태만 기록합니다. 종료 시 close()가 남은 변경을 동기적으로 기록합니다.
+
+전송 대기열(outbox.py)은 전송 전에 기록되어야 하므로 이 계층을 거치지 않습니다.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindPersister:
+    """StateStore 앞에서 변경을 모아 기록하는 지연 기록기
+
+    Args:
+        store: 실제로 기록할 상태 저장소
+        flush_window: 첫 변경 후 기록까지 기다리며 변경을 모으는 시간 (초)
+        retry_delay: 기록 실패 시 다시 시도하기까지 대기 시간 (초)
+    """
+
+    def __init__(self, store: StateStore, flush_window: float = 1.0, retry_delay: float = 5.0):
+        self.store = store
+        self.flush_window = flush_window
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 대기 중인 변경 (True=추가, False=제거 / 설정은 마지막 값)
+        self._messages: Dict[int, bool] = {}
+        self._groups: Dict[str, bool] = {}
+        self._settings: Dict[str, str] = {}
+        self._rotation: Dict[str, Optional[dict]] = {}  # 그룹별 사이클 위치 (None=삭제)
+        self._sent: Dict[int, float] = {}  # 메시지별 마지막 전송 시각
+        self._migrations: List[Tuple[str, str]] = []  # 그룹 ID 변경 (예전 ID, 새 ID) - 다른 변경보다 먼저 기록
+        self._dirty_since: Optional[float] = None
+        self.flush_count = 0
+        self.last_flush_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='state-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """기록 대기 중인 변경 수"""
+        with self._lock:
+            return len(self._messages) + len(self._groups) + len(self._settings) + len(self._rotation) + len(self._sent) + len(self._migrations)
+
+    # --- 변경 표시 (이벤트 루프에서 호출, 바로 반환) ---
+
+    def _mark(self, table: dict, key, value):
+        with self._lock:
+            table[key] = value
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._changed.notify()
+
+    def add_message(self, message_id: int):
+        self._mark(self._messages, message_id, True)
+
+    def remove_messages(self, message_ids: Iterable[int]):
+        for message_id in message_ids:
+            self._mark(self._messages, message_id, False)
+
+    def add_group(self, group_id: str):
+        self._mark(self._groups, str(group_id), True)
+
+    def remove_group(self, group_id: str):
+        self._mark(self._groups, str(group_id), False)
+
+    def set_settings(self, **values):
+        for key, value in values.items():
+            self._mark(self._settings, key, str(value))
+
+    def set_rotation(self, group_id: str, position: Optional[dict]):
+        """그룹의 사이클 위치 기록 (position: {'cycle', 'next_message_id'}, None이면 삭제)"""
+        self._mark(self._rotation, str(group_id), dict(position) if position is not None else None)
+
+    def migrate_group(self, old_group_id: str, new_group_id: str):
+        """그룹 ID 변경 (슈퍼그룹 전환) - 아직 기록하지 않은 예전 ID의 변경도 새 ID로 옮김"""
+        old_group_id, new_group_id = str(old_group_id), str(new_group_id)
+        with self._lock:
+            for table in (self._groups, self._rotation):
+                if old_group_id in table:
+                    table[new_group_id] = table.pop(old_group_id)
+            self._migrations.append((old_group_id, new_group_id))
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._changed.notify()
+
+    def mark_sent(self, message_ids: Iterable[int], sent_at: float):
+        for message_id in message_ids:
+            self._mark(self._sent, message_id, sent_at)
+
+    # --- 기록 ---
+
+    def _take(self):
+        with self._lock:
+            changes = (self._messages, self._groups, self._settings, self._rotation, self._sent, self._migrations)
+            self._messages, self._groups, self._settings, self._rotation, self._sent, self._migrations = {}, {}, {}, {}, {}, []
+            self._dirty_since = None
+        return changes
+
+    def _restore(self, changes):
+        """기록에 실패한 변경을 되돌려 놓음 (그 사이 새로 바뀐 항목은 새 값 유지)"""
+        with self._lock:
+            *tables, migrations = changes
+            for pending, failed in zip((self._messages, self._groups, self._settings, self._rotation, self._sent), tables):
+                for key, value in failed.items():
+                    pending.setdefault(key, value)
+            self._migrations[:0] = migrations
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+
+    def flush(self) -> bool:
+        """모인 변경을 한 트랜잭션으로 기록 (호출한 스레드에서 실행)"""
+        changes = self._take()
+        count = sum(len(table) for table in changes)
+        if not count:
+            return True
+        try:
+            self.store.apply(*changes)
+        except Exception as e:
+            self._restore(changes)
+            self.last_error = str(e)
+            logger.error(f"❌ 상태 DB 기록 실패 (변경 {count}개, {self.retry_delay:.0f}초 후 재시도): {e}", exc_info=True)
+            return False
+        self.flush_count += 1
+        self.last_flush_at = time.time()
+        self.last_error = None
+        messages, groups, settings, rotation, sent, migrations = changes
+        logger.debug(
+            f"💾 상태 DB 기록: 메시지 {len(messages)}개, 그룹 {len(groups)}개, 설정 {len(settings)}개, "
+            f"사이클 위치 {len(rotation)}개, 전송 시각 {len(sent)}개, 그룹 ID 변경 {len(migrations)}개"
+        )
+        return True
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                while self._dirty_since is None and not self._stopping.is_set():
+                    self._changed.wait()
+                dirty_since = self._dirty_since
+            if dirty_since is None:
+                break
+            # 첫 변경 후 flush_window 동안 더 모아서 한 번에 기록
+            remaining = dirty_since + self.flush_window - time.monotonic()
+            if remaining > 0 and self._stopping.wait(remaining):
+                break
+            if not self.flush():
+                self._stopping.wait(self.retry_delay)
+
+    def close(self, timeout: float = 10):
+        """기록 스레드를 멈추고 남은 변경을 동기적으로 기록"""
+        self._stopping.set()
+        with self._lock:
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if not self.flush():
+            logger.error(f"❌ 종료 전 상태 DB 기록 실패 - 변경 {self.pending}개가 저장되지 않았습니다.")
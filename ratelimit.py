@@ -0,0 +1,170 @@
+"""
+텔레그램 Bot API 전송 속도 제한 (토큰 버킷)
+전체 요청(초당 약 30개)과 채팅별 전송(그룹은 분당 약 20개, 개인 채팅은 초당 1개)을
+모두 지키도록 봇의 모든 API 요청을 조절합니다.
+Application.builder().rate_limiter(...)로 등록하면 bot.* 호출이 모두 이 계층을 거칩니다.
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# 채팅별 제한을 적용할 엔드포인트 (채팅에 메시지가 생기는 요청)
+SEND_ENDPOINTS = {
+    'sendMessage',
+    'forwardMessage',
+    'forwardMessages',
+    'copyMessage',
+    'copyMessages',
+    'pinChatMessage',
+}
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """RetryAfter 에러의 대기 시간을 초 단위로 반환 (버전에 따라 int 또는 timedelta)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+def is_group_chat_id(chat_id: Union[int, str]) -> bool:
+    """그룹/채널 채팅 ID인지 확인 (음수 ID 또는 @username)"""
+    chat_id = str(chat_id)
+    return chat_id.startswith('-') or chat_id.startswith('@')
+
+
+class TokenBucket:
+    """토큰 버킷 - rate: 초당 충전되는 토큰 수, capacity: 한 번에 쓸 수 있는 최대 토큰 수"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def pause(self, seconds: float):
+        """RetryAfter 등으로 이 버킷만 일정 시간 정지"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.updated_at = self.paused_until  # 정지가 끝난 뒤부터 다시 충전
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None):
+        """충전 속도 변경 (예: 그룹 슬로우 모드 반영)"""
+        self._refill(time.monotonic())
+        self.rate = rate
+        if capacity is not None:
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+
+    async def acquire(self):
+        """토큰 1개를 사용할 수 있을 때까지 대기 (요청 순서대로 처리)"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramRateLimiter(BaseRateLimiter[int]):
+    """전체 버킷 + 채팅별 버킷으로 요청을 조절하는 레이트 리미터
+
+    RetryAfter가 발생하면 해당 채팅의 버킷만 (채팅이 없는 요청은 전체 버킷을)
+    텔레그램이 알려준 시간만큼 정지한 뒤 요청을 다시 보냅니다.
+    rate_limit_args로 RetryAfter 재시도 횟수를 요청마다 지정할 수 있습니다.
+    on_retry를 지정하면 재시도할 때마다 엔드포인트 이름으로 호출합니다. (지표 기록용)
+    """
+
+    def __init__(
+        self,
+        overall_per_second: float = 30,
+        group_per_minute: float = 20,
+        private_per_second: float = 1,
+        group_burst: float = 5,
+        max_retries: int = 3,
+        on_retry: Optional[Callable[[str], None]] = None,
+    ):
+        self.overall_per_second = overall_per_second
+        self.group_per_minute = group_per_minute
+        self.private_per_second = private_per_second
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self.on_retry = on_retry
+        self.global_bucket = TokenBucket(overall_per_second, overall_per_second)
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self.chat_buckets.clear()
+
+    def get_chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        """채팅별 버킷 (없으면 생성)"""
+        key = str(chat_id)
+        bucket = self.chat_buckets.get(key)
+        if bucket is None:
+            if is_group_chat_id(key):
+                bucket = TokenBucket(self.group_per_minute / 60, self.group_burst)
+            else:
+                bucket = TokenBucket(self.private_per_second, 1)
+            self.chat_buckets[key] = bucket
+        return bucket
+
+    def pause_chat(self, chat_id: Union[int, str], seconds: float):
+        """특정 채팅의 전송만 일정 시간 정지"""
+        self.get_chat_bucket(chat_id).pause(seconds)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], list]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ):
+        max_retries = rate_limit_args if rate_limit_args is not None else self.max_retries
+        chat_id = data.get('chat_id')
+        chat_bucket = None
+        if chat_id is not None and endpoint in SEND_ENDPOINTS:
+            chat_bucket = self.get_chat_bucket(chat_id)
+
+        attempt = 0
+        while True:
+            # 채팅 버킷을 먼저 기다려야 느린 그룹이 전체 버킷을 붙잡지 않음
+            if chat_bucket is not None:
+                await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = retry_after_seconds(e) + 0.1
+                (chat_bucket or self.global_bucket).pause(delay)
+                if attempt >= max_retries:
+                    raise
+                attempt += 1
+                target = f"채팅 {chat_id}" if chat_bucket is not None else "전체"
+                logger.warning(f"⏳ RetryAfter: {target} 요청을 {delay:.1f}초 정지 후 재시도 ({endpoint}, 시도: {attempt}/{max_retries})")
+                if self.on_retry is not None:
+                    self.on_retry(endpoint)
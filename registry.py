@@ -0,0 +1,211 @@
+"""
+메시지/그룹 목록
+사이클 전송할 메시지 ID와 전송 대상 그룹을 보관합니다.
+
+MessageRegistry - 메시지 ID를 순서가 있는 집합으로 보관합니다.
+- 포함 여부 확인/추가/삭제가 O(1)이고 중복이 생기지 않습니다.
+- 순서는 추가한 순서(insertion) 또는 메시지 ID 순서(id)로 항상 같습니다.
+- 채널에서 삭제된 메시지는 tombstone으로 남겨 일정 시간 동안 다시 추가되지 않습니다.
+- snapshot()은 변경이 있을 때만 새로 만드는 읽기 전용 튜플이므로, 사이클을 도는 중에
+  목록이 바뀌어도 안전하고 메시지가 수만 개여도 사이클마다 복사하지 않습니다.
+
+GroupRegistry - 그룹 ID별 기록(제목, 상태, 등록 시각, 마지막 성공, 연속 실패)을 보관합니다.
+- 조회가 O(1)이고, snapshot()은 등록/제거가 있을 때만 새로 만드는 튜플(copy-on-write)입니다.
+  동시 전송(fan-out)은 시작할 때 받은 스냅샷을 끝까지 쓰므로 도중에 그룹이 등록/제거되어도 건너뛰는 그룹이 없습니다.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from expiring import ExpiringDict
+
+# 메시지 순서
+ORDERS = ('insertion', 'id')
+
+
+class MessageRegistry:
+    """순서가 있는 메시지 ID 집합 (tombstone 포함)
+
+    Args:
+        order: 사이클 순서 (insertion: 추가한 순서, id: 메시지 ID 순서)
+        tombstone_ttl: 삭제된 메시지를 다시 추가하지 않는 시간 (초)
+        max_tombstones: 보관할 tombstone 최대 개수
+    """
+
+    def __init__(self, order: str = 'id', tombstone_ttl: float = 86400, max_tombstones: int = 10000):
+        if order not in ORDERS:
+            raise ValueError(f"알 수 없는 order: {order} (가능: {', '.join(ORDERS)})")
+        self.order = order
+        self._ids: Dict[int, None] = {}  # dict를 순서 있는 집합으로 사용
+        self._tombstones = ExpiringDict(ttl=tombstone_ttl, max_entries=max_tombstones)  # 메시지 ID → 삭제 시각
+        self._snapshot: Optional[Tuple[int, ...]] = ()
+        self.version = 0  # 목록이 바뀔 때마다 1씩 증가
+
+    def _changed(self):
+        self._snapshot = None
+        self.version += 1
+
+    def add(self, message_id: int, force: bool = False) -> bool:
+        """메시지 추가 (이미 있거나 삭제된 메시지면 False, force=True면 tombstone 무시)"""
+        if message_id in self._ids:
+            return False
+        if message_id in self._tombstones:
+            if not force:
+                return False
+            self._tombstones.pop(message_id)
+        self._ids[message_id] = None
+        self._changed()
+        return True
+
+    def update(self, message_ids: Iterable[int]) -> int:
+        """여러 메시지 추가 후 새로 추가된 수 반환"""
+        return sum(1 for message_id in message_ids if self.add(message_id))
+
+    def remove(self, message_ids: Iterable[int]) -> List[int]:
+        """메시지 삭제 (tombstone 남김) 후 실제로 삭제된 ID를 목록 순서대로 반환"""
+        targets = set(message_ids)
+        removed = [message_id for message_id in self.snapshot() if message_id in targets]
+        now = time.time()
+        for message_id in removed:
+            del self._ids[message_id]
+            self._tombstones[message_id] = now
+        if removed:
+            self._changed()
+        return removed
+
+    def is_deleted(self, message_id: int) -> bool:
+        return message_id in self._tombstones
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """현재 목록의 읽기 전용 사본 (변경이 없으면 같은 객체를 재사용)"""
+        if self._snapshot is None:
+            ids = self._ids.keys()
+            self._snapshot = tuple(sorted(ids)) if self.order == 'id' else tuple(ids)
+        return self._snapshot
+
+    def first(self) -> Optional[int]:
+        snapshot = self.snapshot()
+        return snapshot[0] if snapshot else None
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.snapshot())
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+
+@dataclass
+class GroupRecord:
+    """등록된 그룹 하나의 기록"""
+    group_id: str
+    title: Optional[str] = None
+    status: str = 'active'  # active 또는 봇의 멤버 상태(member/administrator/...)
+    added_at: float = field(default_factory=time.time)
+    last_success_at: Optional[float] = None
+    consecutive_failures: int = 0
+    last_error: Optional[str] = None
+
+
+class GroupRegistry:
+    """등록된 그룹 목록 (등록 순서 유지)"""
+
+    def __init__(self):
+        self._records: Dict[str, GroupRecord] = {}
+        self._snapshot: Tuple[str, ...] = ()
+
+    def add(self, group_id: str, title: Optional[str] = None, added_at: Optional[float] = None) -> bool:
+        """그룹 등록 (이미 있으면 False)"""
+        group_id = str(group_id)
+        if group_id in self._records:
+            return False
+        record = GroupRecord(group_id, title=title)
+        if added_at is not None:
+            record.added_at = added_at
+        self._records[group_id] = record
+        self._snapshot = self._snapshot + (group_id,)
+        return True
+
+    def update(self, group_ids: Iterable[str]) -> List[str]:
+        """여러 그룹 등록 후 새로 등록된 그룹 ID 목록 반환"""
+        return [str(group_id) for group_id in group_ids if self.add(group_id)]
+
+    def remove(self, group_id: str) -> Optional[GroupRecord]:
+        """그룹 제거 후 기록 반환 (없으면 None)"""
+        record = self._records.pop(str(group_id), None)
+        if record is not None:
+            self._snapshot = tuple(self._records)
+        return record
+
+    def migrate(self, old_group_id: str, new_group_id: str) -> bool:
+        """그룹 ID 변경 (일반 그룹 → 슈퍼그룹), 등록 순서와 기록은 그대로 유지
+
+        새 ID가 이미 등록되어 있으면 예전 ID만 제거합니다. 예전 ID가 없으면 False.
+        """
+        old_group_id, new_group_id = str(old_group_id), str(new_group_id)
+        record = self._records.get(old_group_id)
+        if record is None or old_group_id == new_group_id:
+            return False
+        if new_group_id in self._records:
+            self.remove(old_group_id)
+            return True
+        record.group_id = new_group_id
+        self._records = {
+            (new_group_id if group_id == old_group_id else group_id): value
+            for group_id, value in self._records.items()
+        }
+        self._snapshot = tuple(self._records)
+        return True
+
+    def get(self, group_id: str) -> Optional[GroupRecord]:
+        return self._records.get(str(group_id))
+
+    def snapshot(self) -> Tuple[str, ...]:
+        """현재 그룹 ID의 읽기 전용 사본 (등록/제거가 없으면 같은 객체를 재사용)"""
+        return self._snapshot
+
+    def record_success(self, group_id: str, title: Optional[str] = None):
+        record = self._records.get(str(group_id))
+        if record is None:
+            return
+        record.last_success_at = time.time()
+        record.consecutive_failures = 0
+        record.last_error = None
+        if title:
+            record.title = title
+
+    def record_failure(self, group_id: str, error: Optional[str] = None):
+        record = self._records.get(str(group_id))
+        if record is None:
+            return
+        record.consecutive_failures += 1
+        record.last_error = error
+
+    def set_status(self, group_id: str, status: str, title: Optional[str] = None):
+        record = self._records.get(str(group_id))
+        if record is None:
+            return
+        record.status = status
+        if title:
+            record.title = title
+
+    def failing(self, threshold: int = 3) -> List[GroupRecord]:
+        """연속으로 threshold번 이상 실패 중인 그룹"""
+        return [record for record in self._records.values() if record.consecutive_failures >= threshold]
+
+    def __contains__(self, group_id: str) -> bool:
+        return str(group_id) in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
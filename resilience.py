@@ -0,0 +1,158 @@
+"""
+그룹별 회로 차단기 (circuit breaker)
+계속 실패하는 그룹에 매번 재시도와 상태 조회를 반복하지 않도록, 연속 실패가 쌓이면
+일정 시간 동안 그 그룹의 전송을 API 호출 없이 건너뜁니다.
+
+    closed    - 정상. 연속 실패가 failure_threshold번이 되면 open
+    open      - 전송을 건너뜀. 대기 시간이 지나면 half_open
+    half_open - 확인 전송(probe) 1번만 허용. 성공하면 closed, 실패하면 더 긴 대기 후 다시 open
+
+대기 시간은 열릴 때마다 두 배로 늘어나고(최대 max_delay), 여러 그룹이 동시에 다시 시도하지 않도록
+±jitter 비율만큼 무작위로 흔듭니다.
+"""
+import logging
+import random
+import time
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 회로 상태
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, jitter: float = 0.5) -> float:
+    """attempt번째(1부터) 재시도 전 대기 시간 (지수 증가 + 무작위 흔들기)"""
+    delay = min(cap, base * (2 ** max(0, attempt - 1)))
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+class CircuitBreaker:
+    """대상 하나(그룹)의 회로 차단기
+
+    Args:
+        failure_threshold: 회로를 여는 연속 실패 횟수
+        base_delay: 처음 열렸을 때 대기 시간 (초)
+        max_delay: 최대 대기 시간 (초)
+        jitter: 대기 시간을 흔드는 비율 (0.2 → ±20%)
+    """
+
+    def __init__(self, failure_threshold: int = 3, base_delay: float = 60, max_delay: float = 3600, jitter: float = 0.2):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.state = CLOSED
+        self.failures = 0  # 연속 실패 횟수
+        self.trips = 0  # 닫히지 않고 연달아 열린 횟수 (대기 시간 계산용)
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.skipped = 0  # 열려 있어서 건너뛴 전송 수 (누적)
+
+    def allow(self) -> bool:
+        """지금 전송을 시도해도 되는지 (half_open에서는 확인 전송 1번만 허용)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.open_until:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        self.skipped += 1
+        return False
+
+    @property
+    def probing(self) -> bool:
+        return self.state == HALF_OPEN
+
+    def remaining(self) -> float:
+        """다시 시도할 수 있을 때까지 남은 시간 (초)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.open_until - time.monotonic())
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """실패 기록 후 이번 실패로 회로가 열렸으면 True"""
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._trip()
+            return True
+        return False
+
+    def release(self):
+        """결과를 판단할 수 없는 시도 (예: 원본 메시지 삭제) - 확인 전송 기회를 돌려줌"""
+        self.probe_in_flight = False
+
+    def _trip(self):
+        self.trips += 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (self.trips - 1)))
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.state = OPEN
+        self.open_until = time.monotonic() + delay
+        self.probe_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """그룹 ID별 회로 차단기 모음 (같은 설정으로 필요할 때 생성)"""
+
+    def __init__(self, failure_threshold: int = 3, base_delay: float = 60, max_delay: float = 3600, jitter: float = 0.2):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        key = str(key)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.base_delay, self.max_delay, self.jitter)
+            self._breakers[key] = breaker
+        return breaker
+
+    def allow(self, key: str) -> bool:
+        return self.get(key).allow()
+
+    def record_success(self, key: str):
+        breaker = self._breakers.get(str(key))
+        if breaker is not None:
+            if breaker.state != CLOSED:
+                logger.info(f"🟢 회로 닫힘: {key} (확인 전송 성공, 정상 전송 재개)")
+            breaker.record_success()
+
+    def record_failure(self, key: str):
+        breaker = self.get(key)
+        if breaker.record_failure():
+            logger.warning(f"🔴 회로 열림: {key} (연속 실패 {breaker.failures}번, {breaker.remaining():.0f}초 동안 전송 건너뜀)")
+
+    def release(self, key: str):
+        breaker = self._breakers.get(str(key))
+        if breaker is not None:
+            breaker.release()
+
+    def forget(self, key: str):
+        self._breakers.pop(str(key), None)
+
+    def state_of(self, key: str) -> str:
+        breaker = self._breakers.get(str(key))
+        return breaker.state if breaker is not None else CLOSED
+
+    def open_keys(self) -> List[str]:
+        """열려 있거나 확인 중인 대상"""
+        return [key for key, breaker in self._breakers.items() if breaker.state != CLOSED]
+
+    def stats(self) -> Dict[str, int]:
+        counts = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        for breaker in self._breakers.values():
+            counts[breaker.state] += 1
+        counts['skipped'] = sum(breaker.skipped for breaker in self._breakers.values())
+        return counts
@@ -0,0 +1,193 @@
+"""
+텔레그램 오류 분류와 재시도 정책
+에러 메시지 문자열 대신 telegram.error 예외 타입으로 오류 종류를 정하고,
+작업(전달, 고정, 그룹 조회, 응답 전송 등)마다 정해진 재시도 횟수/전체 시간 제한에 따라 다시 시도합니다.
+
+- 다시 보내도 결과가 같은 오류(권한 없음, 그룹 없음, 원본 삭제 등)는 재시도하지 않습니다.
+- RetryAfter(429)는 레이트 리미터(ratelimit.py)가 텔레그램이 알려준 시간만큼 기다린 뒤 재시도하므로
+  기본 정책은 다시 시도하지 않습니다. (두 계층이 모두 재시도하면 요청 1개가 최대 3×3번 나가게 됨)
+- BadRequest는 하위 타입이 없으므로 알려진 설명 문구로만 세분합니다. (이 모듈 안에서만)
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, FrozenSet, Optional, TypeVar, Union
+
+from telegram.error import BadRequest, ChatMigrated, Conflict, Forbidden, InvalidToken, NetworkError, RetryAfter, TelegramError, TimedOut
+
+from ratelimit import retry_after_seconds
+from resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 재시도할 때마다 (정책 이름, 오류 종류)로 호출할 함수 (봇이 시작할 때 set_retry_listener로 등록, 지표 기록용)
+_retry_listener: Optional[Callable[[str, str], None]] = None
+
+
+def set_retry_listener(listener: Optional[Callable[[str, str], None]]):
+    global _retry_listener
+    _retry_listener = listener
+
+# 오류 종류
+RATE_LIMITED = 'rate_limited'  # RetryAfter - 정해진 시간 후 재시도
+TRANSIENT = 'transient'  # TimedOut, NetworkError - 잠시 후 재시도
+MIGRATED = 'migrated'  # ChatMigrated - 그룹이 슈퍼그룹으로 바뀜 (새 ID로 보내야 함)
+CHAT_GONE = 'chat_gone'  # 그룹이 없거나 봇이 제거/차단됨
+FORBIDDEN = 'forbidden'  # 그룹에 있지만 보낼 권한이 없음
+MESSAGE_MISSING = 'message_missing'  # 원본(채널) 메시지가 삭제됨
+NO_RIGHTS = 'no_rights'  # 고정 등 관리자 권한 없음
+BAD_REQUEST = 'bad_request'  # 그 밖의 잘못된 요청 (재시도해도 같음)
+CONFLICT = 'conflict'  # 다른 인스턴스가 getUpdates/webhook 사용 중
+FATAL = 'fatal'  # 토큰 오류 등 봇을 계속 실행할 수 없음
+UNKNOWN = 'unknown'  # 분류되지 않은 텔레그램 오류
+INTERNAL = 'internal'  # 텔레그램 오류가 아닌 예외 (코드 오류 등, 재시도 안 함)
+
+# 재시도해도 결과가 바뀌지 않는 오류
+PERMANENT_KINDS = frozenset({MIGRATED, CHAT_GONE, FORBIDDEN, MESSAGE_MISSING, NO_RIGHTS, BAD_REQUEST, FATAL, INTERNAL})
+
+# BadRequest/Forbidden 설명 문구 → 오류 종류 (텔레그램 Bot API 응답 문구, 소문자)
+DESCRIPTION_KINDS = (
+    ('message to forward not found', MESSAGE_MISSING),
+    ('messages to forward not found', MESSAGE_MISSING),
+    ('message to copy not found', MESSAGE_MISSING),
+    ('message to pin not found', MESSAGE_MISSING),
+    ('message not found', MESSAGE_MISSING),
+    ('message_id_invalid', MESSAGE_MISSING),
+    ('chat not found', CHAT_GONE),
+    ('user not found', CHAT_GONE),
+    ('group chat was deactivated', CHAT_GONE),
+    ('bot was kicked', CHAT_GONE),
+    ('bot was blocked', CHAT_GONE),
+    ('bot is not a member', CHAT_GONE),
+    ('not enough rights', NO_RIGHTS),
+    ('no rights', NO_RIGHTS),
+    ('have no rights', NO_RIGHTS),
+)
+
+
+@dataclass(frozen=True)
+class ErrorInfo:
+    """분류된 오류"""
+    kind: str
+    error: BaseException
+    retry_after: Optional[float] = None  # RATE_LIMITED: 기다려야 하는 시간 (초)
+    new_chat_id: Optional[int] = None  # MIGRATED: 새 슈퍼그룹 ID
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind not in PERMANENT_KINDS
+
+    @property
+    def removed_status(self) -> str:
+        """CHAT_GONE일 때 chat_cache에 기록할 상태"""
+        return 'kicked' if 'kicked' in str(self.error).lower() else 'left'
+
+
+def classify(error: BaseException) -> ErrorInfo:
+    """예외를 오류 종류로 분류 (타입 우선, BadRequest/Forbidden만 설명 문구로 세분)"""
+    if isinstance(error, RetryAfter):
+        return ErrorInfo(RATE_LIMITED, error, retry_after=retry_after_seconds(error))
+    if isinstance(error, ChatMigrated):
+        return ErrorInfo(MIGRATED, error, new_chat_id=error.new_chat_id)
+    if isinstance(error, InvalidToken):
+        return ErrorInfo(FATAL, error)
+    if isinstance(error, Conflict):
+        return ErrorInfo(CONFLICT, error)
+    if isinstance(error, Forbidden):
+        kind = _description_kind(error)
+        return ErrorInfo(kind if kind in (CHAT_GONE, NO_RIGHTS) else FORBIDDEN, error)
+    # BadRequest는 NetworkError의 하위 클래스이므로 먼저 확인
+    if isinstance(error, BadRequest):
+        return ErrorInfo(_description_kind(error) or BAD_REQUEST, error)
+    if isinstance(error, (TimedOut, NetworkError, asyncio.TimeoutError)):
+        return ErrorInfo(TRANSIENT, error)
+    if isinstance(error, TelegramError):
+        return ErrorInfo(UNKNOWN, error)
+    return ErrorInfo(INTERNAL, error)
+
+
+def _description_kind(error: TelegramError) -> Optional[str]:
+    description = getattr(error, 'message', str(error)).lower()
+    for fragment, kind in DESCRIPTION_KINDS:
+        if fragment in description:
+            return kind
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """작업 하나의 재시도 정책
+
+    Args:
+        name: 작업 이름 (로그용)
+        max_attempts: 최대 시도 횟수 (첫 시도 포함)
+        deadline: 첫 시도부터 마지막 재시도까지의 전체 시간 제한 (초, 이 안에 다시 시도할 수 없으면 포기)
+        base_delay: 첫 재시도 대기 시간 (초, 이후 두 배씩 증가하고 무작위로 흔듦)
+        max_delay: 재시도 대기 시간 상한 (초)
+        retry_on: 재시도할 오류 종류 (RetryAfter는 레이트 리미터가 재시도하므로 기본값에 RATE_LIMITED 없음)
+    """
+    name: str
+    max_attempts: int = 3
+    deadline: float = 30.0
+    base_delay: float = 2.0
+    max_delay: float = 10.0
+    retry_on: FrozenSet[str] = field(default=frozenset({TRANSIENT, UNKNOWN}))
+
+
+# 작업별 정책
+POLICIES: Dict[str, RetryPolicy] = {
+    # 그룹으로 메시지 전달 (실패하면 전송 대기열/다음 사이클에서 다시 보내므로 오래 붙잡지 않음)
+    'forward': RetryPolicy('forward', max_attempts=3, deadline=30),
+    'forward_batch': RetryPolicy('forward_batch', max_attempts=3, deadline=45),
+    # 회로가 반쯤 열린 그룹의 확인 전송 - 재시도 없이 1번
+    'probe': RetryPolicy('probe', max_attempts=1, deadline=0),
+    'pin': RetryPolicy('pin', max_attempts=2, deadline=10, base_delay=1),
+    # get_chat_member/get_chat (실패해도 전송은 계속 시도)
+    'chat_info': RetryPolicy('chat_info', max_attempts=2, deadline=10, base_delay=1),
+    # 명령어 응답/등록 안내 메시지
+    'reply': RetryPolicy('reply', max_attempts=3, deadline=20, base_delay=1),
+    # webhook 확인/삭제/등록 (시작할 때 한 번, 다른 인스턴스가 쓰는 중이면 기다림)
+    'webhook': RetryPolicy('webhook', max_attempts=10, deadline=120, base_delay=3, max_delay=15,
+                           retry_on=frozenset({TRANSIENT, CONFLICT, UNKNOWN})),
+}
+
+
+async def call_with_policy(
+    policy: Union[str, RetryPolicy],
+    operation: Callable[[], Awaitable[T]],
+    target: str = '',
+) -> T:
+    """operation을 정책에 따라 실행 (재시도할 수 없거나 횟수/시간을 넘으면 마지막 예외를 그대로 발생)
+
+    Args:
+        policy: RetryPolicy 또는 POLICIES의 이름
+        operation: 호출할 때마다 새 요청을 보내는 코루틴 함수 (인자 없음)
+        target: 로그에 표시할 대상 (예: "그룹 -100123")
+    """
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    started_at = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await operation()
+        except Exception as e:
+            info = classify(e)
+            if info.kind not in policy.retry_on or attempt >= policy.max_attempts:
+                raise
+            if info.kind == RATE_LIMITED:
+                # retry_on에 RATE_LIMITED를 넣은 정책만 (기본은 레이트 리미터가 재시도)
+                delay = info.retry_after + 0.1
+            else:
+                delay = backoff_delay(attempt, base=policy.base_delay, cap=policy.max_delay)
+            if time.monotonic() - started_at + delay > policy.deadline:
+                logger.warning(f"⌛ {policy.name} 재시도 시간 제한({policy.deadline:.0f}초) 초과로 포기 ({target}): {e!r}")
+                raise
+            logger.warning(f"🔄 {policy.name} 실패 ({info.kind}, 시도 {attempt}/{policy.max_attempts}) {target} - {delay:.1f}초 후 재시도: {e}")
+            if _retry_listener is not None:
+                _retry_listener(policy.name, info.kind)
+            await asyncio.sleep(delay)
@@ -0,0 +1,187 @@
+"""
+계층형 타이밍 휠 스케줄러
+예약된 전송(그룹 액터의 다음 사이클 전송 등)을 모두 휠의 항목으로 보관합니다.
+등록/취소는 O(1)이고, 드라이버 코루틴은 가장 가까운 만료 시점까지만 잠들기 때문에
+수만 개의 예약이 있어도 대기 중에는 거의 비용이 들지 않습니다.
+
+레벨 0 휠은 resolution 단위 틱을 slots개 담고, 위 레벨로 갈수록 한 칸이 slots배씩
+넓어집니다 (기본값: 0.1초 × 256칸 × 4레벨 ≈ 13년). 위 레벨의 항목은 아래 레벨의
+한 바퀴가 끝날 때마다 아래로 내려옵니다.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """휠에 등록된 예약 항목 (cancel()로 취소)"""
+
+    __slots__ = ('deadline', 'tick', 'callback', 'args', 'name', 'cancelled', '_slot', '_wheel')
+
+    def __init__(self, deadline: float, tick: int, callback: Callable[..., Any], args: tuple, name: Optional[str], wheel: 'TimingWheel'):
+        self.deadline = deadline  # time.monotonic() 기준 만료 시각
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.name = name
+        self.cancelled = False
+        self._slot: Optional[Set['TimerHandle']] = None
+        self._wheel = wheel
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        if self._slot is not None:
+            self._slot.discard(self)
+            self._slot = None
+            self._wheel._count -= 1
+
+    def __repr__(self):
+        remaining = self.deadline - time.monotonic()
+        return f"<TimerHandle {self.name or self.callback!r} in {remaining:.1f}s>"
+
+
+class TimingWheel:
+    """계층형 타이밍 휠
+
+    Args:
+        resolution: 틱 간격 (초) - 예약 시각의 정밀도
+        slots: 레벨마다 칸 수 (2의 거듭제곱)
+        levels: 레벨 수
+    """
+
+    def __init__(self, resolution: float = 0.1, slots: int = 256, levels: int = 4):
+        if slots & (slots - 1):
+            raise ValueError("slots는 2의 거듭제곱이어야 합니다.")
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._wheels: List[List[Set[TimerHandle]]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._origin = time.monotonic()
+        self._current_tick = 0
+        self._count = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._wake_at = float('inf')
+        self._running = False
+
+    def __len__(self):
+        return self._count
+
+    def _tick_of(self, deadline: float) -> int:
+        # 만료 시각을 올림해서 틱으로 변환 (예약 시각보다 일찍 실행되지 않도록)
+        ticks = (deadline - self._origin) / self.resolution
+        tick = int(ticks)
+        if tick < ticks:
+            tick += 1
+        return max(tick, self._current_tick + 1)
+
+    def _place(self, handle: TimerHandle):
+        delta = handle.tick - self._current_tick
+        for level in range(self.levels):
+            if delta < (1 << (self._bits * (level + 1))) or level == self.levels - 1:
+                index = (handle.tick >> (self._bits * level)) & self._mask
+                slot = self._wheels[level][index]
+                slot.add(handle)
+                handle._slot = slot
+                return
+
+    def schedule_at(self, deadline: float, callback: Callable[..., Any], *args, name: Optional[str] = None) -> TimerHandle:
+        """time.monotonic() 기준 deadline에 callback(*args) 실행 예약"""
+        handle = TimerHandle(deadline, self._tick_of(deadline), callback, args, name, self)
+        self._place(handle)
+        self._count += 1
+        if deadline < self._wake_at and self._wakeup is not None:
+            self._wakeup.set()
+        return handle
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args, name: Optional[str] = None) -> TimerHandle:
+        """delay초 후 callback(*args) 실행 예약"""
+        return self.schedule_at(time.monotonic() + delay, callback, *args, name=name)
+
+    def pending(self) -> List[TimerHandle]:
+        """예약된 항목 목록 (만료 시각 순, 상태 확인용)"""
+        handles = [handle for wheel in self._wheels for slot in wheel for handle in slot]
+        return sorted(handles, key=lambda handle: handle.deadline)
+
+    def _cascade(self, level: int):
+        """위 레벨의 현재 칸에 있는 항목을 아래 레벨로 다시 배치"""
+        index = (self._current_tick >> (self._bits * level)) & self._mask
+        slot = self._wheels[level][index]
+        if not slot:
+            return
+        handles = list(slot)
+        slot.clear()
+        for handle in handles:
+            self._place(handle)
+
+    def _advance(self, target_tick: int):
+        """target_tick까지 틱을 진행하며 만료된 항목 실행"""
+        while self._current_tick < target_tick:
+            self._current_tick += 1
+            for level in range(1, self.levels):
+                if self._current_tick & ((1 << (self._bits * level)) - 1):
+                    break
+                self._cascade(level)
+
+            slot = self._wheels[0][self._current_tick & self._mask]
+            if not slot:
+                continue
+            expired = [handle for handle in slot if handle.tick <= self._current_tick]
+            for handle in expired:
+                slot.discard(handle)
+                handle._slot = None
+                self._count -= 1
+            for handle in sorted(expired, key=lambda h: h.deadline):
+                try:
+                    handle.callback(*handle.args)
+                except Exception as e:
+                    logger.error(f"❌ 예약 작업 실행 오류 ({handle.name or handle.callback!r}): {e}", exc_info=True)
+
+    def _next_wake_tick(self) -> Optional[int]:
+        """다음에 깨어나야 할 틱 (레벨 0에서 가장 가까운 항목 또는 다음 내려오기 시점)"""
+        if self._count == 0:
+            return None
+        for offset in range(1, self.slots + 1):
+            tick = self._current_tick + offset
+            slot = self._wheels[0][tick & self._mask]
+            if any(handle.tick == tick for handle in slot):
+                return tick
+            if tick & self._mask == 0:
+                return tick  # 위 레벨에서 내려올 항목 확인
+        return self._current_tick + self.slots
+
+    async def run(self):
+        """드라이버 코루틴 - 만료 시각까지 잠들었다가 예약 작업 실행"""
+        self._wakeup = asyncio.Event()
+        self._running = True
+        try:
+            while self._running:
+                now_tick = int((time.monotonic() - self._origin) / self.resolution)
+                self._advance(now_tick)
+
+                next_tick = self._next_wake_tick()
+                self._wakeup.clear()
+                if next_tick is None:
+                    self._wake_at = float('inf')
+                    timeout = None
+                else:
+                    self._wake_at = self._origin + next_tick * self.resolution
+                    timeout = max(0.0, self._wake_at - time.monotonic())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._running = False
+            self._wake_at = float('inf')
+
+    def stop(self):
+        self._running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
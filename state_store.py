@@ -0,0 +1,293 @@
+"""
+봇 상태 저장소 (SQLite)
+메시지 ID 목록, 등록된 그룹, 설정값, 그룹별 사이클 위치, 메시지별 마지막 전송 시각,
+슈퍼그룹으로 바뀐 그룹의 ID 변경 기록을 하나의 SQLite 파일에 보관합니다.
+변경이 있을 때 파일 전체를 다시 쓰는 대신 바뀐 행만 트랜잭션으로 기록하므로
+그룹/메시지가 수천 개로 늘어나도 저장 비용이 일정합니다.
+기록은 persistence.WriteBehindPersister가 변경을 모아 별도 스레드에서 apply()로 합니다.
+
+스키마는 meta 테이블의 schema_version으로 관리하고, 열 때 필요한 마이그레이션을 순서대로 적용합니다.
+예전 버전이 쓰던 message_ids.txt / registered_groups.txt / settings.txt는 상태 DB에 처음 한 번만 가져옵니다.
+가져온 뒤에는 meta.legacy_imported가 기록되어 파일이 바뀌어도(배포마다 새로 checkout되는 경우 등)
+다시 읽지 않으므로, 삭제된 메시지나 봇이 제거된 그룹이 되살아나지 않습니다.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from outbox import open_database
+
+logger = logging.getLogger(__name__)
+
+# 버전별 마이그레이션 (순서대로 적용, 적용된 버전은 meta.schema_version에 기록)
+MIGRATIONS: Dict[int, List[str]] = {
+    1: [
+        "CREATE TABLE messages (message_id INTEGER PRIMARY KEY, added_at REAL NOT NULL)",
+        "CREATE TABLE groups (group_id TEXT PRIMARY KEY, added_at REAL NOT NULL)",
+        "CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    ],
+    2: [
+        # 그룹별 사이클 위치 (종료 시 저장, 다음에 보낼 메시지 ID가 NULL이면 새 사이클부터)
+        "CREATE TABLE rotation (group_id TEXT PRIMARY KEY, cycle INTEGER NOT NULL, next_message_id INTEGER, updated_at REAL NOT NULL)",
+    ],
+    3: [
+        # 다음 전송 예정 시각 (재시작 후에도 메시지 간격/재전송 대기를 지킴)
+        "ALTER TABLE rotation ADD COLUMN next_due_at REAL",
+        # 메시지별 마지막 전송 시각 (새 메시지의 재전송 간격 확인용)
+        "CREATE TABLE sent_messages (message_id INTEGER PRIMARY KEY, sent_at REAL NOT NULL)",
+    ],
+    4: [
+        # 슈퍼그룹으로 바뀐 그룹의 예전 ID → 새 ID (config의 TARGET_GROUP_IDS에 예전 ID가 남아 있어도 새 ID로 보냄)
+        "CREATE TABLE group_migrations (old_group_id TEXT PRIMARY KEY, new_group_id TEXT NOT NULL, migrated_at REAL NOT NULL)",
+    ],
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+# 예전 버전의 텍스트 파일
+LEGACY_MESSAGE_IDS_FILE = 'message_ids.txt'
+LEGACY_GROUPS_FILE = 'registered_groups.txt'
+LEGACY_SETTINGS_FILE = 'settings.txt'
+
+
+def read_legacy_lines(path: Path) -> List[str]:
+    """주석과 빈 줄을 뺀 줄 목록"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+class StateStore:
+    """메시지 ID / 그룹 / 설정값 저장소
+
+    Args:
+        path: SQLite 파일 경로 (전송 대기열과 같은 파일을 써도 됨)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self.conn = open_database(self.path)
+        with self._lock:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._migrate()
+
+    def close(self):
+        if self.conn is not None:
+            with self._lock:
+                self.conn.close()
+            self.conn = None
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    def _migrate(self):
+        current = int(self._get_meta('schema_version') or 0)
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(f"상태 DB 스키마 버전({current})이 이 봇이 아는 버전({SCHEMA_VERSION})보다 높습니다: {self.path}")
+        for version in range(current + 1, SCHEMA_VERSION + 1):
+            with self._transaction():
+                for statement in MIGRATIONS[version]:
+                    self.conn.execute(statement)
+                self._set_meta('schema_version', version)
+            logger.info(f"🗄️ 상태 DB 스키마 {version}버전 적용 ({self.path})")
+
+    def import_legacy_files(self, directory: Path) -> Dict[str, int]:
+        """예전 텍스트 파일의 항목을 한 번만 가져옴 (이미 가져온 DB면 아무것도 하지 않음, 이미 있는 항목은 유지)
+
+        Returns:
+            파일 이름별 새로 가져온 항목 수
+        """
+        imported: Dict[str, int] = {}
+        with self._lock:
+            if self._get_meta('legacy_imported') is not None:
+                return imported
+            # 파일 수정 시각으로 다시 가져오던 예전 방식의 DB는 이미 가져온 것으로 봄
+            if self.conn.execute("SELECT 1 FROM meta WHERE key LIKE 'legacy_mtime:%'").fetchone():
+                with self._transaction():
+                    self.conn.execute("DELETE FROM meta WHERE key LIKE 'legacy_mtime:%'")
+                    self._set_meta('legacy_imported', time.time())
+                return imported
+            failed = False
+            for name, importer in (
+                (LEGACY_MESSAGE_IDS_FILE, self._import_message_ids),
+                (LEGACY_GROUPS_FILE, self._import_groups),
+                (LEGACY_SETTINGS_FILE, self._import_settings),
+            ):
+                path = directory / name
+                if not path.exists():
+                    continue
+                try:
+                    lines = read_legacy_lines(path)
+                    with self._transaction():
+                        imported[name] = importer(lines)
+                except Exception as e:
+                    # 실패한 파일이 있으면 다음 시작 때 다시 시도 (이미 가져온 항목은 INSERT OR IGNORE로 유지)
+                    logger.error(f"❌ {name} 가져오기 실패: {e}", exc_info=True)
+                    failed = True
+                    continue
+                logger.info(f"📥 {name}에서 {imported[name]}개 항목을 상태 DB로 가져왔습니다.")
+            if not failed:
+                with self._transaction():
+                    self._set_meta('legacy_imported', time.time())
+        return imported
+
+    def _import_message_ids(self, lines: List[str]) -> int:
+        now = time.time()
+        rows = []
+        for line in lines:
+            try:
+                rows.append((int(line), now))
+            except ValueError:
+                logger.debug(f"라인 '{line}'을 정수로 변환 실패")
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO messages (message_id, added_at) VALUES (?, ?)", rows)
+        return self.conn.total_changes - before
+
+    def _import_groups(self, lines: List[str]) -> int:
+        now = time.time()
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO groups (group_id, added_at) VALUES (?, ?)", [(line, now) for line in lines])
+        return self.conn.total_changes - before
+
+    def _import_settings(self, lines: List[str]) -> int:
+        count = 0
+        for line in lines:
+            if '=' not in line:
+                continue
+            key, value = (part.strip() for part in line.split('=', 1))
+            self.conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", (key, value))
+            count += 1
+        return count
+
+    # --- 조회 (시작 시 asyncio.to_thread로 실행) / 기록 (persistence.WriteBehindPersister가 호출) ---
+
+    def load_message_ids(self) -> List[int]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT message_id FROM messages ORDER BY message_id")]
+
+    def load_group_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT group_id FROM groups ORDER BY rowid")]
+
+    def load_settings(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT key, value FROM settings"))
+
+    def load_rotation(self) -> Dict[str, dict]:
+        """그룹별 사이클 위치 {group_id: {'cycle', 'next_message_id', 'next_due_at'}}"""
+        with self._lock:
+            rows = self.conn.execute("SELECT group_id, cycle, next_message_id, next_due_at FROM rotation").fetchall()
+        return {
+            group_id: {'cycle': cycle, 'next_message_id': next_message_id, 'next_due_at': next_due_at}
+            for group_id, cycle, next_message_id, next_due_at in rows
+        }
+
+    def load_sent_messages(self, since: float) -> Dict[int, float]:
+        """since 이후에 전송한 메시지의 마지막 전송 시각 (그보다 오래된 기록은 삭제)"""
+        with self._lock:
+            self.conn.execute("DELETE FROM sent_messages WHERE sent_at < ?", (since,))
+            return dict(self.conn.execute("SELECT message_id, sent_at FROM sent_messages"))
+
+    def load_group_migrations(self) -> Dict[str, str]:
+        """슈퍼그룹으로 바뀐 그룹 {예전 ID: 새 ID}"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT old_group_id, new_group_id FROM group_migrations"))
+
+    def _migrate_group(self, old_group_id: str, new_group_id: str, now: float):
+        """그룹 ID 변경 - 그룹 목록과 사이클 위치의 예전 ID를 새 ID로 (새 ID에 이미 있는 행은 유지)"""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO groups (group_id, added_at) SELECT ?, added_at FROM groups WHERE group_id = ?",
+            (new_group_id, old_group_id),
+        )
+        self.conn.execute("DELETE FROM groups WHERE group_id = ?", (old_group_id,))
+        self.conn.execute("UPDATE OR IGNORE rotation SET group_id = ? WHERE group_id = ?", (new_group_id, old_group_id))
+        self.conn.execute("DELETE FROM rotation WHERE group_id = ?", (old_group_id,))
+        self.conn.execute(
+            """INSERT INTO group_migrations (old_group_id, new_group_id, migrated_at) VALUES (?, ?, ?)
+               ON CONFLICT (old_group_id) DO UPDATE SET new_group_id = excluded.new_group_id, migrated_at = excluded.migrated_at""",
+            (old_group_id, new_group_id, now),
+        )
+
+    def apply(
+        self,
+        messages: Dict[int, bool],
+        groups: Dict[str, bool],
+        settings: Dict[str, str],
+        rotation: Dict[str, Optional[dict]],
+        sent: Dict[int, float],
+        migrations: List[Tuple[str, str]] = (),
+    ):
+        """여러 변경을 한 트랜잭션으로 기록 (messages/groups: True=추가, False=제거, rotation: None=삭제, sent: 마지막 전송 시각)
+
+        migrations(예전 그룹 ID, 새 그룹 ID)는 다른 변경보다 먼저 적용합니다.
+        """
+        now = time.time()
+        with self._lock, self._transaction():
+            for old_group_id, new_group_id in migrations:
+                self._migrate_group(old_group_id, new_group_id, now)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO messages (message_id, added_at) VALUES (?, ?)",
+                [(message_id, now) for message_id, present in messages.items() if present],
+            )
+            removed_messages = [(message_id,) for message_id, present in messages.items() if not present]
+            self.conn.executemany("DELETE FROM messages WHERE message_id = ?", removed_messages)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO groups (group_id, added_at) VALUES (?, ?)",
+                [(group_id, now) for group_id, present in groups.items() if present],
+            )
+            removed_groups = [(group_id,) for group_id, present in groups.items() if not present]
+            self.conn.executemany("DELETE FROM groups WHERE group_id = ?", removed_groups)
+            self.conn.executemany("DELETE FROM rotation WHERE group_id = ?", removed_groups)
+            self.conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                list(settings.items()),
+            )
+            self.conn.executemany(
+                """INSERT INTO rotation (group_id, cycle, next_message_id, next_due_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (group_id) DO UPDATE SET cycle = excluded.cycle, next_message_id = excluded.next_message_id,
+                       next_due_at = excluded.next_due_at, updated_at = excluded.updated_at""",
+                [
+                    (group_id, position['cycle'], position['next_message_id'], position.get('next_due_at'), now)
+                    for group_id, position in rotation.items() if position is not None
+                ],
+            )
+            self.conn.executemany(
+                "DELETE FROM rotation WHERE group_id = ?",
+                [(group_id,) for group_id, position in rotation.items() if position is None],
+            )
+            self.conn.executemany(
+                """INSERT INTO sent_messages (message_id, sent_at) VALUES (?, ?)
+                   ON CONFLICT (message_id) DO UPDATE SET sent_at = max(sent_at, excluded.sent_at)""",
+                list(sent.items()),
+            )
+            self.conn.executemany("DELETE FROM sent_messages WHERE message_id = ?", removed_messages)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ~ COMMIT (예외 시 ROLLBACK)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 저장소 최상위 모듈(outbox.py 등)을 그대로 import
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class FakeClock:
+    """모듈의 time 대신 넣는 시계 (now를 직접 옮김, time()은 monotonic()과 같이 흐르는 벽시계)"""
+
+    def __init__(self, now: float = 1000.0, wall_offset: float = 1_700_000_000.0):
+        self.now = now
+        self.wall_offset = wall_offset
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now + self.wall_offset
+
+    async def sleep(self, seconds: float):
+        self.now += max(0.0, seconds)
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """모듈들의 time을 같은 FakeClock으로 바꾸는 함수 (예: clock = fake_clock(expiring))"""
+    def patch(*modules):
+        clock = FakeClock()
+        for module in modules:
+            monkeypatch.setattr(module, 'time', clock)
+        return clock
+    return patch
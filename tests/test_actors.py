@@ -0,0 +1,166 @@
+"""그룹 액터의 다음 전송 시각 계산(catchup_policy)과 사이클 위치 저장/복원 확인"""
+import logging
+
+import pytest
+
+import actors
+from actors import GroupDeliveryActor
+from scheduler import TimingWheel
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(actors)
+
+
+def make_actor(catchup_policy='coalesce'):
+    async def deliver(group_id, batch):
+        return True
+
+    return GroupDeliveryActor(
+        '-100',
+        TimingWheel(),
+        deliver,
+        rotation_source=lambda: [[1], [2], [3]],
+        interval=lambda: 60,
+        resend_wait=lambda: 600,
+        catchup_policy=catchup_policy,
+    )
+
+
+# 1000초에 예정된 전송을 보낸 뒤 now에 다음 시각을 정함 (간격 60초 → 원래 다음 예정은 1060초)
+@pytest.mark.parametrize('policy, now, scheduled_for, next_tick_at, missed_ticks', [
+    # 놓친 시각 없음 - 정책과 관계없이 예정 시각 그대로
+    ('skip', 1030, 1060, 1060, 0),
+    ('coalesce', 1030, 1060, 1060, 0),
+    ('burst', 1030, 1060, 1060, 0),
+    # 1번 놓침 (1060초를 10초 넘김)
+    ('skip', 1070, 1120, 1120, 1),
+    ('coalesce', 1070, 1060, 1070, 0),
+    ('burst', 1070, 1060, 1060, 0),
+    # 4번 놓침 (1060, 1120, 1180, 1240초)
+    ('skip', 1250, 1300, 1300, 4),
+    ('coalesce', 1250, 1240, 1250, 3),
+    ('burst', 1250, 1060, 1060, 0),
+])
+def test_plan_next_tick(clock, policy, now, scheduled_for, next_tick_at, missed_ticks):
+    actor = make_actor(policy)
+    assert actor.scheduled_for == 1000
+    clock.now = now
+    actor.plan_next_tick(60)
+    assert actor.scheduled_for == scheduled_for
+    assert actor.next_tick_at == next_tick_at
+    assert actor.missed_ticks == missed_ticks
+
+
+def test_burst_catches_up_one_period_at_a_time(clock):
+    actor = make_actor('burst')
+    clock.now = 1250
+    deadlines = []
+    while actor.next_tick_at <= clock.now:
+        actor.plan_next_tick(60)
+        deadlines.append(actor.next_tick_at)
+    assert deadlines == [1060, 1120, 1180, 1240, 1300]
+
+
+def test_coalesce_returns_to_original_period(clock):
+    actor = make_actor('coalesce')
+    clock.now = 1250
+    actor.plan_next_tick(60)
+    assert actor.next_tick_at == 1250
+    clock.now = 1255  # 밀린 전송을 바로 보냄
+    actor.plan_next_tick(60)
+    assert actor.next_tick_at == 1300
+
+
+@pytest.mark.parametrize('policy', ['skip', 'coalesce'])
+def test_dropped_ticks_warn_once_per_cycle(clock, caplog, policy):
+    actor = make_actor(policy)
+    caplog.set_level(logging.DEBUG, logger='actors')
+
+    def warnings():
+        return [record for record in caplog.records if record.levelno == logging.WARNING]
+
+    for _ in range(3):
+        clock.now = actor.scheduled_for + 200
+        actor.plan_next_tick(60)
+    assert len(warnings()) == 1
+    assert len(caplog.records) == 3  # 나머지는 debug
+
+    actor.cycle += 1
+    clock.now = actor.scheduled_for + 200
+    actor.plan_next_tick(60)
+    assert len(warnings()) == 2
+
+
+def test_late_tick_without_drops_is_not_warned(clock, caplog):
+    actor = make_actor('coalesce')
+    caplog.set_level(logging.DEBUG, logger='actors')
+    clock.now = 1070
+    actor.plan_next_tick(60)
+    assert [record.levelno for record in caplog.records] == [logging.DEBUG]
+
+
+def test_snapshot_resume_round_trip(clock):
+    actor = make_actor()
+    actor.rotation = [[1], [2], [3]]
+    actor.cursor = 1
+    actor.cycle = 3
+    actor.next_tick_at = clock.now + 120
+    position = actor.snapshot()
+    assert position == {'cycle': 3, 'next_message_id': 2, 'next_due_at': clock.time() + 120}
+
+    # 재시작: monotonic 기준은 바뀌고 벽시계는 30초 지남
+    wall = clock.time()
+    clock.now = 5.0
+    clock.wall_offset = wall + 30 - clock.now
+    restarted = make_actor()
+    restarted.resume(position)
+    assert restarted.cycle == 3
+    assert restarted.next_tick_at == pytest.approx(5.0 + 90)
+    assert restarted.scheduled_for == restarted.next_tick_at
+    assert restarted.resume_cursor([[1], [2], [3]]) == 1
+    assert restarted.resume_message_id is None
+
+
+def test_snapshot_of_finished_cycle_starts_next_cycle(clock):
+    actor = make_actor()
+    actor.rotation = None
+    actor.cycle = 4
+    position = actor.snapshot()
+    assert position['cycle'] == 4
+    assert position['next_message_id'] is None
+    restarted = make_actor()
+    restarted.resume(position)
+    assert restarted.resume_cursor([[1], [2], [3]]) == 0
+
+
+@pytest.mark.parametrize('message_id, rotation, cursor', [
+    (None, [[1], [2], [3]], 0),
+    (6, [[1, 2], [5, 6], [9]], 1),
+    # 저장된 메시지가 삭제됨 - 그 다음 ID부터
+    (5, [[1], [3], [7], [9]], 2),
+    # 마지막 메시지가 삭제됨 - 새 사이클처럼 처음부터
+    (10, [[1], [3], [7], [9]], 0),
+])
+def test_resume_cursor(clock, message_id, rotation, cursor):
+    actor = make_actor()
+    actor.resume({'cycle': 2, 'next_message_id': message_id})
+    assert actor.resume_cursor(rotation) == cursor
+    assert actor.resume_cursor(rotation) == 0  # 이어서 시작하는 것은 한 번만
+
+
+def test_resume_with_past_due_time_sends_immediately(clock):
+    actor = make_actor()
+    actor.resume({'cycle': 2, 'next_message_id': 3, 'next_due_at': clock.time() - 500})
+    assert actor.next_tick_at == clock.now
+    assert actor.scheduled_for == clock.now
+    assert actor.cycle == 2
+
+
+def test_resume_without_position_keeps_defaults(clock):
+    actor = make_actor()
+    actor.resume({})
+    assert actor.cycle == 1
+    assert actor.next_tick_at == clock.now
+    assert actor.resume_cursor([[1]]) == 0
@@ -0,0 +1,82 @@
+"""만료 시간/최대 크기가 있는 딕셔너리 확인"""
+import pytest
+
+import expiring
+from expiring import ExpiringDict
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(expiring)
+
+
+def test_entry_expires_after_ttl(clock):
+    entries = ExpiringDict(ttl=10)
+    entries['a'] = 1
+    clock.now += 9.9
+    assert entries['a'] == 1
+    assert entries.remaining('a') == pytest.approx(0.1)
+    clock.now += 0.1
+    assert 'a' not in entries
+    assert entries.get('a') is None
+    with pytest.raises(KeyError):
+        entries['a']
+    assert entries.stats()['expired'] == 1
+
+
+def test_per_entry_ttl(clock):
+    entries = ExpiringDict(ttl=10)
+    entries.set('short', 1, ttl=1)
+    entries.set('long', 2)
+    clock.now += 5
+    assert list(entries) == ['long']
+
+
+def test_overwrite_refreshes_expiry_and_order(clock):
+    entries = ExpiringDict(ttl=10, max_entries=2)
+    entries['a'] = 1
+    entries['b'] = 2
+    clock.now += 5
+    entries['a'] = 3
+    entries['c'] = 4
+    # 가장 오래 전에 넣은 'b'가 버려짐
+    assert list(entries) == ['a', 'c']
+    clock.now += 6
+    assert entries['a'] == 3
+
+
+def test_max_entries_evicts_oldest(clock):
+    entries = ExpiringDict(ttl=100, max_entries=3)
+    for key in range(5):
+        entries[key] = key
+    assert list(entries) == [2, 3, 4]
+    assert entries.stats()['evicted'] == 2
+
+
+def test_writes_sweep_expired_entries(clock):
+    entries = ExpiringDict(ttl=10)
+    for key in range(3):
+        entries[key] = key
+    clock.now += 10
+    entries['new'] = 1
+    # 만료된 항목은 조회하지 않아도 쓰기 때 앞쪽부터 정리됨
+    assert len(entries._entries) == 1
+
+
+def test_purge_and_len(clock):
+    entries = ExpiringDict(ttl=10)
+    entries.set('a', 1, ttl=1)
+    entries.set('b', 2, ttl=20)
+    clock.now += 2
+    assert entries.purge() == 1
+    assert len(entries) == 1
+
+
+def test_pop(clock):
+    entries = ExpiringDict(ttl=10)
+    entries['a'] = 1
+    assert entries.pop('a') == 1
+    assert entries.pop('a', 'gone') == 'gone'
+    entries['b'] = 2
+    clock.now += 10
+    assert entries.pop('b', 'expired') == 'expired'
@@ -0,0 +1,84 @@
+"""그룹 목록의 기록/스냅샷/슈퍼그룹 이전 확인"""
+from registry import GroupRegistry
+
+
+def test_add_keeps_registration_order():
+    groups = GroupRegistry()
+    assert groups.update(['-3', -1, '-2', '-1']) == ['-3', '-1', '-2']
+    assert not groups.add('-3')
+    assert groups.snapshot() == ('-3', '-1', '-2')
+    assert -1 in groups
+    assert len(groups) == 3
+
+
+def test_snapshot_is_copy_on_write():
+    groups = GroupRegistry()
+    groups.update(['-1', '-2'])
+    snapshot = groups.snapshot()
+    assert groups.snapshot() is snapshot
+    groups.record_failure('-1', 'error')
+    assert groups.snapshot() is snapshot
+    groups.add('-3')
+    groups.remove('-1')
+    # 전송 시작 때 받은 스냅샷은 등록/제거의 영향을 받지 않음
+    assert snapshot == ('-1', '-2')
+    assert groups.snapshot() == ('-2', '-3')
+
+
+def test_remove_returns_record():
+    groups = GroupRegistry()
+    groups.add('-1', title='그룹')
+    record = groups.remove('-1')
+    assert record.title == '그룹'
+    assert groups.remove('-1') is None
+    assert not groups
+
+
+def test_migrate_keeps_position_and_record():
+    groups = GroupRegistry()
+    groups.update(['-1', '-2', '-3'])
+    groups.record_failure('-2', 'error')
+    assert groups.migrate('-2', '-1002')
+    assert groups.snapshot() == ('-1', '-1002', '-3')
+    assert '-2' not in groups
+    record = groups.get('-1002')
+    assert record.group_id == '-1002'
+    assert record.consecutive_failures == 1
+
+
+def test_migrate_onto_existing_group_drops_old_id():
+    groups = GroupRegistry()
+    groups.update(['-1', '-2', '-1002'])
+    assert groups.migrate('-2', '-1002')
+    assert groups.snapshot() == ('-1', '-1002')
+
+
+def test_migrate_unknown_or_same_id():
+    groups = GroupRegistry()
+    groups.add('-1')
+    assert not groups.migrate('-9', '-1009')
+    assert not groups.migrate('-1', '-1')
+    assert groups.snapshot() == ('-1',)
+
+
+def test_success_resets_failures():
+    groups = GroupRegistry()
+    groups.add('-1')
+    for _ in range(3):
+        groups.record_failure('-1', 'timeout')
+    assert [record.group_id for record in groups.failing(3)] == ['-1']
+    groups.record_success('-1', title='새 제목')
+    record = groups.get('-1')
+    assert record.consecutive_failures == 0
+    assert record.last_error is None
+    assert record.last_success_at is not None
+    assert record.title == '새 제목'
+    assert groups.failing(3) == []
+
+
+def test_records_for_unknown_group_are_ignored():
+    groups = GroupRegistry()
+    groups.record_success('-1')
+    groups.record_failure('-1')
+    groups.set_status('-1', 'kicked')
+    assert groups.get('-1') is None
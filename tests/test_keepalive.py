@@ -0,0 +1,56 @@
+"""keepalive 웹서버의 webhook 엔드포인트 확인 (녹화한 업데이트를 POST)"""
+import pytest
+from telegram import Update
+
+import keepalive
+from config import WEBHOOK_PATH
+
+# 채널 글 하나를 받은 업데이트 (getUpdates 응답에서 가져온 형태)
+RECORDED_UPDATE = {
+    'update_id': 123456789,
+    'channel_post': {
+        'message_id': 42,
+        'date': 1760000000,
+        'chat': {'id': -1001234567890, 'type': 'channel', 'title': '원본 채널'},
+        'text': '공지',
+    },
+}
+
+
+@pytest.fixture
+def client():
+    yield keepalive.app.test_client()
+    keepalive.clear_webhook_sink()
+
+
+def test_webhook_passes_recorded_update_with_secret(client):
+    received = []
+    keepalive.set_webhook_sink(received.append, 'secret')
+    response = client.post(WEBHOOK_PATH, json=RECORDED_UPDATE, headers={'X-Telegram-Bot-Api-Secret-Token': 'secret'})
+    assert response.status_code == 200
+    assert received == [RECORDED_UPDATE]
+    # 봇의 enqueue_webhook_update처럼 Update로 바꿀 수 있는 형태로 전달됨
+    assert Update.de_json(received[0], None).channel_post.message_id == 42
+
+
+def test_webhook_rejects_wrong_secret(client):
+    received = []
+    keepalive.set_webhook_sink(received.append, 'secret')
+    assert client.post(WEBHOOK_PATH, json=RECORDED_UPDATE).status_code == 403
+    assert client.post(WEBHOOK_PATH, json=RECORDED_UPDATE, headers={'X-Telegram-Bot-Api-Secret-Token': 'other'}).status_code == 403
+    assert received == []
+
+
+def test_webhook_rejects_invalid_update_and_inactive_sink(client):
+    headers = {'X-Telegram-Bot-Api-Secret-Token': 'secret'}
+    assert client.post(WEBHOOK_PATH, json=RECORDED_UPDATE, headers=headers).status_code == 503
+    keepalive.set_webhook_sink(lambda data: None, 'secret')
+    assert client.post(WEBHOOK_PATH, json={'message': {}}, headers=headers).status_code == 400
+
+
+def test_webhook_without_secret_accepts_local_post(client):
+    # WEBHOOK_URL과 WEBHOOK_SECRET이 모두 없으면 비밀 토큰 없이 로컬에서 POST해 시험
+    received = []
+    keepalive.set_webhook_sink(received.append, None)
+    assert client.post(WEBHOOK_PATH, json=RECORDED_UPDATE).status_code == 200
+    assert received == [RECORDED_UPDATE]
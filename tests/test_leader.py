@@ -0,0 +1,106 @@
+"""리더 임대 획득/연장/만료 후 넘겨받기와 fencing token 확인"""
+import asyncio
+
+import pytest
+
+import leader
+from leader import LeaderLease
+from outbox import Outbox
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(leader)
+
+
+@pytest.fixture
+def make_lease(tmp_path):
+    leases = []
+
+    def make(**kwargs):
+        lease = LeaderLease(str(tmp_path / 'state.db'), ttl=30, **kwargs)
+        lease.open()
+        leases.append(lease)
+        return lease
+
+    yield make
+    for lease in leases:
+        lease.close()
+
+
+def acquire(lease: LeaderLease):
+    lease.token = lease._try_acquire()
+    return lease.token
+
+
+def test_only_one_instance_acquires(clock, make_lease):
+    first, second = make_lease(), make_lease()
+    assert acquire(first) == 1
+    assert second._try_acquire() is None
+    assert first.holds_fence(first.conn)
+    assert not second.holds_fence(second.conn)
+
+
+def test_renew_extends_lease(clock, make_lease):
+    first, second = make_lease(), make_lease()
+    acquire(first)
+    clock.now += 20
+    assert first._renew()
+    clock.now += 20  # 처음 임대대로라면 만료됐을 시각
+    assert second._try_acquire() is None
+    assert first.holds_fence(first.conn)
+
+
+def test_expired_lease_is_taken_over_with_new_token(clock, make_lease):
+    first, second = make_lease(), make_lease()
+    acquire(first)
+    clock.now += 31
+    assert not first.holds_fence(first.conn)
+    assert acquire(second) == 2
+    # 예전 리더는 연장하지 못하고, 다시 살아나도 임대를 빼앗지 못함
+    assert not first._renew()
+    assert first._try_acquire() is None
+    assert second.holds_fence(second.conn)
+
+
+def test_release_lets_next_instance_acquire_immediately(clock, make_lease):
+    first, second = make_lease(), make_lease()
+    acquire(first)
+    first._release()
+    assert acquire(second) == 2
+
+
+def test_stale_fencing_token_cannot_claim_outbox_rows(clock, make_lease):
+    first, second = make_lease(), make_lease()
+    acquire(first)
+    old_box = Outbox(first.path)
+    new_box = Outbox(first.path)
+    old_box.open()
+    new_box.open()
+    try:
+        old_box.fence = first.holds_fence
+        new_box.fence = second.holds_fence
+        old_box._enqueue(1, -100, ['-200'], leased=False)
+        clock.now += 31
+        acquire(second)
+        # 임대를 잃은 예전 리더는 남은 전송을 가져가지 못함
+        assert old_box._claim(1) == []
+        assert [item.message_id for item in new_box._claim(1)] == [1]
+    finally:
+        old_box.close()
+        new_box.close()
+
+
+def test_acquire_waits_until_holder_releases(clock, make_lease):
+    first, second = make_lease(), make_lease(heartbeat_interval=0.01)
+
+    async def run():
+        acquire(first)
+        waiting = asyncio.create_task(second.acquire())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        await first.release()
+        return await asyncio.wait_for(waiting, 1)
+
+    assert asyncio.run(run()) == 2
+    assert second.is_leader
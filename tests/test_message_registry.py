@@ -0,0 +1,67 @@
+"""순서 있는 메시지 목록과 tombstone 확인"""
+import pytest
+
+from registry import MessageRegistry
+
+
+def test_id_order_and_no_duplicates():
+    messages = MessageRegistry(order='id')
+    assert messages.update([30, 10, 20, 10]) == 3
+    assert not messages.add(20)
+    assert list(messages) == [10, 20, 30]
+    assert messages.first() == 10
+    assert len(messages) == 3
+
+
+def test_insertion_order():
+    messages = MessageRegistry(order='insertion')
+    messages.update([30, 10, 20])
+    assert messages.snapshot() == (30, 10, 20)
+
+
+def test_unknown_order():
+    with pytest.raises(ValueError):
+        MessageRegistry(order='random')
+
+
+def test_snapshot_reused_until_changed():
+    messages = MessageRegistry()
+    messages.update([1, 2])
+    snapshot = messages.snapshot()
+    version = messages.version
+    assert messages.snapshot() is snapshot
+    assert not messages.add(1)
+    assert messages.version == version
+    messages.add(3)
+    assert messages.version == version + 1
+    # 사이클 도중 목록이 바뀌어도 이미 받은 스냅샷은 그대로
+    assert snapshot == (1, 2)
+    assert messages.snapshot() == (1, 2, 3)
+
+
+def test_remove_leaves_tombstone():
+    messages = MessageRegistry(order='insertion')
+    messages.update([1, 2, 3])
+    assert messages.remove([3, 1, 99]) == [1, 3]
+    assert list(messages) == [2]
+    assert messages.is_deleted(1)
+    assert not messages.add(1)
+    assert 1 not in messages
+    assert messages.add(1, force=True)
+    assert not messages.is_deleted(1)
+    assert list(messages) == [2, 1]
+
+
+def test_tombstone_expires():
+    messages = MessageRegistry(tombstone_ttl=0)
+    messages.add(1)
+    messages.remove([1])
+    assert not messages.is_deleted(1)
+    assert messages.add(1)
+
+
+def test_empty_registry():
+    messages = MessageRegistry()
+    assert not messages
+    assert messages.first() is None
+    assert messages.remove([1]) == []
@@ -0,0 +1,147 @@
+"""전송 대기열(outbox) 임대 처리 확인"""
+import asyncio
+import time
+
+import pytest
+
+from outbox import Outbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / 'state.db'), lease_seconds=60)
+    box.open()
+    yield box
+    box.close()
+
+
+def other_instance(box: Outbox) -> Outbox:
+    """같은 DB를 쓰는 다른 인스턴스"""
+    other = Outbox(box.path, lease_seconds=box.lease_seconds)
+    other.open()
+    return other
+
+
+def expire_lease(box: Outbox, message_id: int, group_id: str):
+    box.conn.execute(
+        "UPDATE outbox SET lease_expires_at = ? WHERE message_id = ? AND group_id = ?",
+        (time.time() - 1, message_id, group_id),
+    )
+
+
+def row(box: Outbox, message_id: int, group_id: str):
+    return box.conn.execute(
+        "SELECT status, attempts, lease_owner FROM outbox WHERE message_id = ? AND group_id = ?",
+        (message_id, group_id),
+    ).fetchone()
+
+
+def test_complete_ignores_row_reclaimed_by_another_instance(outbox):
+    outbox._enqueue(1, -100, ['-200'], leased=True)
+    expire_lease(outbox, 1, '-200')
+    other = other_instance(outbox)
+    try:
+        assert [item.message_id for item in other._claim(1)] == [1]
+        outbox._complete(1, '-200')
+        assert row(outbox, 1, '-200') == ('pending', 0, other.owner)
+    finally:
+        other.close()
+
+
+def test_fail_ignores_row_reclaimed_by_another_instance(outbox):
+    outbox._enqueue(1, -100, ['-200'], leased=True)
+    expire_lease(outbox, 1, '-200')
+    other = other_instance(outbox)
+    try:
+        assert [item.message_id for item in other._claim(1)] == [1]
+        assert outbox._fail(1, '-200', 'late failure') == 0.0
+        assert row(outbox, 1, '-200') == ('pending', 0, other.owner)
+        assert other._fail(1, '-200', 'failure') == outbox.retry_delay(1)
+        assert row(outbox, 1, '-200') == ('pending', 1, None)
+    finally:
+        other.close()
+
+
+def test_complete_and_fail_by_lease_holder(outbox):
+    outbox._enqueue(1, -100, ['-200', '-300'], leased=True)
+    outbox._complete(1, '-200')
+    assert row(outbox, 1, '-200') is None
+    assert outbox._fail(1, '-300', 'failure') == outbox.retry_delay(1)
+    assert row(outbox, 1, '-300') == ('pending', 1, None)
+
+
+def test_enqueue_skips_rows_leased_elsewhere(outbox):
+    assert outbox._enqueue(1, -100, ['-200'], leased=True) == ['-200']
+    # 같은 인스턴스라도 이미 임대 중인 행은 다시 가져가지 않음 (두 곳에서 같은 전송을 보내지 않게)
+    assert outbox._enqueue(1, -100, ['-200', '-300'], leased=True) == ['-300']
+    expire_lease(outbox, 1, '-200')
+    assert outbox._enqueue(1, -100, ['-200'], leased=True) == ['-200']
+
+
+def test_workers_stay_idle_while_leased_row_is_in_flight(outbox):
+    claims = 0
+    claim = outbox._claim
+
+    def counting_claim(limit):
+        nonlocal claims
+        claims += 1
+        return claim(limit)
+
+    async def deliver(item):
+        raise AssertionError(f"임대 중인 행을 워커가 가져감: {item}")
+
+    async def run():
+        nonlocal claims
+        outbox._claim = counting_claim
+        outbox.start_workers(deliver, count=4)
+        await asyncio.sleep(0.2)
+        claims = 0
+        # forward_message처럼 바로 보낼 행을 임대해서 넣은 뒤 워커를 깨움
+        await outbox.enqueue(1, -100, ['-200', '-300'], leased=True)
+        outbox.wake()
+        await asyncio.sleep(1)
+        await outbox.stop_workers(timeout=1)
+
+    asyncio.run(run())
+    # 깨웠을 때 워커마다 한 번씩만 확인하고 임대 만료까지 대기 (빈 확인을 반복하지 않음)
+    assert claims <= 4
+
+
+def test_defer_keeps_attempts_and_releases_lease(outbox):
+    outbox._enqueue(1, -100, ['-200'], leased=True)
+    assert outbox._fail(1, '-200', 'failure') == outbox.retry_delay(1)
+    assert [item.attempts for item in outbox._claim(1)] == []  # 백오프 중
+    outbox.conn.execute("UPDATE outbox SET next_attempt_at = 0")
+    assert [item.attempts for item in outbox._claim(1)] == [1]
+    # 회로가 열려 미룬 전송은 시도 횟수를 쓰지 않고 다음 시도 시각만 바뀜
+    outbox._defer(1, '-200', 120)
+    assert row(outbox, 1, '-200') == ('pending', 1, None)
+    assert outbox._next_due() == pytest.approx(time.time() + 120, abs=5)
+    assert outbox._claim(1) == []
+
+
+def test_enqueue_and_claim_respect_fence(outbox):
+    fenced = True
+    outbox.fence = lambda conn: not fenced
+    # 리더 임대가 없으면 새 전송을 넣지도, 남은 전송을 가져가지도 않음
+    assert outbox._enqueue(1, -100, ['-200'], leased=True) == []
+    assert row(outbox, 1, '-200') is None
+    fenced = False
+    assert outbox._enqueue(1, -100, ['-200'], leased=False) == ['-200']
+    fenced = True
+    assert outbox._claim(1) == []
+    fenced = False
+    assert [item.message_id for item in outbox._claim(1)] == [1]
+
+
+def test_purge_dead_keeps_rows_within_retention(outbox):
+    outbox.max_attempts = 1
+    outbox.dead_retention = 3600
+    outbox._enqueue(1, -100, ['-200', '-300'], leased=True)
+    assert outbox._fail(1, '-200', 'failure') is None
+    assert outbox._fail(1, '-300', 'failure') is None
+    assert outbox._stats() == {'dead': 2}
+    outbox.conn.execute("UPDATE outbox SET next_attempt_at = ? WHERE group_id = '-200'", (time.time() - 7200,))
+    assert outbox._purge_dead() == 1
+    assert row(outbox, 1, '-200') is None
+    assert row(outbox, 1, '-300') == ('dead', 1, None)
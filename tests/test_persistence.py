@@ -0,0 +1,94 @@
+"""상태 DB 지연 기록기의 변경 합치기와 실패 시 되돌리기 확인"""
+import pytest
+
+from persistence import WriteBehindPersister
+
+
+class FakeStore:
+    """apply() 호출을 기록하는 상태 저장소 (fail이 True면 예외)"""
+
+    def __init__(self):
+        self.applied = []
+        self.fail = False
+
+    def apply(self, messages, groups, settings, rotation, sent, migrations=()):
+        if self.fail:
+            raise OSError("disk full")
+        self.applied.append((dict(messages), dict(groups), dict(settings), dict(rotation), dict(sent), list(migrations)))
+
+
+@pytest.fixture
+def store():
+    return FakeStore()
+
+
+@pytest.fixture
+def persister(store):
+    return WriteBehindPersister(store, flush_window=0, retry_delay=0)
+
+
+def test_changes_are_coalesced_into_one_write(persister, store):
+    persister.add_message(1)
+    persister.remove_messages([1, 2])
+    persister.add_group(-100)
+    persister.set_settings(interval=300)
+    persister.set_settings(interval=600)
+    persister.mark_sent([1], 10.0)
+    persister.mark_sent([1], 20.0)
+    assert persister.pending == 5
+    assert persister.flush()
+    assert store.applied == [({1: False, 2: False}, {'-100': True}, {'interval': '600'}, {}, {1: 20.0}, [])]
+    assert persister.pending == 0
+    assert persister.flush()
+    assert len(store.applied) == 1
+
+
+def test_failed_write_is_restored(persister, store):
+    persister.add_message(1)
+    persister.set_rotation('-100', {'cycle': 2, 'next_message_id': 5})
+    persister.migrate_group('-1', '-1001')
+    store.fail = True
+    assert not persister.flush()
+    assert persister.last_error == "disk full"
+    assert persister.pending == 3
+    store.fail = False
+    assert persister.flush()
+    assert store.applied == [({1: True}, {}, {}, {'-100': {'cycle': 2, 'next_message_id': 5}}, {}, [('-1', '-1001')])]
+    assert persister.last_error is None
+
+
+def test_newer_change_wins_over_restored_one(persister, store):
+    persister.set_settings(interval=300)
+    persister.migrate_group('-1', '-1001')
+    changes = persister._take()
+    # 기록하는 사이에 같은 설정이 다시 바뀌고 새 그룹 ID 변경이 들어옴
+    persister.set_settings(interval=600)
+    persister.migrate_group('-2', '-1002')
+    persister._restore(changes)
+    assert persister.flush()
+    _, _, settings, _, _, migrations = store.applied[0]
+    assert settings == {'interval': '600'}
+    # 실패한 변경이 나중 변경보다 먼저 기록됨
+    assert migrations == [('-1', '-1001'), ('-2', '-1002')]
+
+
+def test_migrate_moves_unwritten_changes(persister, store):
+    persister.add_group('-1')
+    persister.set_rotation('-1', {'cycle': 1, 'next_message_id': 3})
+    persister.migrate_group('-1', '-1001')
+    assert persister.flush()
+    _, groups, _, rotation, _, migrations = store.applied[0]
+    assert groups == {'-1001': True}
+    assert rotation == {'-1001': {'cycle': 1, 'next_message_id': 3}}
+    assert migrations == [('-1', '-1001')]
+
+
+def test_writer_thread_flushes_and_close_drains(store):
+    persister = WriteBehindPersister(store, flush_window=0.01, retry_delay=0.01)
+    persister.start()
+    try:
+        persister.add_message(1)
+    finally:
+        persister.close(timeout=5)
+    assert persister.pending == 0
+    assert [applied[0] for applied in store.applied] == [{1: True}]
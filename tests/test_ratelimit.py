@@ -0,0 +1,105 @@
+"""토큰 버킷 충전/정지와 레이트 리미터의 RetryAfter 재시도 확인"""
+import asyncio
+import time
+
+import pytest
+from telegram.error import RetryAfter
+
+import ratelimit
+from ratelimit import TelegramRateLimiter, TokenBucket, is_group_chat_id
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(ratelimit)
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=5)
+    bucket.tokens = 0
+    clock.now += 1
+    bucket._refill(clock.now)
+    assert bucket.tokens == 2
+    clock.now += 10
+    bucket._refill(clock.now)
+    assert bucket.tokens == 5
+
+
+def test_pause_empties_bucket_until_it_ends(clock):
+    bucket = TokenBucket(rate=1, capacity=5)
+    bucket.pause(10)
+    assert bucket.paused_until == 1010
+    clock.now += 5
+    bucket._refill(clock.now)
+    assert bucket.tokens == 0
+    clock.now += 7
+    bucket._refill(clock.now)
+    assert bucket.tokens == 2
+
+
+def test_set_rate_keeps_earned_tokens(clock):
+    bucket = TokenBucket(rate=1, capacity=10)
+    bucket.tokens = 0
+    clock.now += 3
+    bucket.set_rate(0.5, capacity=2)
+    assert bucket.tokens == 2
+    assert bucket.rate == 0.5
+
+
+def test_acquire_waits_for_refill():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 처음 2개는 바로, 나머지 2개는 0.05초씩 기다림
+    assert 0.09 <= asyncio.run(run()) < 0.5
+
+
+def test_chat_buckets_by_chat_type():
+    limiter = TelegramRateLimiter(group_per_minute=60, private_per_second=1, group_burst=3)
+    assert is_group_chat_id(-100) and is_group_chat_id('@channel') and not is_group_chat_id(42)
+    group = limiter.get_chat_bucket(-100)
+    assert (group.rate, group.capacity) == (1, 3)
+    assert limiter.get_chat_bucket('-100') is group
+    private = limiter.get_chat_bucket(42)
+    assert (private.rate, private.capacity) == (1, 1)
+
+
+def test_retry_after_is_retried_and_reported():
+    retried = []
+    calls = 0
+
+    async def callback():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RetryAfter(0)
+        return True
+
+    async def run():
+        limiter = TelegramRateLimiter(group_per_minute=6000, on_retry=retried.append)
+        return await limiter.process_request(callback, (), {}, 'forwardMessage', {'chat_id': -100}, None)
+
+    assert asyncio.run(run()) is True
+    assert calls == 2
+    assert retried == ['forwardMessage']
+
+
+def test_retry_after_raised_when_retries_exhausted():
+    calls = 0
+
+    async def callback():
+        nonlocal calls
+        calls += 1
+        raise RetryAfter(0)
+
+    async def run():
+        limiter = TelegramRateLimiter()
+        await limiter.process_request(callback, (), {}, 'forwardMessage', {'chat_id': -100}, 0)
+
+    with pytest.raises(RetryAfter):
+        asyncio.run(run())
+    assert calls == 1
@@ -0,0 +1,93 @@
+"""그룹별 회로 차단기 상태 전이 확인"""
+import pytest
+
+import resilience
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerRegistry, backoff_delay
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(resilience)
+
+
+def test_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, base_delay=60, jitter=0)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.remaining() == 60
+    assert not breaker.allow()
+    assert breaker.skipped == 1
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, jitter=0)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=60, jitter=0)
+    breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert breaker.probing
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_with_longer_delay(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=60, max_delay=100, jitter=0)
+    breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.remaining() == 100  # 120초지만 max_delay로 제한
+    clock.now += 100
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.trips == 0
+
+
+def test_release_returns_the_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=60, jitter=0)
+    breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_jitter_stays_within_bounds(clock):
+    for _ in range(50):
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=100, jitter=0.2)
+        breaker.record_failure()
+        assert 80 <= breaker.remaining() <= 120
+
+
+def test_backoff_delay_is_capped():
+    assert backoff_delay(1, base=1, cap=30, jitter=0) == 1
+    assert backoff_delay(4, base=1, cap=30, jitter=0) == 8
+    assert backoff_delay(10, base=1, cap=30, jitter=0) == 30
+    assert 15 <= backoff_delay(10, base=1, cap=30, jitter=0.5) <= 45
+
+
+def test_registry_tracks_groups_separately(clock):
+    breakers = CircuitBreakerRegistry(failure_threshold=1, base_delay=60, jitter=0)
+    breakers.record_failure('-1')
+    assert not breakers.allow('-1')
+    assert breakers.allow('-2')
+    assert breakers.open_keys() == ['-1']
+    assert breakers.stats() == {CLOSED: 1, OPEN: 1, HALF_OPEN: 0, 'skipped': 1}
+    breakers.forget('-1')
+    assert breakers.state_of('-1') == CLOSED
+    assert breakers.open_keys() == []
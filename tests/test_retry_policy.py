@@ -0,0 +1,142 @@
+"""텔레그램 오류 분류와 작업별 재시도 정책 확인"""
+import asyncio
+
+import pytest
+from telegram.error import BadRequest, ChatMigrated, Conflict, Forbidden, InvalidToken, NetworkError, RetryAfter, TelegramError, TimedOut
+
+import retry_policy
+from retry_policy import (
+    BAD_REQUEST, CHAT_GONE, CONFLICT, FATAL, FORBIDDEN, INTERNAL, MESSAGE_MISSING, MIGRATED, NO_RIGHTS, RATE_LIMITED,
+    TRANSIENT, UNKNOWN, RetryPolicy, call_with_policy, classify,
+)
+
+
+@pytest.mark.parametrize('error, kind', [
+    (RetryAfter(5), RATE_LIMITED),
+    (ChatMigrated(-1009876543210), MIGRATED),
+    (InvalidToken(), FATAL),
+    (Conflict('Conflict: terminated by other getUpdates request; make sure that only one bot instance is running'), CONFLICT),
+    (Forbidden('Forbidden: bot was kicked from the supergroup chat'), CHAT_GONE),
+    (Forbidden('Forbidden: bot was blocked by the user'), CHAT_GONE),
+    (Forbidden('Forbidden: bot is not a member of the supergroup chat'), CHAT_GONE),
+    (Forbidden('Forbidden: not enough rights to send text messages to the chat'), NO_RIGHTS),
+    (Forbidden('Forbidden: user is deactivated'), FORBIDDEN),
+    (BadRequest('Message to forward not found'), MESSAGE_MISSING),
+    (BadRequest('Bad Request: messages to forward not found'), MESSAGE_MISSING),
+    (BadRequest('Bad Request: message_id_invalid'), MESSAGE_MISSING),
+    (BadRequest('Chat not found'), CHAT_GONE),
+    (BadRequest('Bad Request: group chat was deactivated'), CHAT_GONE),
+    (BadRequest('Bad Request: not enough rights to pin a message'), NO_RIGHTS),
+    (BadRequest('Bad Request: message text is empty'), BAD_REQUEST),
+    (TimedOut(), TRANSIENT),
+    (NetworkError('httpx.ConnectError: All connection attempts failed'), TRANSIENT),
+    (asyncio.TimeoutError(), TRANSIENT),
+    (TelegramError('Internal Server Error'), UNKNOWN),
+    (ValueError('코드 오류'), INTERNAL),
+])
+def test_classify(error, kind):
+    info = classify(error)
+    assert info.kind == kind
+    assert info.error is error
+
+
+def test_classify_keeps_retry_after_and_new_chat_id():
+    assert classify(RetryAfter(7)).retry_after == 7
+    assert classify(ChatMigrated(-1009876543210)).new_chat_id == -1009876543210
+    assert not classify(Forbidden('Forbidden: bot was kicked from the group chat')).retryable
+    assert classify(Forbidden('Forbidden: bot was kicked from the group chat')).removed_status == 'kicked'
+    assert classify(TimedOut()).retryable
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    clock = fake_clock(retry_policy)
+    monkeypatch.setattr(retry_policy.asyncio, 'sleep', clock.sleep)
+    # 무작위 흔들기 없이 base × 2^(attempt-1)
+    monkeypatch.setattr(retry_policy, 'backoff_delay', lambda attempt, base, cap: min(cap, base * 2 ** (attempt - 1)))
+    return clock
+
+
+@pytest.fixture
+def retried(monkeypatch):
+    calls = []
+    monkeypatch.setattr(retry_policy, '_retry_listener', lambda name, kind: calls.append((name, kind)))
+    return calls
+
+
+def failing(*errors, result='ok'):
+    """errors를 차례로 발생시킨 뒤 result를 반환하는 작업 (호출 수는 .calls)"""
+    async def operation():
+        operation.calls += 1
+        if operation.calls <= len(errors):
+            raise errors[operation.calls - 1]
+        return result
+    operation.calls = 0
+    return operation
+
+
+def test_retries_transient_errors_until_success(clock, retried):
+    operation = failing(TimedOut(), NetworkError('connection reset'))
+    policy = RetryPolicy('test', max_attempts=3, deadline=30, base_delay=2)
+    assert asyncio.run(call_with_policy(policy, operation)) == 'ok'
+    assert operation.calls == 3
+    assert clock.now == 1000 + 2 + 4
+    assert retried == [('test', TRANSIENT), ('test', TRANSIENT)]
+
+
+def test_gives_up_after_max_attempts(clock, retried):
+    operation = failing(*[TimedOut()] * 5)
+    policy = RetryPolicy('test', max_attempts=3, deadline=300, base_delay=2)
+    with pytest.raises(TimedOut):
+        asyncio.run(call_with_policy(policy, operation))
+    assert operation.calls == 3
+
+
+def test_gives_up_when_next_retry_would_pass_deadline(clock, retried):
+    operation = failing(*[TimedOut()] * 5)
+    # 첫 재시도는 2초 후 (제한 안), 두 번째는 2 + 4 = 6초로 제한 5초를 넘으므로 기다리지 않고 포기
+    policy = RetryPolicy('test', max_attempts=10, deadline=5, base_delay=2)
+    with pytest.raises(TimedOut):
+        asyncio.run(call_with_policy(policy, operation))
+    assert operation.calls == 2
+    assert clock.now == 1000 + 2
+    assert retried == [('test', TRANSIENT)]
+
+
+@pytest.mark.parametrize('error', [
+    Forbidden('Forbidden: bot was kicked from the supergroup chat'),
+    BadRequest('Message to forward not found'),
+    ChatMigrated(-1009876543210),
+    ValueError('코드 오류'),
+])
+def test_permanent_errors_are_not_retried(clock, retried, error):
+    operation = failing(error)
+    with pytest.raises(type(error)):
+        asyncio.run(call_with_policy('forward', operation))
+    assert operation.calls == 1
+    assert retried == []
+
+
+def test_rate_limited_is_left_to_rate_limiter(clock, retried):
+    # 기본 정책은 RetryAfter를 다시 시도하지 않음 (레이트 리미터가 이미 기다렸다 재시도함)
+    operation = failing(RetryAfter(5))
+    with pytest.raises(RetryAfter):
+        asyncio.run(call_with_policy('forward', operation))
+    assert operation.calls == 1
+    assert clock.now == 1000
+    assert retried == []
+
+
+def test_policy_can_opt_into_rate_limited_retry(clock, retried):
+    operation = failing(RetryAfter(5))
+    policy = RetryPolicy('test', retry_on=frozenset({RATE_LIMITED}))
+    assert asyncio.run(call_with_policy(policy, operation)) == 'ok'
+    assert clock.now == pytest.approx(1000 + 5.1)
+    assert retried == [('test', RATE_LIMITED)]
+
+
+def test_probe_policy_tries_once(clock, retried):
+    operation = failing(TimedOut())
+    with pytest.raises(TimedOut):
+        asyncio.run(call_with_policy('probe', operation))
+    assert operation.calls == 1
@@ -0,0 +1,92 @@
+"""타이밍 휠 예약/취소/상위 레벨에서 내려오기 확인"""
+import pytest
+
+import scheduler
+from scheduler import TimingWheel
+
+
+@pytest.fixture
+def wheel(fake_clock):
+    fake_clock(scheduler)
+    # 1초 × 4칸 × 3레벨 (레벨 0: 4초, 레벨 1: 16초, 레벨 2: 64초)
+    return TimingWheel(resolution=1, slots=4, levels=3)
+
+
+def test_slots_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        TimingWheel(slots=6)
+
+
+def test_fires_at_deadline_in_order(wheel):
+    fired = []
+    wheel.schedule(3, fired.append, 'b')
+    wheel.schedule(1, fired.append, 'a')
+    wheel.schedule(2.5, fired.append, 'c')
+    assert len(wheel) == 3
+    wheel._advance(2)
+    assert fired == ['a']
+    wheel._advance(3)
+    assert fired == ['a', 'c', 'b']
+    assert len(wheel) == 0
+
+
+def test_far_deadlines_cascade_down_before_firing(wheel):
+    fired = []
+    for delay in (5, 17, 40, 63):
+        wheel.schedule(delay, fired.append, delay)
+    # 처음에는 위 레벨에 있다가 아래 레벨의 한 바퀴가 끝날 때마다 내려옴
+    assert all(handle._slot not in wheel._wheels[0] for handle in wheel.pending())
+    for tick in range(1, 64):
+        wheel._advance(tick)
+        assert fired == [delay for delay in (5, 17, 40, 63) if delay <= tick]
+    assert len(wheel) == 0
+
+
+def test_deadline_beyond_top_level_is_not_lost(wheel):
+    fired = []
+    wheel.schedule(100, fired.append, 'late')
+    wheel._advance(99)
+    assert fired == []
+    wheel._advance(128)
+    assert fired == ['late']
+
+
+def test_cancel_removes_handle(wheel):
+    fired = []
+    handle = wheel.schedule(20, fired.append, 'x')
+    wheel.schedule(21, fired.append, 'y')
+    handle.cancel()
+    handle.cancel()
+    assert len(wheel) == 1
+    wheel._advance(30)
+    assert fired == ['y']
+
+
+def test_callback_error_does_not_stop_other_timers(wheel):
+    fired = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    wheel.schedule(1, fail)
+    wheel.schedule(1, fired.append, 'ok')
+    wheel._advance(1)
+    assert fired == ['ok']
+
+
+def test_past_deadline_runs_on_next_tick(wheel):
+    fired = []
+    wheel._advance(5)
+    wheel.schedule_at(wheel._origin, fired.append, 'past')
+    wheel._advance(6)
+    assert fired == ['past']
+
+
+def test_next_wake_tick(wheel):
+    assert wheel._next_wake_tick() is None
+    wheel.schedule(2, lambda: None)
+    assert wheel._next_wake_tick() == 2
+    wheel._advance(2)
+    wheel.schedule(30, lambda: None)
+    # 레벨 0이 비어 있으면 다음 내려오기 시점(한 바퀴 끝)에 깨어남
+    assert wheel._next_wake_tick() == 4
@@ -0,0 +1,142 @@
+"""상태 DB 스키마 마이그레이션, 예전 텍스트 파일 가져오기, apply() 트랜잭션 확인"""
+import sqlite3
+
+import pytest
+
+from state_store import MIGRATIONS, SCHEMA_VERSION, StateStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'state.db')
+
+
+@pytest.fixture
+def store(path):
+    state = StateStore(path)
+    state.open()
+    yield state
+    state.close()
+
+
+def create_v1_database(path: str):
+    """스키마 1버전으로 만들어진 예전 DB (메시지/그룹/설정만 있음)"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    for statement in MIGRATIONS[1]:
+        conn.execute(statement)
+    conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', '1')")
+    conn.executemany("INSERT INTO messages (message_id, added_at) VALUES (?, 0)", [(3,), (1,)])
+    conn.execute("INSERT INTO groups (group_id, added_at) VALUES ('-100', 0)")
+    conn.execute("INSERT INTO settings (key, value) VALUES ('message_interval', '600')")
+    conn.commit()
+    conn.close()
+
+
+def apply(state: StateStore, messages=None, groups=None, settings=None, rotation=None, sent=None, migrations=()):
+    state.apply(messages or {}, groups or {}, settings or {}, rotation or {}, sent or {}, migrations)
+
+
+def test_new_database_gets_current_schema(store):
+    assert store._get_meta('schema_version') == str(SCHEMA_VERSION)
+    assert store.load_message_ids() == []
+
+
+def test_migrates_v1_database_to_current_schema(path):
+    create_v1_database(path)
+    state = StateStore(path)
+    state.open()
+    try:
+        assert state._get_meta('schema_version') == str(SCHEMA_VERSION) == '4'
+        # 기존 데이터는 그대로
+        assert state.load_message_ids() == [1, 3]
+        assert state.load_group_ids() == ['-100']
+        assert state.load_settings() == {'message_interval': '600'}
+        # 2~4버전에서 추가된 사이클 위치, 전송 시각, 그룹 ID 변경 기록을 쓸 수 있음
+        apply(state, rotation={'-100': {'cycle': 2, 'next_message_id': 3, 'next_due_at': 1234.5}}, sent={3: 1000.0})
+        apply(state, migrations=[('-100', '-1001')])
+        assert state.load_rotation() == {'-1001': {'cycle': 2, 'next_message_id': 3, 'next_due_at': 1234.5}}
+        assert state.load_sent_messages(since=0) == {3: 1000.0}
+        assert state.load_group_migrations() == {'-100': '-1001'}
+        assert state.load_group_ids() == ['-1001']
+    finally:
+        state.close()
+
+
+def test_reopening_does_not_migrate_again(path, store):
+    store.conn.execute("INSERT INTO messages (message_id, added_at) VALUES (1, 0)")
+    store.close()
+    store.open()
+    assert store._get_meta('schema_version') == str(SCHEMA_VERSION)
+    assert store.load_message_ids() == [1]
+
+
+def test_refuses_newer_schema(path, store):
+    store._set_meta('schema_version', SCHEMA_VERSION + 1)
+    store.close()
+    with pytest.raises(RuntimeError):
+        StateStore(path).open()
+
+
+def test_apply_adds_and_removes_in_one_batch(store):
+    apply(store, messages={1: True, 2: True}, groups={'-100': True, '-200': True}, settings={'resend_wait_time': '3600'})
+    apply(store, messages={1: False}, groups={'-200': False})
+    assert store.load_message_ids() == [2]
+    assert store.load_group_ids() == ['-100']
+    assert store.load_settings() == {'resend_wait_time': '3600'}
+
+
+def test_apply_rolls_back_everything_on_failure(store):
+    apply(store, messages={1: True}, groups={'-100': True})
+    # 설정값이 없으면 NOT NULL 제약으로 실패 - 같은 호출의 앞선 변경도 모두 취소
+    with pytest.raises(sqlite3.IntegrityError):
+        apply(store, messages={1: False, 2: True}, groups={'-200': True}, settings={'message_interval': '60', 'resend_wait_time': None})
+    assert store.load_message_ids() == [1]
+    assert store.load_group_ids() == ['-100']
+    assert store.load_settings() == {}
+    # 실패 후에도 다음 기록은 정상
+    apply(store, messages={2: True})
+    assert store.load_message_ids() == [1, 2]
+
+
+def write_legacy_files(directory):
+    (directory / 'message_ids.txt').write_text("# 채널 메시지 ID\n1\n2\n잘못된 줄\n", encoding='utf-8')
+    (directory / 'registered_groups.txt').write_text("-100\n", encoding='utf-8')
+    (directory / 'settings.txt').write_text("message_interval=600\n", encoding='utf-8')
+
+
+def test_legacy_files_are_imported_once(store, tmp_path):
+    write_legacy_files(tmp_path)
+    assert store.import_legacy_files(tmp_path) == {'message_ids.txt': 2, 'registered_groups.txt': 1, 'settings.txt': 1}
+    assert store.load_message_ids() == [1, 2]
+    assert store.load_group_ids() == ['-100']
+    assert store.load_settings() == {'message_interval': '600'}
+
+    # 봇이 지운 메시지/그룹은 파일이 바뀌어도 되살아나지 않음
+    apply(store, messages={1: False}, groups={'-100': False})
+    (tmp_path / 'message_ids.txt').write_text("1\n2\n5\n", encoding='utf-8')
+    assert store.import_legacy_files(tmp_path) == {}
+    assert store.load_message_ids() == [2]
+    assert store.load_group_ids() == []
+
+
+def test_legacy_import_skips_database_from_mtime_version(store, tmp_path):
+    # 파일 수정 시각으로 다시 가져오던 버전이 쓰던 DB는 이미 가져온 것으로 봄
+    with store._transaction():
+        store._set_meta('legacy_mtime:message_ids.txt', '123')
+    write_legacy_files(tmp_path)
+    assert store.import_legacy_files(tmp_path) == {}
+    assert store.load_message_ids() == []
+    assert store._get_meta('legacy_mtime:message_ids.txt') is None
+    assert store._get_meta('legacy_imported') is not None
+
+
+def test_failed_legacy_import_is_retried(store, tmp_path):
+    write_legacy_files(tmp_path)
+    (tmp_path / 'settings.txt').write_bytes(b'\xff\xfe')  # UTF-8이 아님
+    imported = store.import_legacy_files(tmp_path)
+    assert 'settings.txt' not in imported
+    assert store._get_meta('legacy_imported') is None
+    (tmp_path / 'settings.txt').write_text("message_interval=600\n", encoding='utf-8')
+    assert store.import_legacy_files(tmp_path) == {'message_ids.txt': 0, 'registered_groups.txt': 0, 'settings.txt': 1}
+    assert store.load_settings() == {'message_interval': '600'}